@@ -0,0 +1,42 @@
+#!/usr/bin/python3
+""" Starts the HBNB JSON API """
+from os import getenv
+from flask import Flask, abort, jsonify
+from models import storage
+from models.engine.metrics import CONTENT_TYPE, metrics
+from api.v1.views import app_views
+
+app = Flask(__name__)
+app.url_map.strict_slashes = False
+app.register_blueprint(app_views)
+
+
+@app.teardown_appcontext
+def dispose(exception):
+    """ Remove current session """
+    storage.close()
+
+
+@app.route('/metrics')
+def storage_metrics():
+    """ Report the storage metrics in the Prometheus text format """
+    if not metrics.enabled:
+        abort(404)
+    return metrics.render(), 200, {'Content-Type': CONTENT_TYPE}
+
+
+@app.errorhandler(400)
+def bad_request(error):
+    """ Answer malformed requests in JSON """
+    return jsonify(error=error.description), 400
+
+
+@app.errorhandler(404)
+def not_found(error):
+    """ Answer unknown resources in JSON """
+    return jsonify(error='Not found'), 404
+
+
+if __name__ == '__main__':
+    app.run(host=getenv('HBNB_API_HOST', '0.0.0.0'),
+            port=int(getenv('HBNB_API_PORT', '5000')), threaded=True)
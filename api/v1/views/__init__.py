@@ -0,0 +1,7 @@
+#!/usr/bin/python3
+""" Blueprint of the /api/v1 routes """
+from flask import Blueprint
+
+app_views = Blueprint('app_views', __name__, url_prefix='/api/v1')
+
+from api.v1.views import index, objects, places  # noqa: E402,F401
@@ -0,0 +1,19 @@
+#!/usr/bin/python3
+""" Status and statistics of the API """
+from flask import jsonify
+from models import storage
+from api.v1.views import app_views
+from api.v1.views.objects import collections
+
+
+@app_views.route('/status')
+def status():
+    """ Tell whether the API is up """
+    return jsonify(status='OK')
+
+
+@app_views.route('/stats')
+def stats():
+    """ Count the objects of each class """
+    return jsonify({name: storage.count(cls)
+                    for name, cls in collections.items()})
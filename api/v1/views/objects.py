@@ -0,0 +1,249 @@
+#!/usr/bin/python3
+"""
+JSON routes shared by every model class:
+
+    GET    /api/v1/<collection>        the objects of the class
+    GET    /api/v1/<collection>/<id>   one object
+    POST   /api/v1/<collection>        create one from a JSON object
+    PUT    /api/v1/<collection>/<id>   update one from a JSON object
+    DELETE /api/v1/<collection>/<id>   delete one
+
+Lists are streamed as they are encoded, from storage.iterate(), as a
+JSON array or, with format=ndjson or an Accept: application/x-ndjson
+header, as one JSON object per line. They take limit, offset and
+order_by (a key, '-name' for descending). Both GET routes take
+fields=id,name to return only those keys.
+
+POST and PUT answer 400, not 500, for keys that cannot be set, numeric
+attributes that are not numbers and, for the database, for values its
+constraints would refuse.
+"""
+import itertools
+import json
+from flask import Response, abort, jsonify, request, stream_with_context
+from console import HBNBCommand
+from models import storage
+from models.amenity import Amenity
+from models.base_model import BaseModel
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+from api.v1.views import app_views
+
+collections = {
+    'amenities': Amenity,
+    'cities': City,
+    'places': Place,
+    'reviews': Review,
+    'states': State,
+    'users': User,
+}
+# table name -> mapped class, for foreign keys
+tables = {cls.__tablename__: cls for cls in collections.values()
+          if hasattr(cls, '__tablename__')}
+# keys set by storage, never taken from a request body
+ignored = ('id', 'created_at', 'updated_at', '__class__')
+# objects encoded per chunk of a streamed list
+CHUNK = 100
+
+
+def get_class(collection):
+    """Returns the class served under collection, or aborts with 404"""
+    cls = collections.get(collection)
+    if cls is None:
+        abort(404)
+    return cls
+
+
+def get_object(collection, id):
+    """Returns the object of collection with id, or aborts with 404"""
+    obj = storage.get(get_class(collection), id)
+    if obj is None:
+        abort(404)
+    return obj
+
+
+def get_fields():
+    """Returns the keys asked for with fields=, or None for all"""
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    return [field for field in fields.split(',') if field]
+
+
+def get_body(cls, create=False):
+    """Returns the settable keys of the JSON object sent for cls
+
+    Numeric attributes are cast as the console casts them. Aborts with
+    400 on keys that cannot be set, numbers that do not cast and, for
+    mapped classes, on NOT NULL columns left empty (or missing when
+    create is true) and foreign keys naming no object, before the
+    database refuses them.
+    """
+    data = request.get_json(silent=True)
+    if type(data) is not dict:
+        abort(400, 'Not a JSON')
+    data = {key: value for key, value in data.items()
+            if key not in ignored and not key.startswith('_')}
+    for key in data:
+        if not settable(cls, key):
+            abort(400, '{} cannot be set'.format(key))
+        if key in HBNBCommand.types and data[key] is not None:
+            try:
+                data[key] = HBNBCommand.types[key](data[key])
+            except (TypeError, ValueError):
+                abort(400, '{} must be a number'.format(key))
+    table = getattr(cls, '__table__', None)
+    if table is None:
+        return data
+    for column in table.columns:
+        if column.name in ignored:
+            continue
+        if column.name not in data:
+            if create and not column.nullable and column.default is None \
+                    and column.server_default is None:
+                abort(400, 'Missing {}'.format(column.name))
+            continue
+        value = data[column.name]
+        if value is None:
+            if not column.nullable:
+                abort(400, '{} cannot be null'.format(column.name))
+            continue
+        for key in column.foreign_keys:
+            target = tables.get(key.column.table.name)
+            if target is not None and storage.get(target, value) is None:
+                abort(400, 'No {} with id {}'.format(
+                    target.__name__, value))
+    return data
+
+
+def settable(cls, key):
+    """Tells whether a request body may set key on cls objects
+
+    Methods, read-only properties and the relationships of mapped
+    classes may not be set.
+    """
+    attr = getattr(cls, key, None)
+    if isinstance(attr, property):
+        return attr.fset is not None
+    if callable(attr):
+        return False
+    table = getattr(cls, '__table__', None)
+    return table is None or attr is None or key in table.columns
+
+
+def is_plain(value):
+    """Tells whether value is data rather than related objects"""
+    if isinstance(value, list):
+        return not any(isinstance(item, BaseModel) for item in value)
+    return not isinstance(value, BaseModel)
+
+
+def to_json(obj, fields=None):
+    """Returns the dictionary sent for obj, cut down to fields"""
+    val = obj.to_dict()
+    if fields is not None:
+        val = {key: val[key] for key in fields if key in val}
+    return {key: value for key, value in val.items() if is_plain(value)}
+
+
+def get_paging():
+    """Returns the limit and offset asked for, or aborts with 400"""
+    try:
+        limit = request.args.get('limit')
+        limit = None if limit is None else int(limit)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        abort(400, 'limit and offset must be integers')
+    return limit, offset
+
+
+def wants_ndjson():
+    """Tells whether the client asked for NDJSON rather than an array"""
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best_match(
+        ['application/json', 'application/x-ndjson']) == \
+        'application/x-ndjson'
+
+
+def stream(rows, convert=to_json):
+    """Returns the response sending rows in the format asked for
+
+    convert(row, fields) makes the dictionary sent for each row.
+    """
+    ndjson = wants_ndjson()
+    return Response(
+        stream_with_context(encode(rows, get_fields(), ndjson, convert)),
+        mimetype='application/x-ndjson' if ndjson else 'application/json')
+
+
+def encode(rows, fields, ndjson, convert=to_json):
+    """Yields rows encoded as NDJSON or a JSON array, CHUNK at a time"""
+    pieces = []
+    separator = '' if ndjson else '['
+    for obj in rows:
+        if ndjson:
+            pieces.append(json.dumps(convert(obj, fields)) + '\n')
+        else:
+            pieces.append(separator + json.dumps(convert(obj, fields)))
+            separator = ','
+        if len(pieces) == CHUNK:
+            yield ''.join(pieces)
+            pieces = []
+    if not ndjson:
+        pieces.append('[]' if separator == '[' else ']')
+    yield ''.join(pieces)
+
+
+@app_views.route('/<collection>', methods=['GET'])
+def list_objects(collection):
+    """ Stream the objects of a class """
+    cls = get_class(collection)
+    limit, offset = get_paging()
+    order_by = request.args.get('order_by', 'id')
+    rows = storage.iterate(cls, order_by=order_by, limit=limit,
+                           offset=offset)
+    # run the query now, while errors can still change the status
+    try:
+        first = next(rows, None)
+    except (AttributeError, TypeError):
+        abort(400, 'Cannot order by {}'.format(order_by))
+    if first is not None:
+        rows = itertools.chain([first], rows)
+    return stream(rows)
+
+
+@app_views.route('/<collection>/<id>', methods=['GET'])
+def show_object(collection, id):
+    """ Return one object """
+    return jsonify(to_json(get_object(collection, id), get_fields()))
+
+
+@app_views.route('/<collection>', methods=['POST'])
+def create_object(collection):
+    """ Create an object from the JSON body """
+    cls = get_class(collection)
+    obj = cls.from_dict(get_body(cls, create=True))
+    obj.save()
+    return jsonify(to_json(obj)), 201
+
+
+@app_views.route('/<collection>/<id>', methods=['PUT'])
+def update_object(collection, id):
+    """ Update an object from the JSON body """
+    obj = get_object(collection, id)
+    for key, value in get_body(type(obj)).items():
+        setattr(obj, key, value)
+    obj.save()
+    return jsonify(to_json(obj))
+
+
+@app_views.route('/<collection>/<id>', methods=['DELETE'])
+def delete_object(collection, id):
+    """ Delete an object """
+    storage.delete(get_object(collection, id))
+    storage.save()
+    return jsonify({})
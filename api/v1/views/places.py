@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+"""
+Place search:
+
+    POST /api/v1/places_search
+    GET  /api/v1/places_near?latitude=<lat>&longitude=<lon>
+
+The JSON body of places_search holds any of states, cities and
+amenities (lists of ids) and min_price, max_price and guests
+(integers); see storage.search_places() for how they combine. An
+empty body matches every place. The page is chosen and sent as the
+lists of objects.py are: limit, offset, order_by, fields and format in
+the query string.
+
+places_near lists the places nearest a point, nearest first, each with
+its distance in km; radius=<km> keeps the ones within it and limit the
+k nearest (see storage.nearby_places()). offset, fields and format
+work as for the lists.
+"""
+import math
+from flask import abort, request
+from models import storage
+from api.v1.views import app_views
+from api.v1.views.objects import get_paging, stream, to_json
+
+# body keys holding lists of ids
+lists = ('states', 'cities', 'amenities')
+# body keys holding integers
+numbers = ('min_price', 'max_price', 'guests')
+
+
+def get_filters():
+    """Returns the search filters of the JSON body, or aborts with 400"""
+    data = request.get_json(silent=True)
+    if data is None and not request.get_data():
+        data = {}
+    if type(data) is not dict:
+        abort(400, 'Not a JSON')
+    filters = {}
+    for name in lists:
+        ids = data.get(name)
+        if ids is None:
+            continue
+        if type(ids) is not list or \
+                not all(type(id) is str for id in ids):
+            abort(400, '{} must be a list of ids'.format(name))
+        filters[name] = ids
+    for name in numbers:
+        value = data.get(name)
+        if value is None:
+            continue
+        if type(value) is not int:
+            abort(400, '{} must be an integer'.format(name))
+        filters[name] = value
+    return filters
+
+
+@app_views.route('/places_search', methods=['POST'])
+def places_search():
+    """ Stream one page of the places matching the filters sent """
+    filters = get_filters()
+    limit, offset = get_paging()
+    order_by = request.args.get('order_by', 'id')
+    try:
+        places = storage.search_places(order_by=order_by, limit=limit,
+                                       offset=offset, **filters)
+    except (AttributeError, TypeError):
+        abort(400, 'Cannot order by {}'.format(order_by))
+    return stream(iter(places))
+
+
+def get_number(name, low, high=None, required=False):
+    """Returns the number passed as name, or aborts with 400"""
+    value = request.args.get(name)
+    if value is None and not required:
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        abort(400, '{} must be a number'.format(name))
+    if not math.isfinite(value):
+        abort(400, '{} must be a number'.format(name))
+    if high is None and value < low:
+        abort(400, '{} must be at least {}'.format(name, low))
+    if high is not None and not low <= value <= high:
+        abort(400, '{} must be between {} and {}'.format(name, low, high))
+    return value
+
+
+def with_distance(row, fields):
+    """Returns the dictionary sent for a (distance, place) row"""
+    gap, place = row
+    val = to_json(place, fields)
+    if fields is None or 'distance' in fields:
+        val['distance'] = round(gap, 3)
+    return val
+
+
+@app_views.route('/places_near', methods=['GET'])
+def places_near():
+    """ Stream the places nearest a point, with their distance """
+    latitude = get_number('latitude', -90, 90, required=True)
+    longitude = get_number('longitude', -180, 180, required=True)
+    radius = get_number('radius', 0)
+    limit, offset = get_paging()
+    rows = storage.nearby_places(
+        latitude, longitude, radius,
+        None if limit is None else offset + limit)
+    return stream(iter(rows[offset:]), with_distance)
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""
+Measures how many console lines are parsed and run per second.
+
+Usage: python3 -m benchmarks.console [<lines>]
+
+Runs <lines> lines (default 20000) of each kind through the parser alone
+(precmd() and the argument parser of create or update), then through
+precmd() and onecmd() as cmdloop() does, printing lines per second for
+both. Output is thrown away and nothing is written to a
+FileStorage file.
+"""
+import contextlib
+import os
+import sys
+import time
+from console import HBNBCommand
+from models import storage
+from models.place import Place
+
+
+def kinds(place):
+    """Returns the lines timed, by kind"""
+    return {
+        'create params': 'create Place city_id="0001" user_id="0001" '
+                         'name="My_little_house" number_rooms=4 '
+                         'price_by_night=300 latitude=37.773972',
+        'update': 'update Place {} name "Cosy house"'.format(place.id),
+        'dot update': 'Place.update("{}", "max_guest", 6)'.format(place.id),
+        'dot update dict': 'Place.update("{}", {{"name": "Loft", '
+                           '"max_guest": 4, "latitude": 1.5}})'.format(
+                               place.id),
+        'dot show': 'Place.show("{}")'.format(place.id),
+    }
+
+
+def parse(console, line):
+    """Parses line as console does before running it"""
+    line = console.precmd(line)
+    command, space, args = line.partition(' ')
+    if command == 'create':
+        return HBNBCommand.parse_create(args)
+    if command == 'update':
+        return HBNBCommand.parse_update(args)
+    return line
+
+
+def rate(run, line, lines):
+    """Returns the lines per second run() manages on line"""
+    start = time.perf_counter()
+    for i in range(lines):
+        run(line)
+    return lines / (time.perf_counter() - start)
+
+
+def main(lines):
+    """Prints lines per second for each kind of line"""
+    if hasattr(storage, '_FileStorage__file_path'):
+        # keep the objects in memory only
+        storage.save = lambda: None
+    console = HBNBCommand()
+    place = Place(name='Bench')
+    place.save()
+    print('{:16} {:>12} {:>12}'.format('line', 'parse/s', 'run/s'))
+    for label, line in kinds(place).items():
+        parsed = rate(lambda line: parse(console, line), line, lines)
+        with open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(devnull):
+            ran = rate(lambda line: console.onecmd(console.precmd(line)),
+                       line, lines)
+        print('{:16} {:>12.0f} {:>12.0f}'.format(label, parsed, ran))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""
+Measures how fast stored dictionaries are turned back into instances.
+
+Usage: python3 -m benchmarks.construction [<size> ...]
+
+Compares cls(**d) with cls.from_dict(d) on the same dictionaries, then
+times a full FileStorage.reload(), which uses from_dict(). Sizes default
+to 10000 and 100000 objects.
+"""
+import os
+import sys
+import tempfile
+import time
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from benchmarks.memory import fill
+
+
+def rate(build, rows):
+    """Returns the objects per second build() manages over rows"""
+    start = time.perf_counter()
+    for row in rows:
+        build(row)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def main(sizes):
+    """Prints objects per second for each way of building instances"""
+    old_path = FileStorage._FileStorage__file_path
+    print('{:8} {:>12} {:>12} {:>8} {:>12}'.format(
+        'objects', 'init obj/s', 'dict obj/s', 'speedup', 'reload obj/s'))
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            FileStorage._FileStorage__file_path = os.path.join(
+                directory, 'bench.json')
+            for size in sizes:
+                fill(size)
+                rows = [obj.to_dict() for obj in storage.all().values()]
+                init = rate(lambda row: Place(**row), rows)
+                from_dict = rate(Place.from_dict, rows)
+                storage.save()
+                storage.all().clear()
+                storage._reindex()
+                start = time.perf_counter()
+                storage.reload()
+                reload_rate = size / (time.perf_counter() - start)
+                print('{:8} {:>12.0f} {:>12.0f} {:>7.1f}x {:>12.0f}'.format(
+                    size, init, from_dict, from_dict / init, reload_rate))
+    finally:
+        FileStorage._FileStorage__file_path = old_path
+        storage.all().clear()
+        storage._reindex()
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
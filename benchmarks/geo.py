@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+"""
+Times storage.nearby_places() against a brute-force scan.
+
+Usage: python3 -m benchmarks.geo [<places> [<queries>]]
+
+Stores <places> places (default 200000), half of them spread over the
+globe between latitudes -60 and 70 and half around 100 city centres,
+then runs radius searches (5, 50 and 500 km) and k nearest searches
+(1, 10 and 100) about <queries> points (default 20), half of them city
+centres. Each search is also answered by working out the distance to
+every place; the results must match. The storage is whatever the
+HBNB_* variables select; nothing is written to a FileStorage file.
+"""
+import heapq
+import random
+import sys
+import time
+from models import storage
+from models.engine.geo import distance
+from models.place import Place
+
+
+def seed(places):
+    """Stores the places; returns them and the city centres"""
+    rand = random.Random(0)
+    centres = [(rand.uniform(-60, 70), rand.uniform(-180, 180))
+               for i in range(100)]
+    batch = []
+    stored = []
+    for i in range(places):
+        if i % 2:
+            lat, lon = rand.uniform(-60, 70), rand.uniform(-180, 180)
+        else:
+            lat, lon = rand.choice(centres)
+            lat += rand.gauss(0, 0.2)
+            lon += rand.gauss(0, 0.2)
+        place = Place(name='Place {}'.format(i), city_id='bench',
+                      user_id='bench', latitude=lat,
+                      longitude=(lon + 180) % 360 - 180)
+        batch.append(place)
+        stored.append(place)
+        if len(batch) == 10000:
+            storage.bulk_new(batch)
+            storage.save()
+            batch = []
+    storage.bulk_new(batch)
+    storage.save()
+    return stored, centres
+
+
+def brute_force(places, lat, lon, radius, limit):
+    """Returns the ids nearby_places() should, by scanning places"""
+    rows = [(distance(lat, lon, place.latitude, place.longitude), place.id)
+            for place in places]
+    if radius is not None:
+        rows = [row for row in rows if row[0] <= radius]
+    rows = sorted(rows) if limit is None else heapq.nsmallest(limit, rows)
+    return [row[1] for row in rows]
+
+
+def main(size, queries):
+    """Prints the mean time of each kind of search, both ways"""
+    if hasattr(storage, '_FileStorage__file_path'):
+        # keep the places in memory only
+        storage.save = lambda: None
+    start = time.perf_counter()
+    places, centres = seed(size)
+    print('seeded {} places in {:.1f} s'.format(
+        size, time.perf_counter() - start))
+    rand = random.Random(1)
+    points = [rand.choice(centres) if i % 2 else
+              (rand.uniform(-60, 70), rand.uniform(-180, 180))
+              for i in range(queries)]
+    searches = [('radius 5 km', 5, None), ('radius 50 km', 50, None),
+                ('radius 500 km', 500, None), ('nearest 1', None, 1),
+                ('nearest 10', None, 10), ('nearest 100', None, 100)]
+    print('{:14} {:>10} {:>10} {:>8} {:>8}'.format(
+        'search', 'index ms', 'scan ms', 'speedup', 'found'))
+    for label, radius, limit in searches:
+        indexed = scanned = 0.0
+        found = 0
+        for lat, lon in points:
+            start = time.perf_counter()
+            rows = storage.nearby_places(lat, lon, radius, limit)
+            indexed += time.perf_counter() - start
+            start = time.perf_counter()
+            expected = brute_force(places, lat, lon, radius, limit)
+            scanned += time.perf_counter() - start
+            assert [place.id for gap, place in rows] == expected, label
+            found += len(rows)
+        print('{:14} {:>10.2f} {:>10.1f} {:>7.0f}x {:>8.0f}'.format(
+            label, indexed / queries * 1000, scanned / queries * 1000,
+            scanned / indexed, found / queries))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 20)
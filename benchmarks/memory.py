@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+"""
+Measures the memory FileStorage holds after a reload in each mode.
+
+Usage: python3 -m benchmarks.memory [<size> ...]
+
+Sizes default to 10000 and 100000 objects. For every size the same file
+is reloaded eagerly (instances), lazily (dicts) and compactly (Records),
+and the memory still allocated once reload() returns is reported.
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.engine.records import Record
+from models.place import Place
+
+modes = ('eager', 'lazy', 'compact')
+
+
+def fill(size):
+    """Replaces the objects in storage with size places"""
+    storage.all().clear()
+    for i in range(size):
+        storage.new(Place(name='Place {}'.format(i), city_id='c{}'.format(
+            i % 100), user_id='u{}'.format(i % 1000), number_rooms=i % 5,
+            price_by_night=100 + i % 50, latitude=37.7, longitude=-122.4))
+
+
+def clear():
+    """Drops every object, built or pending, from storage"""
+    storage.all().clear()
+    FileStorage._FileStorage__pending.clear()
+    Record.shapes.clear()
+    storage._reindex()
+    gc.collect()
+
+
+def run(mode, size):
+    """Reloads in mode, returns (seconds, bytes held, peak bytes)"""
+    storage._FileStorage__lazy = mode == 'lazy'
+    storage._FileStorage__compact = mode == 'compact'
+    clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+    storage.reload()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(storage.all(Place)) == size
+    return seconds, held, peak
+
+
+def main(sizes):
+    """Prints one row per mode and size"""
+    old_path = FileStorage._FileStorage__file_path
+    print('{:8} {:>8} {:>9} {:>10} {:>10} {:>10}'.format(
+        'mode', 'objects', 'reload s', 'held MiB', 'peak MiB', 'B/object'))
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.json')
+            FileStorage._FileStorage__file_path = path
+            for size in sizes:
+                fill(size)
+                storage.save()
+                for mode in modes:
+                    seconds, held, peak = run(mode, size)
+                    print('{:8} {:>8} {:>9.3f} {:>10.1f} {:>10.1f} {:>10.0f}'
+                          .format(mode, size, seconds, held / 2 ** 20,
+                                  peak / 2 ** 20, held / size))
+    finally:
+        FileStorage._FileStorage__file_path = old_path
+        del storage._FileStorage__lazy
+        del storage._FileStorage__compact
+        clear()
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+"""
+Times storage.search_places() on a large set of places.
+
+Usage: python3 -m benchmarks.search [<places> [<runs>]]
+
+Stores <places> places (default 1000000) spread over 50 states of 20
+cities each, with up to 5 of 30 amenities, a price from 10 to 500 and
+room for 1 to 10 guests, then runs each search <runs> times (default
+5) and prints its best time and the number of places it matched, after
+timing a first search, which builds any index made on first use. The
+storage is whatever the HBNB_* variables select; nothing is written to
+a FileStorage file.
+"""
+import random
+import sys
+import time
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+
+
+def seed(places):
+    """Stores the places with their states, cities and amenities"""
+    rand = random.Random(0)
+    user = User(email='bench@hbnb', password='bench')
+    states = [State(name='State {}'.format(i)) for i in range(50)]
+    cities = [City(name='City {}'.format(i), state_id=state.id)
+              for state in states for i in range(20)]
+    amenities = [Amenity(name='Amenity {}'.format(i)) for i in range(30)]
+    storage.bulk_new([user] + states + cities + amenities)
+    storage.save()
+    batch = []
+    for i in range(places):
+        place = Place(name='Place {}'.format(i), user_id=user.id,
+                      city_id=rand.choice(cities).id,
+                      price_by_night=rand.randint(10, 500),
+                      max_guest=rand.randint(1, 10))
+        linked = rand.sample(amenities, rand.randint(0, 5))
+        if hasattr(Place, 'amenity_ids'):
+            place.amenity_ids = [amenity.id for amenity in linked]
+        else:
+            place.amenities = linked
+        batch.append(place)
+        if len(batch) == 10000:
+            storage.bulk_new(batch)
+            storage.save()
+            batch = []
+    storage.bulk_new(batch)
+    storage.save()
+    return states, cities, amenities
+
+
+def main(places, runs):
+    """Prints the best time of each search"""
+    if hasattr(storage, '_FileStorage__file_path'):
+        # keep the places in memory only
+        storage.save = lambda: None
+    start = time.perf_counter()
+    states, cities, amenities = seed(places)
+    print('seeded {} places in {:.1f} s'.format(
+        places, time.perf_counter() - start))
+    searches = {
+        'one state': {'states': [states[0].id]},
+        'two cities': {'cities': [cities[0].id, cities[1].id]},
+        'one amenity': {'amenities': [amenities[0].id]},
+        'two amenities': {'amenities': [amenities[0].id,
+                                        amenities[1].id]},
+        'state + amenity + price': {'states': [states[0].id],
+                                    'amenities': [amenities[0].id],
+                                    'min_price': 100, 'max_price': 200},
+        'city + guests': {'cities': [cities[0].id], 'guests': 8},
+        'price only': {'min_price': 100, 'max_price': 110},
+    }
+    start = time.perf_counter()
+    storage.search_places(order_by='price_by_night', limit=1)
+    print('first search, building any index: {:.1f} ms'.format(
+        (time.perf_counter() - start) * 1000))
+    print('{:26} {:>10} {:>8}'.format('search (limit 20)', 'best ms',
+                                      'matched'))
+    for label, filters in searches.items():
+        best = None
+        for i in range(runs):
+            start = time.perf_counter()
+            page = storage.search_places(order_by='price_by_night',
+                                         limit=20, **filters)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        matched = len(storage.search_places(**filters))
+        print('{:26} {:>10.1f} {:>8}'.format(label, best * 1000, matched))
+        assert len(page) == min(20, matched)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""
+Measures FileStorage save and reload throughput for each serializer.
+
+Usage: python3 -m benchmarks.serializers [<size> ...]
+
+Sizes default to 10000 and 100000 objects; add 1000000 for the large
+run. Formats whose library is not installed are skipped.
+"""
+import os
+import sys
+import tempfile
+import time
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.engine.serializers import get_serializer, serializers
+from models.place import Place
+
+
+def fill(size):
+    """Replaces the objects in storage with size places"""
+    storage.all().clear()
+    storage._reindex()
+    for i in range(size):
+        storage.new(Place(name='Place {}'.format(i), city_id='c{}'.format(
+            i % 100), user_id='u{}'.format(i % 1000), number_rooms=i % 5,
+            price_by_night=100 + i % 50, latitude=37.7, longitude=-122.4))
+
+
+def run(name, size, directory):
+    """Times one save and one reload of size objects in format name"""
+    serializer = get_serializer(name)
+    path = os.path.join(directory, 'bench.' + serializer.extension)
+    FileStorage._FileStorage__file_path = path
+    storage._FileStorage__serializer = serializer
+    fill(size)
+
+    start = time.perf_counter()
+    storage.save()
+    save_time = time.perf_counter() - start
+
+    storage.all().clear()
+    storage._reindex()
+    start = time.perf_counter()
+    storage.reload()
+    reload_time = time.perf_counter() - start
+
+    assert len(storage.all()) == size
+    return save_time, reload_time, os.path.getsize(path)
+
+
+def main(sizes):
+    """Prints one row per format and size"""
+    old_path = FileStorage._FileStorage__file_path
+    print('{:8} {:>8} {:>9} {:>11} {:>9} {:>12} {:>10}'.format(
+        'format', 'objects', 'save s', 'save obj/s', 'reload s',
+        'reload obj/s', 'bytes'))
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for name in serializers:
+                try:
+                    get_serializer(name)
+                except ValueError:
+                    print('{:8} not installed'.format(name))
+                    continue
+                for size in sizes:
+                    save_time, reload_time, size_bytes = run(
+                        name, size, directory)
+                    print('{:8} {:>8} {:>9.3f} {:>11.0f} {:>9.3f} {:>12.0f}'
+                          ' {:>10}'.format(name, size, save_time,
+                                           size / save_time, reload_time,
+                                           size / reload_time, size_bytes))
+    finally:
+        FileStorage._FileStorage__file_path = old_path
+        del storage._FileStorage__serializer
+        storage.all().clear()
+        storage._reindex()
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
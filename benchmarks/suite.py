@@ -0,0 +1,451 @@
+#!/usr/bin/python3
+"""
+Runs every storage, model, console and page benchmark and compares the
+results with a stored baseline.
+
+Usage: python3 -m benchmarks.suite [--sizes N ...] [--repeat R]
+           [--only PREFIX ...] [--output FILE] [--baseline FILE]
+           [--save-baseline] [--threshold T] [--no-db]
+
+Each case is run once to warm up, then R times (default 3) at each
+dataset size (default 1000 and 10000 objects) with the garbage
+collector off, and its best time is kept. Quick cases get more runs,
+up to 0.2 s of timing. The data is seeded from fixed random seeds. Cases:
+
+    file.save, file.reload    FileStorage save() and reload()
+    model.to_dict, model.from_dict, model.init
+                              BaseModel serialization and construction
+    rel.state_cities, rel.place_reviews
+                              State.cities and Place.reviews
+    console.create, console.update
+                              console lines, run as one transaction
+    web.<app><path>           each web_flask page, by the test client
+    db.all, db.query, db.rel.state_cities, db.rel.place_reviews
+                              the same reads on DBStorage over SQLite,
+                              run in a child process
+
+The results are written as JSON to FILE (default benchmark.json). When
+the baseline (default benchmarks/baseline.json) exists, each case is
+compared with it and one more than T (default 0.25, i.e. 25%) slower
+is flagged; the exit status is then 1. --save-baseline writes the
+results to the baseline instead. Timings only compare on one machine:
+save a baseline before the change under test.
+"""
+import argparse
+import contextlib
+import gc
+import importlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# (module in web_flask, path) of each page timed
+PAGES = [
+    ('6-number_odd_or_even', '/'),
+    ('6-number_odd_or_even', '/hbnb'),
+    ('6-number_odd_or_even', '/c/is_fun'),
+    ('6-number_odd_or_even', '/python/is_cool'),
+    ('6-number_odd_or_even', '/number/89'),
+    ('6-number_odd_or_even', '/number_template/89'),
+    ('6-number_odd_or_even', '/number_odd_or_even/89'),
+    ('7-states_list', '/states_list'),
+    ('8-cities_by_states', '/cities_by_states'),
+    ('9-states', '/states'),
+    ('9-states', '/states/{state}'),
+    ('10-hbnb_filters', '/hbnb_filters'),
+    ('100-hbnb', '/hbnb'),
+]
+# requests made to each page per run
+REQUESTS = 20
+# console lines run per run, at most
+LINES = 2000
+# quick cases run past --repeat until they were timed this many seconds,
+# in at most MAX_RUNS runs, so their best time is steadier
+MIN_TIME = 0.2
+MAX_RUNS = 25
+
+cases = {}
+
+
+def case(name):
+    """Registers a case: a function of (size) returning (ops, seconds)"""
+    def register(run):
+        cases[name] = run
+        return run
+    return register
+
+
+def timed(run, *args):
+    """Returns how long run(*args) takes with the collector off"""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        run(*args)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def clear():
+    """Drops every object from storage"""
+    from models import storage
+    if hasattr(storage, '_FileStorage__file_path'):
+        from benchmarks.memory import clear
+        clear()
+        return
+    from models.base_model import Base
+    engine = storage._DBStorage__engine
+    storage.close()
+    Base.metadata.drop_all(engine)
+    storage.reload()
+
+
+def places(size):
+    """Returns size places with fixed attributes, not stored"""
+    from models.place import Place
+    rand = random.Random(0)
+    return [Place(name='Place {}'.format(i), city_id='c{}'.format(i % 100),
+                  user_id='u{}'.format(i % 1000),
+                  number_rooms=rand.randint(1, 5),
+                  price_by_night=rand.randint(10, 500),
+                  latitude=rand.uniform(-60, 70),
+                  longitude=rand.uniform(-180, 180)) for i in range(size)]
+
+
+def seed_tree(size):
+    """Stores size cities and size reviews under size / 10 states and
+    places, with their user; returns (states, places)"""
+    from models import storage
+    from models.city import City
+    from models.place import Place
+    from models.review import Review
+    from models.state import State
+    from models.user import User
+    clear()
+    user = User(email='bench@hbnb', password='bench')
+    states = [State(name='State {:05}'.format(i))
+              for i in range(max(1, size // 10))]
+    cities = [City(name='City {}'.format(i), state_id=states[i % len(
+        states)].id) for i in range(size)]
+    homes = [Place(name='Place {}'.format(i), city_id=cities[i].id,
+                   user_id=user.id) for i in range(len(states))]
+    reviews = [Review(text='Review {}'.format(i), user_id=user.id,
+                      place_id=homes[i % len(homes)].id)
+               for i in range(size)]
+    storage.bulk_new([user] + states + cities + homes + reviews)
+    storage.save()
+    return states, homes
+
+
+@case('file.save')
+def file_save(size):
+    """Writes size places to a new file"""
+    from models import storage
+    clear()
+    storage.bulk_new(places(size))
+    return size, timed(storage.save)
+
+
+@case('file.reload')
+def file_reload(size):
+    """Reads back a file of size places"""
+    from models import storage
+    clear()
+    storage.bulk_new(places(size))
+    storage.save()
+    clear()
+    return size, timed(storage.reload)
+
+
+@case('model.to_dict')
+def model_to_dict(size):
+    """Serializes size places"""
+    objs = places(size)
+    return size, timed(lambda: [obj.to_dict() for obj in objs])
+
+
+@case('model.from_dict')
+def model_from_dict(size):
+    """Builds size places from their dictionaries"""
+    from models.place import Place
+    rows = [obj.to_dict() for obj in places(size)]
+    return size, timed(lambda: [Place.from_dict(row) for row in rows])
+
+
+@case('model.init')
+def model_init(size):
+    """Builds size places through __init__(**kwargs)"""
+    from models.place import Place
+    rows = [obj.to_dict() for obj in places(size)]
+    return size, timed(lambda: [Place(**row) for row in rows])
+
+
+@case('rel.state_cities')
+def state_cities(size):
+    """Reads the cities of every state"""
+    states, homes = seed_tree(size)
+    return len(states), timed(lambda: [state.cities for state in states])
+
+
+@case('rel.place_reviews')
+def place_reviews(size):
+    """Reads the reviews of every place"""
+    states, homes = seed_tree(size)
+    return len(homes), timed(lambda: [home.reviews for home in homes])
+
+
+def console_lines(lines):
+    """Runs lines through the console as cmdloop() would, in batch mode"""
+    from console import HBNBCommand
+    console = HBNBCommand()
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull), \
+            contextlib.redirect_stderr(devnull):
+        console.onecmd('begin')
+        for line in lines:
+            console.onecmd(console.precmd(line))
+        console.onecmd('commit')
+
+
+@case('console.create')
+def console_create(size):
+    """Runs create lines with parameters"""
+    clear()
+    count = min(size, LINES)
+    lines = ['create Place city_id="c{}" user_id="u{}" name="Place_{}" '
+             'number_rooms=4 price_by_night=300 latitude=37.77'.format(
+                 i % 100, i % 1000, i) for i in range(count)]
+    return count, timed(console_lines, lines)
+
+
+@case('console.update')
+def console_update(size):
+    """Runs dot syntax updates with a dictionary"""
+    from models import storage
+    clear()
+    homes = places(min(size, LINES))
+    storage.bulk_new(homes)
+    storage.save()
+    lines = ['Place.update("{}", {{"name": "Loft", "max_guest": {}}})'
+             .format(home.id, i % 10) for i, home in enumerate(homes)]
+    return len(lines), timed(console_lines, lines)
+
+
+def page_case(module, path):
+    """Returns the case timing REQUESTS requests to a web_flask page"""
+    def run(size):
+        from web_flask.cache import cache
+        states, homes = seed_tree(size)
+        app = importlib.import_module('web_flask.' + module).app
+        client = app.test_client()
+        url = path.format(state=states[0].id)
+        ttl, cache.ttl = cache.ttl, 0
+        try:
+            assert client.get(url).status_code == 200, url
+            return REQUESTS, timed(
+                lambda: [client.get(url) for i in range(REQUESTS)])
+        finally:
+            cache.ttl = ttl
+    return run
+
+
+for module, path in PAGES:
+    cases['web.{}{}'.format(module, path)] = page_case(module, path)
+
+
+@case('db.all')
+def db_all(size):
+    """Loads size places with DBStorage.all() in a new session"""
+    from models import storage
+    from models.place import Place
+    clear()
+    storage.bulk_new(places(size))
+    storage.save()
+    storage.close()
+    return size, timed(storage.all, Place)
+
+
+@case('db.query')
+def db_query(size):
+    """Pages through size places 100 at a time with query()"""
+    from models import storage
+    from models.place import Place
+    clear()
+    storage.bulk_new(places(size))
+    storage.save()
+    storage.close()
+
+    def pages():
+        after = None
+        while True:
+            page = storage.query(Place, limit=100, after=after)
+            if not page:
+                return
+            after = (page[-1].id, page[-1].id)
+    return size, timed(pages)
+
+
+@case('db.rel.state_cities')
+def db_state_cities(size):
+    """Reads the cities of every state in a new session"""
+    from models import storage
+    from models.state import State
+    seed_tree(size)
+    storage.close()
+    states = list(storage.all(State).values())
+    return len(states), timed(lambda: [state.cities for state in states])
+
+
+@case('db.rel.place_reviews')
+def db_place_reviews(size):
+    """Reads the reviews of every place in a new session"""
+    from models import storage
+    from models.place import Place
+    seed_tree(size)
+    storage.close()
+    homes = list(storage.all(Place).values())
+    return len(homes), timed(lambda: [home.reviews for home in homes])
+
+
+def run_cases(names, sizes, repeat):
+    """Returns the result of each case at each size"""
+    results = {}
+    for size in sizes:
+        for name in names:
+            # a first run, not kept, warms imports and caches up
+            cases[name](size)
+            best = None
+            runs = spent = 0
+            while runs < repeat or (spent < MIN_TIME and runs < MAX_RUNS):
+                ops, seconds = cases[name](size)
+                best = seconds if best is None else min(best, seconds)
+                runs += 1
+                spent += seconds
+            results['{}@{}'.format(name, size)] = {
+                'case': name, 'size': size, 'ops': ops,
+                'seconds': best, 'ops_per_sec': ops / best if best else None}
+            print('{:48} {:>8} {:>10.2f} {:>12.0f}'.format(
+                name, size, best * 1000, ops / best if best else 0),
+                file=sys.stderr)
+    clear()
+    return results
+
+
+def run_db(names, sizes, repeat):
+    """Runs the db cases in a child process using SQLite; returns them"""
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, 'db.json')
+        env = dict(os.environ, HBNB_TYPE_STORAGE='db', HBNB_storage_type='db',
+                   HBNB_MYSQL_URL='sqlite:///' + os.path.join(directory,
+                                                              'bench.db'))
+        env.pop('HBNB_METRICS', None)
+        command = [sys.executable, '-m', 'benchmarks.suite', '--child',
+                   '--repeat', str(repeat), '--output', output, '--sizes']
+        command += [str(size) for size in sizes] + ['--only'] + names
+        subprocess.run(command, env=env, check=True)
+        with open(output) as f:
+            return json.load(f)['results']
+
+
+def compare(results, baseline, threshold):
+    """Prints each case against the baseline; returns the regressions"""
+    regressions = []
+    print('{:48} {:>8} {:>12} {:>12} {:>8}'.format(
+        'case', 'size', 'base us/op', 'us/op', 'change'))
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None or not base['seconds']:
+            continue
+        # per operation, so a case may change how many it runs
+        before = base['seconds'] / base['ops']
+        after = result['seconds'] / result['ops']
+        change = after / before - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        print('{:48} {:>8} {:>12.2f} {:>12.2f} {:>+7.0%}{}'.format(
+            result['case'], result['size'], before * 1e6, after * 1e6,
+            change, flag))
+    return regressions
+
+
+def main(argv):
+    """Runs the suite; returns the exit status"""
+    parser = argparse.ArgumentParser(prog='python3 -m benchmarks.suite')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', default=[],
+                        help='run the cases starting with these prefixes')
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.25)
+    parser.add_argument('--no-db', action='store_true')
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    names = [name for name in cases if not args.only or
+             any(name.startswith(prefix) for prefix in args.only)]
+    db_names = [name for name in names if name.startswith('db.')]
+    from models import storage
+    if args.child or not hasattr(storage, '_FileStorage__file_path'):
+        # under DBStorage only the db cases apply
+        names, db_names = db_names, []
+    else:
+        names = [name for name in names if not name.startswith('db.')]
+
+    from models.engine.file_storage import FileStorage
+    old_path = FileStorage._FileStorage__file_path
+    print('{:48} {:>8} {:>10} {:>12}'.format('case', 'size', 'best ms',
+                                             'ops/s'), file=sys.stderr)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            FileStorage._FileStorage__file_path = os.path.join(
+                directory, 'bench.json')
+            results = run_cases(names, args.sizes, args.repeat)
+    finally:
+        FileStorage._FileStorage__file_path = old_path
+    if db_names and not args.no_db:
+        results.update(run_db(db_names, args.sizes, args.repeat))
+
+    report = {
+        'meta': {
+            'time': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': args.sizes,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    path = args.baseline if args.save_baseline else args.output
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    if args.child or args.save_baseline:
+        return 0
+    if not os.path.exists(args.baseline):
+        print('no baseline at {}; --save-baseline writes one'.format(
+            args.baseline))
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print('{} of {} cases are over {:.0%} slower than the baseline'
+              .format(len(regressions), len(results), args.threshold))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+"""
+Load-tests the Flask pages against their ASGI variant.
+
+Usage: python3 -m benchmarks.web [<delay ms> [<concurrency> ...]]
+
+Each server runs in its own process: web_flask/7-states_list.py
+under Werkzeug's threaded server, as app.run() starts it, and
+web_flask/asgi.py under Hypercorn. The reads the views make are
+slowed by <delay ms> (default 20) to stand in for a slow disk or
+database, and the page cache is off. For each concurrency (default
+1 10 50 200) that many clients request /states_list back to back for
+a few seconds. The storage is whatever the HBNB_* variables select.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from models import storage
+from models.city import City
+from models.engine.file_storage import FileStorage
+from models.state import State
+
+PATH = '/states_list'
+DURATION = 5
+PORTS = {'sync': 5101, 'asgi': 5102}
+
+
+def seed(states=20, cities=10):
+    """Stores states with cities for the pages to list"""
+    for i in range(states):
+        state = State(name='State {}'.format(i))
+        storage.new(state)
+        for j in range(cities):
+            storage.new(City(name='City {}'.format(j), state_id=state.id))
+    storage.save()
+
+
+def slow_down(delay):
+    """Makes the reads the views make sleep delay seconds first"""
+    def slowed(read):
+        def wrapper(*args, **kwargs):
+            time.sleep(delay)
+            return read(*args, **kwargs)
+        return wrapper
+
+    for name in ('get', 'query'):
+        setattr(storage, name, slowed(getattr(storage, name)))
+
+
+def serve(kind, port, delay):
+    """Runs the kind server on port; this is the server process"""
+    import logging
+    import importlib
+    slow_down(delay)
+    if kind == 'sync':
+        from werkzeug.serving import run_simple
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        app = importlib.import_module('web_flask.7-states_list').app
+        run_simple('127.0.0.1', port, app, threaded=True)
+        return
+    from hypercorn.asyncio import serve as hypercorn_serve
+    from hypercorn.config import Config
+    from models.engine.async_storage import AsyncDBStorage
+    from web_flask.asgi import aio, app
+    if isinstance(aio, AsyncDBStorage):
+        # the async engine does not go through storage: slow it here
+        query = aio.query
+
+        async def slowed(*args, **kwargs):
+            await asyncio.sleep(delay)
+            return await query(*args, **kwargs)
+        aio.query = slowed
+    config = Config()
+    config.bind = ['127.0.0.1:{}'.format(port)]
+    config.loglevel = 'ERROR'
+    asyncio.run(hypercorn_serve(app, config))
+
+
+async def fetch(port):
+    """Requests PATH once; returns the status code"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write('GET {} HTTP/1.1\r\nHost: localhost\r\n'
+                 'Connection: close\r\n\r\n'.format(PATH).encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def load(port, concurrency):
+    """Returns (requests/s, latencies, errors) of concurrency clients"""
+    latencies = []
+    errors = [0]
+    deadline = time.perf_counter() + DURATION
+
+    async def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await fetch(port)
+            except OSError:
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors[0] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for i in range(concurrency)))
+    return len(latencies) / (time.perf_counter() - start), \
+        sorted(latencies), errors[0]
+
+
+def wait_for(port, process):
+    """Blocks until the server on port accepts connections"""
+    for i in range(100):
+        if process.poll() is not None:
+            raise RuntimeError('server on port {} exited'.format(port))
+        try:
+            return asyncio.run(fetch(port))
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server on port {} did not start'.format(port))
+
+
+def main(delay, levels):
+    """Prints one row per server and concurrency"""
+    old_path = FileStorage._FileStorage__file_path
+    print('{:5} {:>6} {:>9} {:>8} {:>8} {:>7}'.format(
+        'app', 'conc', 'req/s', 'p50 ms', 'p99 ms', 'errors'))
+    with tempfile.TemporaryDirectory() as directory:
+        FileStorage._FileStorage__file_path = os.path.join(
+            directory, 'file.json')
+        try:
+            seed()
+        finally:
+            FileStorage._FileStorage__file_path = old_path
+        env = dict(os.environ, HBNB_CACHE_TTL='0', PYTHONPATH=os.getcwd())
+        for kind, port in PORTS.items():
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'benchmarks.web', 'serve', kind,
+                 str(port), str(delay)], cwd=directory, env=env)
+            try:
+                wait_for(port, process)
+                for concurrency in levels:
+                    rate, latencies, errors = asyncio.run(
+                        load(port, concurrency))
+                    p50 = latencies[len(latencies) // 2] if latencies else 0
+                    p99 = latencies[int(len(latencies) * 0.99)] \
+                        if latencies else 0
+                    print('{:5} {:>6} {:>9.1f} {:>8.1f} {:>8.1f} {:>7}'
+                          .format(kind, concurrency, rate, p50 * 1000,
+                                  p99 * 1000, errors))
+            finally:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['serve']:
+        serve(sys.argv[2], int(sys.argv[3]), float(sys.argv[4]))
+    else:
+        main(float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.02,
+             [int(arg) for arg in sys.argv[2:]] or [1, 10, 50, 200])
@@ -1,13 +1,18 @@
 #!/usr/bin/python3
 """Console Module"""
+import ast
+import csv
+import json
 import re
 import uuid
 import os
 from datetime import datetime
 import cmd
 import sys
+import time
 from models.base_model import BaseModel
 from models import storage
+from models.engine.metrics import metrics
 from models.user import User
 from models.place import Place
 from models.state import State
@@ -33,6 +38,34 @@ class HBNBCommand(cmd.Cmd):
         'max_guest': int, 'price_by_night': int,
         'latitude': float, 'longitude': float
     }
+    # grammar of the lines parsed, compiled once
+    # <class name>.<command>([<id>[, <*args> or <**kwargs>]])
+    dot_syntax = re.compile(
+        r'(?P<cls>[^.]*)\.(?P<cmd>[^(]*)\((?P<id>"[^"]*"|[^,)]*)'
+        r'(?:,(?P<args>.*))?\)')
+    # create: <class name> [<key>=<value> ...]
+    name_syntax = r'(?:[a-zA-Z]|_)(?:[a-zA-Z]|\d|_)*'
+    create_class = re.compile(name_syntax)
+    create_param = re.compile(
+        r'(?P<key>{})=(?:(?P<str_val>".*")|(?P<float_val>[-+]?\d+\.\d+)'
+        r'|(?P<int_val>[-+]?\d+))'.format(name_syntax), re.S)
+    # update: <class name> <id> [<name> <value> or <**kwargs>], with
+    # the name and value optionally quoted
+    update_syntax = re.compile(r'(?P<cls>\S*) ?(?P<id>\S*) ?(?P<rest>.*)',
+                               re.S)
+    update_pair = re.compile(
+        r'(?:"(?P<qname>[^"]*)"|(?P<name>\S*)) ?'
+        r'(?:"(?P<qval>[^"]*)"|(?P<val>\S*))')
+    # objects handed to storage.bulk_new() at a time by import
+    import_chunk = 1000
+    # commands opening or closing a transaction, not counted in it
+    transaction_cmds = ('begin', 'commit', 'rollback')
+    # batch mode (--batch): the whole session is one transaction,
+    # committed on exit and started again after each commit or rollback
+    batch = False
+    # when the open transaction began, and the commands run since
+    started = None
+    commands = 0
 
     def preloop(self):
         """Prints if isatty is false"""
@@ -45,50 +78,25 @@ class HBNBCommand(cmd.Cmd):
         Usage: <class name>.<command>([<id> [<*args> or <**kwargs>]])
         (Brackets denote optional fields in usage example.)
         """
-        _cmd = _cls = _id = _args = ''  # initialize line elements
-
-        # scan for general formating - i.e '.', '(', ')'
-        if not ('.' in line and '(' in line and ')' in line):
+        match = HBNBCommand.dot_syntax.match(line)
+        if match is None or match.group('cmd') not in HBNBCommand.dot_cmds:
             return line
 
-        try:  # parse line left to right
-            pline = line[:]  # parsed line
-
-            # isolate <class name>
-            _cls = pline[:pline.find('.')]
-
-            # isolate and validate <command>
-            _cmd = pline[pline.find('.') + 1:pline.find('(')]
-            if _cmd not in HBNBCommand.dot_cmds:
-                raise Exception
-
-            # if parantheses contain arguments, parse them
-            pline = pline[pline.find('(') + 1:pline.find(')')]
-            if pline:
-                # partition args: (<id>, [<delim>], [<*args>])
-                pline = pline.partition(', ')  # pline convert to tuple
-
-                # isolate _id, stripping quotes
-                _id = pline[0].replace('\"', '')
-                # possible bug here:
-                # empty quotes register as empty _id when replaced
-
-                # if arguments exist beyond _id
-                pline = pline[2].strip()  # pline is now str
-                if pline:
-                    # check for *args or **kwargs
-                    if pline[0] == '{' and pline[-1] == '}'\
-                            and type(eval(pline)) is dict:
-                        _args = pline
-                    else:
-                        _args = pline.replace(',', '')
-                        # _args = _args.replace('\"', '')
-            line = ' '.join([_cmd, _cls, _id, _args])
-
-        except Exception as mess:
-            pass
-        finally:
-            return line
+        # strip the quotes around <id>
+        _id = match.group('id').strip().replace('\"', '')
+        # **kwargs are left for do_update to read, *args lose their commas
+        _args = (match.group('args') or '').strip()
+        if not (_args.startswith('{') and _args.endswith('}')):
+            _args = _args.replace(',', '')
+        return ' '.join([match.group('cmd'), match.group('cls'), _id, _args])
+
+    def onecmd(self, line):
+        """Runs one command, counting it in the open transaction"""
+        stop = super().onecmd(line)
+        if self.started is not None and line.strip() and \
+                line.split()[0] not in HBNBCommand.transaction_cmds:
+            self.commands += 1
+        return stop
 
     def postcmd(self, stop, line):
         """Prints if isatty is false"""
@@ -98,6 +106,7 @@ class HBNBCommand(cmd.Cmd):
 
     def do_quit(self, command):
         """Method to exit the HBNB console"""
+        self.finish()
         exit()
 
     def help_quit(self):
@@ -107,12 +116,80 @@ class HBNBCommand(cmd.Cmd):
     def do_EOF(self, arg):
         """Handles EOF to exit program """
         print()
+        self.finish()
         exit()
 
     def help_EOF(self):
         """Prints the help documentation for EOF"""
         print("Exits the program without formatting\n")
 
+    def do_begin(self, args):
+        """Starts a transaction: changes are saved at commit"""
+        if self.started is not None:
+            print("** transaction already open **")
+            return
+        storage.begin()
+        self.started = time.perf_counter()
+        self.commands = 0
+
+    def help_begin(self):
+        """Help information for the begin command"""
+        print("Starts a transaction: changes stay in memory until commit")
+        print("[Usage]: begin\n")
+
+    def do_commit(self, args):
+        """Saves the changes of the transaction at once"""
+        if self.started is None:
+            print("** no transaction open **")
+            return
+        storage.commit()
+        self.report('committed')
+        if self.batch:
+            self.do_begin('')
+
+    def help_commit(self):
+        """Help information for the commit command"""
+        print("Saves every change made since begin, at once")
+        print("[Usage]: commit\n")
+
+    def do_rollback(self, args):
+        """Drops the changes of the transaction"""
+        if self.started is None:
+            print("** no transaction open **")
+            return
+        storage.rollback()
+        self.report('rolled back')
+        if self.batch:
+            self.do_begin('')
+
+    def help_rollback(self):
+        """Help information for the rollback command"""
+        print("Drops every change made since begin")
+        print("[Usage]: rollback\n")
+
+    def report(self, outcome):
+        """Closes the transaction, printing its throughput to stderr"""
+        elapsed = time.perf_counter() - self.started
+        self.started = None
+        rate = self.commands / elapsed if elapsed else 0
+        print("** {} {} command{} in {:.3f}s ({:.0f} commands/s) **".format(
+            outcome, self.commands, '' if self.commands == 1 else 's',
+            elapsed, rate), file=sys.stderr)
+
+    def finish(self):
+        """Ends the open transaction before exiting
+
+        A batch mode session is committed; a transaction opened with
+        begin and never committed is rolled back.
+        """
+        if self.started is None:
+            return
+        if self.batch:
+            self.batch = False
+            self.do_commit('')
+        else:
+            self.do_rollback('')
+
     def emptyline(self):
         """Overrides the emptyline method of CMD"""
         pass
@@ -124,43 +201,7 @@ class HBNBCommand(cmd.Cmd):
         Usage: create <className> [attribute_name=attribute_value ...]
         """
         skipped_attrs = ('id', 'created_at', 'updated_at', '__class__')
-        class_name = ''
-        pattern = r'(?P<class_name>(?:[a-zA-Z]|_)(?:[a-zA-Z]|\d|_)*)'
-
-        # Match the class name from the args
-        class_match = re.match(pattern, args)
-        data = {}
-
-        if class_match is not None:
-            class_name = class_match.group('class_name')
-            param_str = args[len(class_name):].strip()
-            params = param_str.split(' ')
-            param_pattern = (
-                r'{}=({}|{}|{})'.format(
-                    pattern,
-                    r'(?P<str_val>"([^"]|\")*")',
-                    r'(?P<float_val>[-+]?\d+\.\d+)',
-                    r'(?P<int_val>[-+]?\d+)'
-                )
-            )
-
-            for param in params:
-                param_match = re.fullmatch(param_pattern, param)
-                if param_match is not None:
-                    key_name = param_match.group('class_name')
-                    str_val = param_match.group('str_val')
-                    float_val = param_match.group('float_val')
-                    int_val = param_match.group('int_val')
-
-                    if float_val is not None:
-                        data[key_name] = float(float_val)
-                    if int_val is not None:
-                        data[key_name] = int(int_val)
-                    if str_val is not None:
-                        data[key_name] = str_val[1:-1].replace('_', ' ')
-
-        else:
-            class_name = args
+        class_name, data = HBNBCommand.parse_create(args)
 
         # Check for missing class name or non-existent class
         if not class_name:
@@ -178,18 +219,41 @@ class HBNBCommand(cmd.Cmd):
             data.setdefault('updated_at', str(datetime.now()))
 
             # Create and save the instance
-            new_instance = HBNBCommand.classes[class_name](**data)
+            new_instance = HBNBCommand.classes[class_name].from_dict(data)
             new_instance.save()
             print(new_instance.id)
         else:
             # Create and save the instance with attributes
-            new_instance = HBNBCommand.classes[class_name]()
-            for key, value in data.items():
-                if key not in skipped_attrs:
-                    setattr(new_instance, key, value)
+            new_instance = HBNBCommand.classes[class_name].from_dict(
+                {key: value for key, value in data.items()
+                 if key not in skipped_attrs})
             new_instance.save()
             print(new_instance.id)
 
+    @staticmethod
+    def parse_create(args):
+        """Returns the class name and the attributes given to create
+
+        Parameters that do not match <key>=<value> are ignored.
+        """
+        class_match = HBNBCommand.create_class.match(args)
+        if class_match is None:
+            return args, {}
+        class_name = class_match.group()
+        data = {}
+        for param in args[class_match.end():].split(' '):
+            param_match = HBNBCommand.create_param.fullmatch(param)
+            if param_match is None:
+                continue
+            key_name, str_val, float_val, int_val = param_match.groups()
+            if str_val is not None:
+                data[key_name] = str_val[1:-1].replace('_', ' ')
+            elif float_val is not None:
+                data[key_name] = float(float_val)
+            else:
+                data[key_name] = int(int_val)
+        return class_name, data
+
     def help_create(self):
         """Help information for the create method"""
         print("Creates a class of any type")
@@ -221,21 +285,11 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        key = c_name + "." + c_id
-        try:
-            if os.getenv('HBNB_TYPE_STORAGE') == 'db':
-                # If using database storage,
-                # retrieve the object from the database
-                obj = storage.get(c_name, c_id)
-                if obj:
-                    print(obj)
-                else:
-                    print("** no instance found **")
-            else:
-                # If using file storage,
-                # retrieve the object from the __objects dictionary
-                print(storage._FileStorage__objects[key])
-        except KeyError:
+        # retrieve the object straight from storage by class and id
+        obj = storage.get(c_name, c_id)
+        if obj:
+            print(obj)
+        else:
             print("** no instance found **")
 
     def help_show(self):
@@ -267,13 +321,13 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        key = c_name + "." + c_id
-
-        try:
-            del(storage.all()[key])
-            storage.save()
-        except KeyError:
+        obj = storage.get(c_name, c_id)
+        if obj is None:
             print("** no instance found **")
+            return
+
+        storage.delete(obj)
+        storage.save()
 
     def help_destroy(self):
         """Help information for the destroy command"""
@@ -286,8 +340,6 @@ class HBNBCommand(cmd.Cmd):
 
         Usage: all [className]
         """
-        print_list = []
-
         if args:
             args = args.split(' ')[0]  # remove possible trailing args
             if args not in HBNBCommand.classes:
@@ -297,16 +349,204 @@ class HBNBCommand(cmd.Cmd):
         else:
             objects = storage.all()
 
+        # print the list of str(obj) one item at a time
+        separator = '['
         for obj in objects.values():
-            print_list.append(str(obj))
-
-        print(print_list)
+            sys.stdout.write(separator + repr(str(obj)))
+            separator = ', '
+        print('[]' if separator == '[' else ']')
 
     def help_all(self):
         """Help information for the all command"""
         print("Shows all objects, or all of a class")
         print("[Usage]: all <className>\n")
 
+    def do_export(self, args):
+        """
+        Writes the objects of a class as NDJSON or CSV, one at a time
+
+        Usage: export <className> [<file>] [fields=<name>,...]
+               [format=ndjson|csv]
+        """
+        args = args.split()
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in HBNBCommand.classes:
+            print("** class doesn't exist **")
+            return
+        path, options = self.file_options(args[1:])
+        fields = [field for field in options.get('fields', '').split(',')
+                  if field] or None
+        rows = (self.project(obj, fields)
+                for obj in storage.iterate(args[0]))
+        if path is None:
+            self.write_rows(rows, sys.stdout, options['format'], fields)
+            return
+        with open(path, 'w', newline='') as f:
+            count = self.write_rows(rows, f, options['format'], fields)
+        print(count)
+
+    def help_export(self):
+        """Help information for the export command"""
+        print("Writes the objects of a class as NDJSON (default) or CSV")
+        print("[Usage]: export <className> [<file>] [fields=<name>,...]"
+              " [format=ndjson|csv]\n")
+
+    def do_import(self, args):
+        """
+        Creates objects of a class from an NDJSON or CSV file, one at a
+        time, saving them once at the end
+
+        In a transaction the objects are saved at its commit; an import
+        cannot join a transaction that already holds changes, since a
+        failed import rolls the transaction back.
+
+        Usage: import <className> <file> [format=ndjson|csv]
+        """
+        args = args.split()
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in HBNBCommand.classes:
+            print("** class doesn't exist **")
+            return
+        cls = HBNBCommand.classes[args[0]]
+        path, options = self.file_options(args[1:])
+        if path is None:
+            print("** file name missing **")
+            return
+        if self.started is not None and self.commands:
+            print("** commit or rollback before import **")
+            return
+        try:
+            f = open(path, newline='')
+        except OSError:
+            print("** file not found **")
+            return
+        count = 0
+        try:
+            with f, storage.batch():
+                chunk = []
+                for data in self.read_rows(f, options['format']):
+                    data.pop('__class__', None)
+                    chunk.append(cls.from_dict(data))
+                    if len(chunk) == HBNBCommand.import_chunk:
+                        storage.bulk_new(chunk)
+                        count += len(chunk)
+                        chunk = []
+                storage.bulk_new(chunk)
+                count += len(chunk)
+                storage.save()
+        except Exception as e:
+            # e.g. an id the database already holds
+            print(str(e).splitlines()[0], file=sys.stderr)
+            if self.started is not None:
+                # the open transaction holds nothing but the rows added
+                # so far, which its commit would save: drop them
+                storage.rollback()
+                storage.begin()
+            print("** import failed, nothing saved **")
+            return
+        print(count)
+
+    def help_import(self):
+        """Help information for the import command"""
+        print("Creates objects of a class from an NDJSON or CSV file")
+        print("[Usage]: import <className> <file> [format=ndjson|csv]\n")
+
+    @staticmethod
+    def file_options(args):
+        """Splits export/import arguments into a path and name=value pairs
+
+        format defaults to csv for a .csv path and to ndjson otherwise.
+        """
+        path = None
+        options = {}
+        for arg in args:
+            name, equals, value = arg.partition('=')
+            if equals:
+                options[name] = value
+            elif path is None:
+                path = arg
+        if options.get('format') not in ('ndjson', 'csv'):
+            options['format'] = 'csv' if path and \
+                path.lower().endswith('.csv') else 'ndjson'
+        return path, options
+
+    @staticmethod
+    def project(obj, fields):
+        """Returns the dictionary exported for obj, cut down to fields"""
+        data = obj.to_dict()
+        if fields is not None:
+            data = {field: data[field] for field in fields if field in data}
+        return {key: value for key, value in data.items()
+                if not isinstance(value, BaseModel)}
+
+    @staticmethod
+    def write_rows(rows, f, fmt, fields):
+        """Writes rows to f one at a time; returns how many it wrote
+
+        A CSV file takes its columns from fields, or else from the first
+        row; lists are written as JSON.
+        """
+        count = 0
+        if fmt == 'ndjson':
+            for data in rows:
+                f.write(json.dumps(data) + '\n')
+                count += 1
+            return count
+        writer = None
+        for data in rows:
+            if writer is None:
+                writer = csv.DictWriter(f, fields or list(data),
+                                        extrasaction='ignore')
+                writer.writeheader()
+            writer.writerow({key: json.dumps(value)
+                             if isinstance(value, (list, dict)) else value
+                             for key, value in data.items()})
+            count += 1
+        return count
+
+    def read_rows(self, f, fmt):
+        """Yields the dictionaries stored in f, one per line
+
+        Lines that cannot be read are reported on stderr and skipped.
+        CSV cells are cast as update casts them, lists are read back
+        from JSON and empty cells are left out.
+        """
+        if fmt == 'ndjson':
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    data = None
+                if type(data) is not dict:
+                    print("** line {} skipped **".format(number),
+                          file=sys.stderr)
+                    continue
+                yield data
+            return
+        reader = csv.DictReader(f)
+        for data in reader:
+            try:
+                row = {}
+                for key, value in data.items():
+                    if not key or not value:
+                        continue
+                    if key in HBNBCommand.types:
+                        value = HBNBCommand.types[key](value)
+                    elif value[0] in '[{':
+                        value = json.loads(value)
+                    row[key] = value
+            except ValueError:
+                print("** line {} skipped **".format(reader.line_num),
+                      file=sys.stderr)
+                continue
+            yield row
+
     def do_count(self, args):
         """Count current number of class instances"""
         if args not in HBNBCommand.classes:
@@ -320,89 +560,105 @@ class HBNBCommand(cmd.Cmd):
         """Help information for the count command"""
         print("Usage: count <class_name>")
 
+    def do_stats(self, args):
+        """
+        Prints the storage metrics recorded so far, or forgets them
+
+        Usage: stats [reset]
+        """
+        if not metrics.enabled:
+            print("** metrics are off, set HBNB_METRICS=1 **")
+            return
+        if args.strip() == 'reset':
+            metrics.reset()
+            return
+        print('{:8} {:10} {:>8} {:>10} {:>9} {:>9}'.format(
+            'op', 'class', 'calls', 'total ms', 'mean ms', 'max ms'))
+        for operation, name, calls, seconds, longest in metrics.summary():
+            print('{:8} {:10} {:>8} {:>10.1f} {:>9.3f} {:>9.3f}'.format(
+                operation, name or '-', calls, seconds * 1000,
+                seconds * 1000 / calls, longest * 1000))
+        print('objects built: {}'.format(', '.join(
+            '{} {}'.format(name, count)
+            for name, count in sorted(metrics.materialized.items()))
+            or 0))
+        print('bytes written: {}'.format(metrics.written))
+
+    def help_stats(self):
+        """Help information for the stats command"""
+        print("Prints the calls, time spent, objects built and bytes")
+        print("written by the storage (needs HBNB_METRICS=1)")
+        print("[Usage]: stats [reset]\n")
+
     def do_update(self, args):
         """Updates a certain object with new info"""
-        c_name = c_id = att_name = att_val = kwargs = ''
-
-        # isolate cls from id/args, ex: (<cls>, delim, <id/args>)
-        args = args.partition(" ")
-        if args[0]:
-            c_name = args[0]
-        else:  # class name not present
+        c_name, c_id, pairs = HBNBCommand.parse_update(args)
+        if not c_name:  # class name not present
             print("** class name missing **")
             return
         if c_name not in HBNBCommand.classes:  # class name invalid
             print("** class doesn't exist **")
             return
-
-        # isolate id from args
-        args = args[2].partition(" ")
-        if args[0]:
-            c_id = args[0]
-        else:  # id not present
+        if not c_id:  # id not present
             print("** instance id missing **")
             return
 
-        # generate key from class and id
-        key = c_name + "." + c_id
-
-        # determine if key is present
-        if key not in storage.all():
+        # determine if the instance is present
+        new_dict = storage.get(c_name, c_id)
+        if new_dict is None:
             print("** no instance found **")
             return
 
-        # first determine if kwargs or args
-        if '{' in args[2] and '}' in args[2] and type(eval(args[2])) is dict:
-            kwargs = eval(args[2])
-            args = []  # reformat kwargs into list, ex: [<name>, <value>, ...]
-            for k, v in kwargs.items():
-                args.append(k)
-                args.append(v)
-        else:  # isolate args
-            args = args[2]
-            if args and args[0] == '\"':  # check for quoted arg
-                second_quote = args.find('\"', 1)
-                att_name = args[1:second_quote]
-                args = args[second_quote + 1:]
-
-            args = args.partition(' ')
-
-            # if att_name was not quoted arg
-            if not att_name and args[0] != ' ':
-                att_name = args[0]
-            # check for quoted val arg
-            if args[2] and args[2][0] == '\"':
-                att_val = args[2][1:args[2].find('\"', 1)]
-
-            # if att_val was not quoted arg
-            if not att_val and args[2]:
-                att_val = args[2].partition(' ')[0]
-
-            args = [att_name, att_val]
-
-        # retrieve dictionary of current objects
-        new_dict = storage.all()[key]
+        if pairs is None:
+            print("** invalid dictionary **")
+            return
 
         # iterate through attr names and values
-        for i, att_name in enumerate(args):
-            # block only runs on even iterations
-            if (i % 2 == 0):
-                att_val = args[i + 1]  # following item is value
-                if not att_name:  # check for att_name
-                    print("** attribute name missing **")
-                    return
-                if not att_val:  # check for att_value
-                    print("** value missing **")
-                    return
-                # type cast as necessary
-                if att_name in HBNBCommand.types:
-                    att_val = HBNBCommand.types[att_name](att_val)
-
-                # update dictionary with name, value pair
-                new_dict.__dict__.update({att_name: att_val})
+        for att_name, att_val in pairs:
+            if not att_name:  # check for att_name
+                print("** attribute name missing **")
+                return
+            if not att_val:  # check for att_value
+                print("** value missing **")
+                return
+            # type cast as necessary
+            if att_name in HBNBCommand.types:
+                att_val = HBNBCommand.types[att_name](att_val)
+
+            # set through setattr so that storage sees the change
+            try:
+                setattr(new_dict, att_name, att_val)
+            except AttributeError:
+                print("** attribute can't be set **")
+                return
 
         new_dict.save()  # save updates to file
-        storage.save()
+
+    @staticmethod
+    def parse_update(args):
+        """Returns the class name, id and (name, value) pairs of update
+
+        A dictionary is read as JSON or else as a Python literal, never
+        run; the pairs are None when it is not one.
+        """
+        match = HBNBCommand.update_syntax.match(args)
+        rest = match.group('rest')
+        if rest.startswith('{'):
+            try:
+                kwargs = json.loads(rest)
+            except ValueError:
+                try:
+                    kwargs = ast.literal_eval(rest)
+                except (ValueError, SyntaxError):
+                    kwargs = None
+            pairs = list(kwargs.items()) if type(kwargs) is dict else None
+        else:
+            name, quoted_name, val, quoted_val = \
+                HBNBCommand.update_pair.match(rest).group(
+                    'name', 'qname', 'val', 'qval')
+            pairs = [(quoted_name if name is None else name,
+                      quoted_val if val is None else val)]
+        return match.group('cls'), match.group('id'), pairs
 
     def help_update(self):
         """Help information for the update class"""
@@ -411,4 +667,8 @@ class HBNBCommand(cmd.Cmd):
 
 
 if __name__ == "__main__":
-    HBNBCommand().cmdloop()
+    console = HBNBCommand()
+    if '--batch' in sys.argv[1:]:
+        console.batch = True
+        console.do_begin('')
+    console.cmdloop()
@@ -4,6 +4,7 @@ This module instantiates an object of class FileStorage or DBStorage
 based on the environment variable.
 """
 from os import getenv
+from models.engine.metrics import instrument, metrics
 
 
 if getenv('HBNB_storage_type') == "db":
@@ -12,5 +13,7 @@ if getenv('HBNB_storage_type') == "db":
 else:
     from models.engine.file_storage import FileStorage
     storage = FileStorage()
+if metrics.enabled:
+    instrument(storage)
 # Reload the storage to load data from the storage backend
 storage.reload()
@@ -10,6 +10,9 @@ from sqlalchemy.ext.declarative import declarative_base
 # Define the Base class based on the storage type
 Base = declarative_base() if getenv("HBNB_TYPE_STORAGE") == 'db' else object
 
+# class -> names of its properties, which from_dict() has to setattr()
+_setters = {}
+
 
 class BaseModel:
     """The BaseModel class from which future classes will be derived"""
@@ -32,9 +35,48 @@ class BaseModel:
 
                 # Convert date strings to datetime objects
                 if key in ['created_at', 'updated_at']:
-                    # Define the time format for date parsing
-                    time_fmt = "%Y-%m-%dT%H:%M:%S.%f"
-                    setattr(self, key, datetime.strptime(value, time_fmt))
+                    setattr(self, key, datetime.fromisoformat(value))
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds an instance from a dictionary made by to_dict()
+
+        Unlike cls(**data) this skips __init__, so no uuid or clock
+        reads are spent on values data already has, and sets the plain
+        attributes in one __dict__ update. Mapped classes need __init__,
+        so with database storage this is cls(**data).
+        """
+        if Base is not object:
+            return cls(**data)
+        obj = cls.__new__(cls)
+        attrs = obj.__dict__
+        attrs.update(data)
+        attrs.pop('__class__', None)
+        for key in ('created_at', 'updated_at'):
+            value = attrs.get(key)
+            if type(value) is str:
+                attrs[key] = datetime.fromisoformat(value)
+        if 'id' not in attrs or 'updated_at' not in attrs or \
+                'created_at' not in attrs:
+            now = datetime.now()
+            attrs.setdefault('id', str(uuid.uuid4()))
+            attrs.setdefault('created_at', now)
+            attrs.setdefault('updated_at', now)
+        setters = _setters.get(cls)
+        if setters is None:
+            setters = _setters[cls] = frozenset(
+                name for name in dir(cls)
+                if isinstance(getattr(cls, name, None), property))
+        for key in setters.intersection(attrs):
+            setattr(obj, key, attrs.pop(key))
+        return obj
+
+    def __setattr__(self, name, value):
+        """Set an attribute, telling storage the instance changed"""
+        super().__setattr__(name, value)
+        changed = getattr(getattr(models, 'storage', None), 'changed', None)
+        if changed is not None:
+            changed(self, name)
 
     def __str__(self):
         """String representation of the BaseModel class"""
@@ -0,0 +1,193 @@
+#!/usr/bin/python3
+"""
+This module defines the async storage interface of the ASGI pages.
+
+AsyncFileStorage runs each FileStorage call in a worker thread, so a
+slow reload() or close() does not hold up the event loop. Reads share a
+pool of HBNB_ASYNC_THREADS threads (default 32); close(), which may
+reload the file, runs in a thread of its own, one call at a time, and
+FileStorage holds its lock while it changes its objects. AsyncDBStorage
+reads the database through SQLAlchemy's async engine: aiomysql for
+MySQL, aiosqlite for SQLite, or the driver named in HBNB_MYSQL_ASYNC_URL.
+Both offer the reads the pages need as coroutines (all, get, count,
+lookup, query, search_places, close) and version(), which never waits
+on anything and stays a plain method. Writes keep going through
+models.storage.
+
+Use async_storage(storage) to get the one matching models.storage.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from os import getenv
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (async_scoped_session, async_sessionmaker,
+                                    create_async_engine)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from models.engine.db_storage import (classes, database_url, engine_options,
+                                      load_options, select_page,
+                                      select_places)
+from models.engine.file_storage import FileStorage
+
+# backend -> asyncio driver used in place of the url's own
+async_drivers = {'mysql': 'aiomysql', 'sqlite': 'aiosqlite'}
+# drivers that are already asyncio ones
+asyncio_drivers = ('aiomysql', 'asyncmy', 'aiosqlite')
+
+
+def async_url(url):
+    """Returns url with its driver swapped for the asyncio one"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in async_drivers or \
+            url.get_driver_name() in asyncio_drivers:
+        return url
+    return url.set(drivername=backend + '+' + async_drivers[backend])
+
+
+class AsyncFileStorage:
+    """FileStorage with its calls run in worker threads"""
+
+    def __init__(self, storage):
+        """Wraps storage, a FileStorage"""
+        self.storage = storage
+        self.executor = ThreadPoolExecutor(
+            int(getenv('HBNB_ASYNC_THREADS', '32')), 'hbnb-storage')
+        # reloads one at a time
+        self.writer = ThreadPoolExecutor(1, 'hbnb-storage-writer')
+
+    async def _run(self, call, *args, executor=None):
+        """Runs call(*args) in the pool and waits for its result"""
+        return await asyncio.get_running_loop().run_in_executor(
+            executor or self.executor, call, *args)
+
+    async def all(self, cls=None, load=None):
+        """Returns a dictionary of models currently in storage"""
+        return await self._run(self.storage.all, cls, load)
+
+    async def get(self, cls, id, load=None):
+        """Returns the cls instance with the given id, or None"""
+        return await self._run(self.storage.get, cls, id, load)
+
+    async def count(self, cls=None):
+        """Returns the number of cls instances, or of all objects"""
+        return await self._run(self.storage.count, cls)
+
+    async def lookup(self, cls, attr, value):
+        """Returns the list of cls instances whose attr equals value"""
+        return await self._run(self.storage.lookup, cls, attr, value)
+
+    async def query(self, cls, filters=None, order_by='id', limit=None,
+                    offset=0, after=None, load=None):
+        """Returns one ordered page of cls instances as a list"""
+        return await self._run(self.storage.query, cls, filters,
+                               order_by, limit, offset, after, load)
+
+    async def search_places(self, **filters):
+        """Returns one ordered page of the places matching filters"""
+        return await self._run(
+            functools.partial(self.storage.search_places, **filters))
+
+    def version(self, cls):
+        """Returns a number that changes whenever a cls object changes"""
+        return self.storage.version(cls)
+
+    async def close(self):
+        """Picks up changes other processes made to the file"""
+        await self._run(self.storage.close, executor=self.writer)
+
+
+class AsyncDBStorage:
+    """The database read through SQLAlchemy's async engine"""
+    __engine = None
+    # async_scoped_session registry: each task gets its own session
+    __session = None
+
+    def __init__(self, storage):
+        """Connects to the database behind storage, a DBStorage"""
+        self.storage = storage
+        url = getenv('HBNB_MYSQL_ASYNC_URL') or async_url(database_url())
+        options = engine_options(url)
+        if options.get('poolclass') is QueuePool:
+            options['poolclass'] = AsyncAdaptedQueuePool
+        self.__engine = create_async_engine(url, **options)
+        self.__session = async_scoped_session(
+            async_sessionmaker(self.__engine, expire_on_commit=False),
+            scopefunc=asyncio.current_task)
+
+    @staticmethod
+    def _class(cls):
+        """Returns the mapped class called cls, or cls itself"""
+        return classes[cls] if type(cls) is str else cls
+
+    async def all(self, cls=None, load=None):
+        """Returns a dictionary of the cls objects, or of every object"""
+        result = {}
+        for current in [self._class(cls)] if cls else classes.values():
+            statement = select(current)
+            if load and cls:
+                statement = statement.options(*load_options(current, load))
+            for obj in await self.__session.scalars(statement):
+                result['{}.{}'.format(type(obj).__name__, obj.id)] = obj
+        return result
+
+    async def get(self, cls, id, load=None):
+        """Returns the cls object with the given id, or None"""
+        if type(cls) is str:
+            cls = classes.get(cls)
+            if cls is None:
+                return None
+        options = load_options(cls, load) if load else ()
+        return await self.__session.get(cls, id, options=options)
+
+    async def count(self, cls=None):
+        """Returns the number of cls objects, or of all objects"""
+        if cls:
+            if type(cls) is str:
+                cls = classes.get(cls)
+                if cls is None:
+                    return 0
+            return await self.__session.scalar(select(func.count(cls.id)))
+        total = 0
+        for current in classes.values():
+            total += await self.count(current)
+        return total
+
+    async def lookup(self, cls, attr, value):
+        """Returns the cls objects whose attr equals value"""
+        cls = self._class(cls)
+        rows = await self.__session.scalars(
+            select(cls).where(getattr(cls, attr) == value))
+        return rows.all()
+
+    async def query(self, cls, filters=None, order_by='id', limit=None,
+                    offset=0, after=None, load=None):
+        """Returns one ordered page of cls objects, as DBStorage.query()"""
+        rows = await self.__session.scalars(select_page(
+            self._class(cls), filters, order_by, limit, offset, after, load))
+        return rows.all()
+
+    async def search_places(self, **filters):
+        """Returns one ordered page of places, as DBStorage.search_places()"""
+        rows = await self.__session.scalars(select_places(**filters))
+        return rows.all()
+
+    def version(self, cls):
+        """Returns the version models.storage keeps for cls"""
+        return self.storage.version(cls)
+
+    async def close(self):
+        """Closes and discards the current task's session"""
+        await self.__session.remove()
+
+    async def dispose(self):
+        """Closes every pooled connection"""
+        await self.__engine.dispose()
+
+
+def async_storage(storage):
+    """Returns the async storage reading what storage holds"""
+    if isinstance(storage, FileStorage):
+        return AsyncFileStorage(storage)
+    return AsyncDBStorage(storage)
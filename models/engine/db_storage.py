@@ -1,51 +1,197 @@
 #!/usr/bin/python3
 """ This modules handles Database Storage """
-from sqlalchemy import create_engine
+from sqlalchemy import and_, create_engine, func, or_, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+from contextlib import contextmanager
 from os import getenv
 from models.base_model import Base
+from models.engine import geo
 from models.city import City
 from models.place import Place
 from models.review import Review
 from models.state import State
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.orm import configure_mappers, joinedload, selectinload
 from models.user import User
 from models.amenity import Amenity
 
+classes = {
+    "City": City,
+    "State": State,
+    "User": User,
+    "Place": Place,
+    "Review": Review,
+    "Amenity": Amenity,
+}
+
+# HBNB_MYSQL_* variable -> create_engine pool argument
+pool_settings = {
+    'HBNB_MYSQL_POOL_SIZE': ('pool_size', int),
+    'HBNB_MYSQL_MAX_OVERFLOW': ('max_overflow', int),
+    'HBNB_MYSQL_POOL_RECYCLE': ('pool_recycle', int),
+    'HBNB_MYSQL_POOL_TIMEOUT': ('pool_timeout', float),
+}
+
+
+def database_url():
+    '''
+    return HBNB_MYSQL_URL, or the MySQL url built from the
+    HBNB_MYSQL_* connection variables
+    '''
+    return getenv('HBNB_MYSQL_URL') or 'mysql+mysqldb://{}:{}@{}/{}'.format(
+        getenv('HBNB_MYSQL_USER'),
+        getenv('HBNB_MYSQL_PWD'),
+        getenv('HBNB_MYSQL_HOST'),
+        getenv('HBNB_MYSQL_DB'))
+
+
+def engine_options(url):
+    '''
+    build the create_engine keyword arguments for url from the
+    HBNB_MYSQL_* pool variables
+    '''
+    options = {'pool_pre_ping': True}
+    cache_size = getenv('HBNB_MYSQL_CACHE_SIZE')
+    if cache_size:
+        options['query_cache_size'] = int(cache_size)
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite':
+        options['connect_args'] = {'check_same_thread': False}
+        if url.database in (None, '', ':memory:'):
+            # one in-memory database only lives as long as its connection
+            options['poolclass'] = StaticPool
+            return options
+    for name, (option, cast) in pool_settings.items():
+        value = getenv(name)
+        if value:
+            options[option] = cast(value)
+            options['poolclass'] = QueuePool
+    return options
+
+
+def load_options(cls, load):
+    '''
+    turn relationship paths into loader options: collections are
+    fetched with one extra SELECT ... IN, many-to-one with a JOIN
+    '''
+    configure_mappers()
+    options = []
+    for path in load:
+        option = None
+        current = cls
+        for name in path.split('.'):
+            attr = getattr(current, name)
+            strategy = selectinload if attr.property.uselist \
+                else joinedload
+            if option is None:
+                option = strategy(attr)
+            else:
+                option = getattr(option, strategy.__name__)(attr)
+            current = attr.property.mapper.class_
+        options.append(option)
+    return options
+
+
+def select_page(cls, filters=None, order_by='id', limit=None, offset=0,
+                after=None, load=None):
+    '''
+    build the SELECT behind DBStorage.query(), shared with the async
+    storage
+    '''
+    statement = select(cls)
+    if filters:
+        statement = statement.filter_by(**filters)
+    column = getattr(cls, order_by.lstrip('-'))
+    descending = order_by.startswith('-')
+    if after is not None:
+        if descending:
+            statement = statement.where(or_(
+                column < after[0],
+                and_(column == after[0], cls.id < after[1])))
+        else:
+            statement = statement.where(or_(
+                column > after[0],
+                and_(column == after[0], cls.id > after[1])))
+    if descending:
+        statement = statement.order_by(column.desc(), cls.id.desc())
+    else:
+        statement = statement.order_by(column, cls.id)
+    if load:
+        statement = statement.options(*load_options(cls, load))
+    return statement.offset(offset).limit(limit)
+
+
+def select_places(states=None, cities=None, amenities=None, min_price=None,
+                  max_price=None, guests=None, order_by='id', limit=None,
+                  offset=0, after=None, load=None):
+    '''
+    build the SELECT behind DBStorage.search_places(): states go
+    through a join on cities, amenities through place_amenity, grouped
+    so a place needs every one of them
+    '''
+    statement = select_page(Place, None, order_by, limit, offset, after,
+                            load)
+    if states or cities:
+        statement = statement.join(City, Place.city_id == City.id).where(
+            or_(City.state_id.in_(states or ()),
+                City.id.in_(cities or ())))
+    amenities = set(amenities or ())
+    if amenities:
+        place_amenity = Base.metadata.tables['place_amenity']
+        linked = select(place_amenity.c.place_id).where(
+            place_amenity.c.amenity_id.in_(amenities)).group_by(
+            place_amenity.c.place_id).having(
+            func.count() == len(amenities)).subquery()
+        statement = statement.join(linked, Place.id == linked.c.place_id)
+    if min_price is not None:
+        statement = statement.where(Place.price_by_night >= min_price)
+    if max_price is not None:
+        statement = statement.where(Place.price_by_night <= max_price)
+    if guests is not None:
+        statement = statement.where(Place.max_guest >= guests)
+    return statement
+
+
+def select_near(box):
+    '''
+    build the SELECT of the places inside box, as geo.bounding_box()
+    returns it, served by the (latitude, longitude) index
+    '''
+    low, high, spans = box
+    return select(Place).where(
+        Place.latitude.between(low, high),
+        or_(*(Place.longitude.between(west, east) for west, east in spans)))
+
 
 class DBStorage:
     '''
     Handles database engine
     '''
     __engine = None
+    # scoped_session registry: each thread gets its own Session
     __session = None
 
     def __init__(self):
         '''
         Create engine for database
         '''
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.format(
-            getenv('HBNB_MYSQL_USER'),
-            getenv('HBNB_MYSQL_PWD'),
-            getenv('HBNB_MYSQL_HOST'),
-            getenv('HBNB_MYSQL_DB')),
-            pool_pre_ping=True
-        )
+        # class name -> counter bumped whenever this process changes
+        # one of its rows
+        self.__versions = {}
+        url = database_url()
+        self.__engine = create_engine(url, **engine_options(url))
 
         if getenv('HBNB_ENV') == 'test':
             Base.metadata.drop_all(self.__engine)
 
-    def all(self, cls=None):
+    def all(self, cls=None, load=None):
         '''
         query for all objects on the current database session
+
+        load lists relationships of cls to fetch in the same round
+        trips, e.g. ('cities',) or ('cities.places', 'user')
         '''
-        classes = {
-            "City": City,
-            "State": State,
-            "User": User,
-            "Place": Place,
-            "Review": Review,
-            "Amenity": Amenity,
-        }
         result = {}
         query_rows = []
 
@@ -54,6 +200,8 @@ class DBStorage:
             if type(cls) is str:
                 cls = eval(cls)
             query_rows = self.__session.query(cls)
+            if load:
+                query_rows = query_rows.options(*load_options(cls, load))
             for obj in query_rows:
                 key = '{}.{}'.format(type(obj).__name__, obj.id)
                 result[key] = obj
@@ -67,32 +215,199 @@ class DBStorage:
                     result[key] = obj
             return result
 
+    def get(self, cls, id, load=None):
+        '''retrieve one object by class and id, or None'''
+        if type(cls) is str:
+            cls = classes.get(cls)
+            if cls is None:
+                return None
+        if load:
+            return self.__session.get(cls, id,
+                                      options=load_options(cls, load))
+        return self.__session.get(cls, id)
+
+    def count(self, cls=None):
+        '''count the objects of cls, or of every class'''
+        if cls:
+            if type(cls) is str:
+                cls = classes.get(cls)
+                if cls is None:
+                    return 0
+            return self.__session.query(func.count(cls.id)).scalar()
+        return sum(self.count(value) for value in classes.values())
+
+    def version(self, cls):
+        '''
+        return a number that changes whenever this process writes a cls
+        row; writes made by other processes are not seen
+        '''
+        name = cls if type(cls) is str else cls.__name__
+        return self.__versions.get(name, 0)
+
+    def lookup(self, cls, attr, value):
+        '''query for the cls objects whose attr equals value'''
+        if type(cls) is str:
+            cls = classes[cls]
+        return self.__session.query(cls).filter(
+            getattr(cls, attr) == value).all()
+
+    def query(self, cls, filters=None, order_by='id', limit=None,
+              offset=0, after=None, load=None):
+        '''
+        return one ordered page of cls objects as a list, filtered,
+        sorted and sliced by the database
+
+        filters maps attribute names to the values they must equal;
+        order_by names the sort column, '-name' sorts descending; ties
+        are broken by id. after is the (order value, id) pair of the
+        last row already seen, for keyset pagination.
+        '''
+        if type(cls) is str:
+            cls = classes[cls]
+        return self.__session.scalars(select_page(
+            cls, filters, order_by, limit, offset, after, load)).all()
+
+    def search_places(self, states=None, cities=None, amenities=None,
+                      min_price=None, max_price=None, guests=None,
+                      order_by='id', limit=None, offset=0, after=None,
+                      load=None):
+        '''
+        return one ordered page of the places in one of cities or in a
+        city of one of states, having all of amenities (lists of ids),
+        costing between min_price and max_price a night and taking at
+        least guests; order_by, limit, offset and after work as in
+        query()
+        '''
+        return self.__session.scalars(select_places(
+            states, cities, amenities, min_price, max_price, guests,
+            order_by, limit, offset, after, load)).all()
+
+    def nearby_places(self, latitude, longitude, radius=None, limit=None):
+        '''
+        return [(distance, place)] for the places nearest a point,
+        nearest first, in km (see geo.nearby() for radius and limit);
+        the database picks the places in the bounding box and the exact
+        distances are worked out here
+        '''
+        def within(box):
+            for place in self.__session.scalars(select_near(box)):
+                yield place.latitude, place.longitude, place.id, place
+
+        return geo.nearby(within, latitude, longitude, radius, limit)
+
+    def iterate(self, cls, filters=None, order_by='id', limit=None,
+                offset=0, batch=1000):
+        '''
+        yield the rows query() would return, fetching them batch rows at
+        a time and letting go of each one once it has been used
+
+        the rows come from a session of their own, closed when the
+        iteration ends, so a response streamed after the request's
+        session was removed can still use it
+        '''
+        if type(cls) is str:
+            cls = classes[cls]
+        statement = select_page(cls, filters, order_by, limit, offset)
+        with self.__session.session_factory() as session:
+            rows = session.scalars(
+                statement.execution_options(yield_per=batch))
+            for obj in rows:
+                yield obj
+                session.expunge(obj)
+
     def new(self, obj):
         '''add the object to the current database session'''
         self.__session.add(obj)
 
+    def bulk_new(self, objs):
+        '''insert objs through the bulk INSERT path, without committing'''
+        self.__session.bulk_save_objects(objs)
+        self._touch(objs)
+
+    @contextmanager
+    def batch(self):
+        '''
+        defer every save() in the block to one commit at its end,
+        rolling back instead if the block raises
+        '''
+        self.begin()
+        info = self.__session.info
+        try:
+            yield self
+        except Exception:
+            info['batch_depth'] -= 1
+            if info['batch_depth'] == 0:
+                self.__session.rollback()
+            raise
+        self.commit()
+
+    def begin(self):
+        '''defer every save() to the matching commit()'''
+        info = self.__session.info
+        info['batch_depth'] = info.get('batch_depth', 0) + 1
+
+    def commit(self):
+        '''end a begin(), committing once the outermost one ends'''
+        info = self.__session.info
+        if not info.get('batch_depth'):
+            # rollback() already ended it
+            return
+        info['batch_depth'] -= 1
+        if info['batch_depth'] == 0:
+            self._commit()
+
+    def rollback(self):
+        '''drop every change not committed yet and end any begin()'''
+        self.__session.info['batch_depth'] = 0
+        self.__session.rollback()
+
     def save(self):
         '''commit all changes of the current database session'''
-        self.__session.commit()
+        if self.__session.info.get('batch_depth'):
+            return
+        self._commit()
 
     def delete(self, obj=None):
         '''delete obj from the current database session'''
         self.__session.delete(obj)
 
+    def _commit(self):
+        '''commit the session, bumping the versions of what it wrote'''
+        session = self.__session
+        written = list(session.new) + list(session.dirty) + \
+            list(session.deleted)
+        session.commit()
+        self._touch(written)
+
+    def _touch(self, objs):
+        '''bump the version of the classes of objs'''
+        for name in {type(obj).__name__ for obj in objs}:
+            self.__versions[name] = self.__versions.get(name, 0) + 1
+
+    def pool_stats(self):
+        '''report the state of the connection pool'''
+        pool = self.__engine.pool
+        stats = {'class': type(pool).__name__, 'status': pool.status()}
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            if hasattr(pool, name):
+                stats[name] = getattr(pool, name)()
+        return stats
+
     def reload(self):
         '''
         - create all tables in the database
-        - create the current database session from the engine
+        - create the session registry; every thread (and so every
+          request) gets its own session from it
         '''
         Base.metadata.create_all(self.__engine)
         session_factory = sessionmaker(
             bind=self.__engine, expire_on_commit=False)
-        Session = scoped_session(session_factory)
-        self.__session = Session()
+        self.__session = scoped_session(session_factory)
 
     def close(self):
         """
         Because SQLAlchemy doesn't reload his `Session`
         when it's time to insert new data, we force it to!
+        Only the calling thread's session is closed and discarded.
         """
-        self.__session.close()
+        self.__session.remove()
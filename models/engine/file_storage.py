@@ -1,66 +1,952 @@
 #!/usr/bin/python3
 """This module defines a class to manage file storage for hbnb clone"""
-import json
+import atexit
+import bisect
+import heapq
+import math
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from os import getenv
+from models.engine import geo
+from models.engine.metrics import metrics
+from models.engine.records import Record
+from models.engine.serializers import get_serializer
 
 
 class FileStorage:
     """This class manages storage of hbnb models in JSON format"""
-    __file_path = 'file.json'
+    # HBNB_FILE_FORMAT picks the snapshot format, see serializers.py
+    __serializer = get_serializer(getenv('HBNB_FILE_FORMAT', 'json'))
+    __file_path = 'file.' + __serializer.extension
     __objects = {}
+    # Journaled mode: save() appends the objects touched since the last
+    # save to <file_path>.journal instead of rewriting the whole file,
+    # and folds the journal into a fresh snapshot every __journal_max
+    # records
+    __journal = getenv('HBNB_FILE_JOURNAL') in ('1', 'true', 'yes')
+    __journal_max = int(getenv('HBNB_FILE_JOURNAL_MAX', '10000'))
+    __journal_size = 0
+    # Lazy mode: reload() keeps the raw dicts read from disk and only
+    # builds a model instance when something asks for it
+    __lazy = getenv('HBNB_FILE_LAZY') in ('1', 'true', 'yes')
+    # Compact mode: lazy mode with the unbuilt objects packed into
+    # slotted Records (see records.py) instead of dicts
+    __compact = getenv('HBNB_FILE_COMPACT') in ('1', 'true', 'yes')
+    # class name -> {key: raw dict} not yet built into instances
+    __pending = {}
+    # Every write goes to a temporary file renamed over the real one.
+    # HBNB_FILE_FSYNC=always also fsyncs the file and its directory
+    __fsync = getenv('HBNB_FILE_FSYNC', 'never')
+    # Background mode: save() returns at once and a writer thread
+    # flushes; flush() waits for it
+    __background = getenv('HBNB_FILE_ASYNC') in ('1', 'true', 'yes')
+    __writer = None
+    __lock = threading.Condition()
+    __requested = 0
+    __written = 0
+    __error = None
+    # save() calls made inside batch() blocks, written when they exit
+    __batch_depth = 0
+    __batch_saves = 0
+    # (inode, size, mtime) of the file and of its journal as this
+    # process last read or wrote them, and how far the journal was read
+    __file_stamp = None
+    __journal_stamp = None
+    __journal_offset = 0
+    # set when the journal ends in a record cut short: the next save
+    # cuts the journal back to __journal_offset before appending
+    __journal_torn = False
+    # keys added, changed or removed since the last save
+    __dirty = set()
+    __removed = set()
+    # key -> (object, encoded fragment) as of the last snapshot, so
+    # compact() only encodes objects changed since; BaseModel.__setattr__
+    # and new() drop the entry of an object that changes
+    __encoded = {}
+    __encoded_by = None
+    # Secondary indexes kept in step with __objects and __pending by
+    # every write, made under __lock; readers go over copies of them.
+    # class name -> {key: obj or raw dict}
+    __by_class = {}
+    # (class name, attribute) -> attribute value -> set of keys
+    __by_attr = {}
+    # key -> ((attribute, value), ...) as it was last indexed
+    __indexed = {}
+    # foreign keys that get a reverse index
+    indexed_attrs = ('state_id', 'place_id', 'city_id', 'user_id')
+    # lists of foreign keys whose every item gets a reverse index
+    indexed_lists = ('amenity_ids',)
+    # numbers kept sorted for range searches, built on first use:
+    # (class name, attribute) -> (sorted values, keys in the same order)
+    sorted_attrs = ('price_by_night',)
+    __sorted = {}
+    # (class name, attribute) -> keys changed since that sorted index
+    # was built, which searches check one by one; once more than 1024
+    # plus one __sorted_max-th of the indexed keys are stale, the index
+    # is dropped and built again
+    __sorted_stale = {}
+    __sorted_max = 32
+    # Grid over the objects with a latitude and a longitude, in cells
+    # of HBNB_GEO_CELL degrees a side: (row, column) -> set of keys
+    geo_attrs = ('latitude', 'longitude')
+    __geo_cell = float(getenv('HBNB_GEO_CELL', '0.1'))
+    __grid = {}
+    # key -> (latitude, longitude, cell) as it was last indexed
+    __located = {}
+    # class name -> counter bumped whenever one of its objects changes
+    __versions = {}
+    __classes = None
 
-    def all(self, cls=None):
-        """Returns a dictionary of models currently in storage"""
-        filtered_by_class = {}
+    def all(self, cls=None, load=None):
+        """Returns a dictionary of models currently in storage
+
+        load is accepted for compatibility with DBStorage; relationships
+        here are already answered from the indexes.
+        """
         if cls:
-            for key, value in FileStorage.__objects.items():
-                if value.__class__ == cls:
-                    filtered_by_class[key] = value
-            return filtered_by_class
+            name = cls if type(cls) is str else cls.__name__
+            self._materialize_class(name)
+            return dict(FileStorage.__by_class.get(name, {}))
+        for name in list(FileStorage.__pending):
+            self._materialize_class(name)
         return FileStorage.__objects
 
+    def get(self, cls, id, load=None):
+        """Returns the cls instance with the given id, or None
+
+        load is accepted for compatibility with DBStorage, as in all().
+        """
+        name = cls if type(cls) is str else cls.__name__
+        key = name + '.' + id
+        self._materialize(key)
+        return FileStorage.__objects.get(key)
+
+    def count(self, cls=None):
+        """Returns the number of cls instances, or of all objects"""
+        if cls:
+            name = cls if type(cls) is str else cls.__name__
+            return len(FileStorage.__by_class.get(name, ()))
+        return len(FileStorage.__indexed)
+
+    def version(self, cls):
+        """Returns a number that changes whenever a cls object changes"""
+        name = cls if type(cls) is str else cls.__name__
+        return FileStorage.__versions.get(name, 0)
+
+    def lookup(self, cls, attr, value):
+        """Returns the list of cls instances whose attr equals value"""
+        name = cls if type(cls) is str else cls.__name__
+        if attr in self.indexed_lists:
+            def matches(obj):
+                return value in (getattr(obj, attr, None) or ())
+        else:
+            def matches(obj):
+                return getattr(obj, attr, None) == value
+        if attr not in self.indexed_attrs and attr not in self.indexed_lists:
+            return [obj for obj in self.all(name).values() if matches(obj)]
+        keys = self._keys(name, attr, value)
+        result = []
+        for key in list(keys):
+            self._materialize(key)
+            # skip entries made stale by writes that bypassed setattr
+            obj = FileStorage.__objects.get(key)
+            if obj is not None and matches(obj):
+                result.append(obj)
+        return result
+
+    def query(self, cls, filters=None, order_by='id', limit=None,
+              offset=0, after=None, load=None):
+        """Returns one ordered page of cls instances as a list
+
+        filters maps attribute names to the values they must equal;
+        foreign keys among them are answered from the indexes.
+        order_by names the sort attribute, '-name' sorts descending;
+        ties are broken by id. after is the (order value, id) pair of
+        the last row already seen, for keyset pagination.
+        """
+        filters = dict(filters or {})
+        for attr in self.indexed_attrs:
+            if attr in filters:
+                rows = self.lookup(cls, attr, filters.pop(attr))
+                break
+        else:
+            rows = self.all(cls).values()
+        if filters:
+            rows = [obj for obj in rows
+                    if all(getattr(obj, attr, None) == value
+                           for attr, value in filters.items())]
+
+        attr = order_by.lstrip('-')
+
+        def sort_key(obj):
+            value = getattr(obj, attr, None)
+            return (value is None, value, obj.id)
+
+        return self._page(rows, sort_key, order_by.startswith('-'), limit,
+                          offset, after)
+
+    def search_places(self, states=None, cities=None, amenities=None,
+                      min_price=None, max_price=None, guests=None,
+                      order_by='id', limit=None, offset=0, after=None,
+                      load=None):
+        """Returns one ordered page of the places matching every filter
+
+        A place matches when it is in one of cities or in a city of one
+        of states, has all of amenities (lists of ids), costs between
+        min_price and max_price a night and takes at least guests.
+        Candidates come from the reverse indexes and the sorted price
+        index, and are checked on their stored values, so only the
+        returned page is ever built. A page ordered by price is read
+        off the price index, stopping once it is full, when that beats
+        sorting every candidate. order_by, limit, offset and after work
+        as in query().
+        """
+        candidates = []
+        if states or cities:
+            city_ids = set(cities or ())
+            for state_id in states or ():
+                city_ids.update(key.partition('.')[2] for key in
+                                self._keys('City', 'state_id', state_id))
+            keys = set()
+            for city_id in city_ids:
+                keys.update(self._keys('Place', 'city_id', city_id))
+            candidates.append(keys)
+        amenities = set(amenities or ())
+        for amenity_id in amenities:
+            candidates.append(self._keys('Place', 'amenity_ids', amenity_id))
+        keys = None
+        if candidates:
+            candidates.sort(key=len)
+            keys = set(candidates[0]).intersection(*candidates[1:])
+
+        place = self._classes()['Place']
+        # a copy: other threads may add or remove places meanwhile
+        bucket = dict(FileStorage.__by_class.get('Place', {}))
+
+        def value(obj, attr):
+            return self._value(obj, attr, place)
+
+        def number(obj, attr):
+            # None for what is not a number, as it cannot be compared
+            found = value(obj, attr)
+            if type(found) is int or type(found) is float:
+                return found
+            return None
+
+        def matches(obj):
+            # the indexes only narrow the rows down: check every filter
+            # on the stored values
+            if states or cities:
+                if value(obj, 'city_id') not in city_ids:
+                    return False
+            if amenities and \
+                    not amenities.issubset(value(obj, 'amenity_ids') or ()):
+                return False
+            price = number(obj, 'price_by_night')
+            if min_price is not None and (price is None or
+                                          price < min_price):
+                return False
+            if max_price is not None and (price is None or
+                                          price > max_price):
+                return False
+            if guests is not None:
+                max_guest = number(obj, 'max_guest')
+                if max_guest is None or max_guest < guests:
+                    return False
+            return True
+
+        attr = order_by.lstrip('-')
+        reverse = order_by.startswith('-')
+        prices = None
+        if min_price is not None or max_price is not None or \
+                attr == 'price_by_night':
+            values, index, stale = self._sorted('Place', 'price_by_night')
+            start = 0 if min_price is None else \
+                bisect.bisect_left(values, min_price)
+            end = len(values) if max_price is None else \
+                bisect.bisect_right(values, max_price)
+            start = min(start, end)
+            prices = range(end - 1, start - 1, -1) if reverse and \
+                attr == 'price_by_night' else range(start, end)
+
+        if prices is not None and attr == 'price_by_night' and \
+                limit is not None and after is None and \
+                (keys is None or (offset + limit) * len(prices) <
+                 len(keys) * len(keys)):
+            # walk the index in order: stop at offset + limit matches
+            rows = []
+            for position in prices:
+                key = index[position]
+                if key in stale or keys is not None and key not in keys:
+                    continue
+                obj = bucket.get(key)
+                if obj is not None and matches(obj):
+                    rows.append((key, obj))
+                    if len(rows) == offset + limit:
+                        break
+            # places changed since the index was built are not in it
+            rows.extend((key, bucket[key]) for key in stale
+                        if key in bucket and (keys is None or key in keys)
+                        and matches(bucket[key]))
+        else:
+            if prices is not None and \
+                    len(prices) < (len(bucket) if keys is None else len(keys)):
+                in_range = {index[position] for position in prices}
+                in_range.update(stale)
+                keys = in_range if keys is None else keys & in_range
+            if keys is None:
+                rows = bucket.items()
+            else:
+                rows = [(key, bucket[key]) for key in keys if key in bucket]
+            rows = [row for row in rows if matches(row[1])]
+
+        def sort_key(row):
+            order = value(row[1], attr)
+            return (order is None, order, row[0].partition('.')[2])
+
+        result = []
+        for key, obj in self._page(rows, sort_key, reverse, limit, offset,
+                                   after):
+            self._materialize(key)
+            obj = FileStorage.__objects.get(key)
+            if obj is not None:
+                result.append(obj)
+        return result
+
+    def nearby_places(self, latitude, longitude, radius=None, limit=None):
+        """Returns [(distance, place)] for the places nearest a point
+
+        Distances are in km, nearest first; see geo.nearby() for radius
+        and limit. Places without both a latitude and a longitude are
+        left out. Only the grid cells around the point are looked at.
+        """
+        grid = FileStorage.__grid
+        located = FileStorage.__located
+        size = self.__geo_cell
+
+        def within(box):
+            low, high, spans = box
+            rows = range(math.floor(low / size), math.floor(high / size) + 1)
+            columns = [range(math.floor(west / size),
+                             math.floor(east / size) + 1)
+                       for west, east in spans]
+            if len(rows) * sum(map(len, columns)) > len(grid):
+                cells = [cell for cell in list(grid) if cell[0] in rows and
+                         any(cell[1] in span for span in columns)]
+            else:
+                cells = [(row, column) for row in rows
+                         for span in columns for column in span]
+            for cell in cells:
+                # copies: other threads may move places meanwhile
+                for key in list(grid.get(cell, ())):
+                    where = located.get(key)
+                    if where is not None and key.startswith('Place.'):
+                        yield where[0], where[1], key, key
+        result = []
+        for gap, key in geo.nearby(within, latitude, longitude, radius,
+                                   limit):
+            self._materialize(key)
+            obj = FileStorage.__objects.get(key)
+            if obj is not None:
+                result.append((gap, obj))
+        return result
+
+    def _value(self, obj, attr, cls):
+        """Returns attr of obj, an instance or a raw dict or Record of cls"""
+        if type(obj) is dict or type(obj) is Record:
+            value = obj.get(attr, getattr(cls, attr, None))
+            if attr in ('created_at', 'updated_at') and type(value) is str:
+                # compare as the datetime a built instance would hold
+                value = datetime.fromisoformat(value)
+            return value
+        return getattr(obj, attr, None)
+
+    def _page(self, rows, sort_key, reverse, limit, offset, after):
+        """Sorts rows by sort_key and returns the asked for slice"""
+        if after is not None:
+            mark = (after[0] is None, after[0], after[1])
+            if reverse:
+                rows = [row for row in rows if sort_key(row) < mark]
+            else:
+                rows = [row for row in rows if sort_key(row) > mark]
+        if limit is None:
+            return sorted(rows, key=sort_key, reverse=reverse)[offset:]
+        pick = heapq.nlargest if reverse else heapq.nsmallest
+        return pick(offset + limit, rows, key=sort_key)[offset:]
+
+    def iterate(self, cls, filters=None, order_by='id', limit=None,
+                offset=0, batch=1000):
+        """Yields the rows query() would return, one at a time
+
+        Objects reload() left unbuilt (lazy and compact modes) are built
+        for the iteration only and not kept, as DBStorage.iterate() lets
+        go of its rows, so iterating over a class does not build all of
+        it. batch is accepted for compatibility with DBStorage.
+        """
+        name = cls if type(cls) is str else cls.__name__
+        if filters or not FileStorage.__pending.get(name):
+            yield from self.query(cls, filters, order_by, limit, offset)
+            return
+        model = self._classes()[name]
+        attr = order_by.lstrip('-')
+
+        def sort_key(row):
+            value = self._value(row[1], attr, model)
+            return (value is None, value, row[0].partition('.')[2])
+
+        rows = list(FileStorage.__by_class.get(name, {}).items())
+        for key, obj in self._page(rows, sort_key, order_by.startswith('-'),
+                                   limit, offset, None):
+            if type(obj) is Record:
+                obj = obj.to_dict()
+            if type(obj) is dict:
+                obj = model.from_dict(obj)
+                if metrics.enabled:
+                    metrics.built(name)
+            yield obj
+
     def new(self, obj):
         """Adds new object to storage dictionary"""
-        self.all().update({obj.to_dict()['__class__'] + '.' + obj.id: obj})
+        key = type(obj).__name__ + '.' + obj.id
+        with FileStorage.__lock:
+            self._load(key, obj)
+            FileStorage.__encoded.pop(key, None)
+            FileStorage.__dirty.add(key)
+            FileStorage.__removed.discard(key)
+
+    def bulk_new(self, objs):
+        """Adds every object in objs to storage without saving"""
+        keys = []
+        with FileStorage.__lock:
+            for obj in objs:
+                key = type(obj).__name__ + '.' + obj.id
+                self._load(key, obj)
+                keys.append(key)
+            for key in keys:
+                FileStorage.__encoded.pop(key, None)
+            FileStorage.__dirty.update(keys)
+            FileStorage.__removed.difference_update(keys)
+
+    @contextmanager
+    def batch(self):
+        """Defers every save() in the block to a single one at its end
+
+        If the block raises, nothing is written and, once the outermost
+        block exits, every unsaved change is dropped as by rollback().
+        """
+        self.begin()
+        try:
+            yield self
+        except Exception:
+            FileStorage.__batch_depth -= 1
+            if FileStorage.__batch_depth == 0:
+                self.rollback()
+            raise
+        self.commit()
+
+    def begin(self):
+        """Defers every save() to the matching commit()"""
+        FileStorage.__batch_depth += 1
+
+    def commit(self):
+        """Ends a begin(), saving once if a save() was deferred"""
+        if FileStorage.__batch_depth == 0:
+            # rollback() already ended it
+            return
+        FileStorage.__batch_depth -= 1
+        if FileStorage.__batch_depth == 0 and FileStorage.__batch_saves:
+            FileStorage.__batch_saves = 0
+            self.save()
+
+    def rollback(self):
+        """Drops every change not saved yet and ends any begin()
+
+        The objects are read again from the file and its journal, so
+        instances held from before are no longer the stored ones.
+        """
+        FileStorage.__batch_depth = 0
+        FileStorage.__batch_saves = 0
+        if self.__background:
+            self.flush()
+        with FileStorage.__lock:
+            FileStorage.__dirty.clear()
+            FileStorage.__removed.clear()
+            FileStorage.__objects.clear()
+            FileStorage.__pending.clear()
+            self._reindex()
+            self.reload()
+
+    def changed(self, obj, name=None):
+        """Marks obj dirty once BaseModel.__setattr__ has set name
+
+        Code changing obj without setattr, through its __dict__ or a
+        list attribute in place, calls this without a name afterwards.
+        """
+        key = type(obj).__name__ + '.' + obj.id
+        if FileStorage.__objects.get(key) is not obj:
+            return
+        with FileStorage.__lock:
+            FileStorage.__encoded.pop(key, None)
+            FileStorage.__dirty.add(key)
+            if name in self.sorted_attrs and FileStorage.__sorted_stale:
+                self._unsort(type(obj).__name__, key)
+            if name is None or name in self.indexed_attrs or \
+                    name in self.indexed_lists or name in self.geo_attrs:
+                self._unindex(key)
+                self._index(key, obj)
 
     def save(self):
-        """Saves storage dictionary to file"""
-        with open(FileStorage.__file_path, 'w') as f:
-            temp = {}
-            temp.update(FileStorage.__objects)
-            for key, val in temp.items():
-                temp[key] = val.to_dict()
-            json.dump(temp, f)
+        """Saves storage dictionary to file
 
-    def reload(self):
-        """Loads storage dictionary from file"""
-        from models.base_model import BaseModel
-        from models.user import User
-        from models.place import Place
-        from models.state import State
-        from models.city import City
-        from models.amenity import Amenity
-        from models.review import Review
-
-        classes = {
-            'BaseModel': BaseModel, 'User': User, 'Place': Place,
-            'State': State, 'City': City, 'Amenity': Amenity,
-            'Review': Review
-        }
+        Only the objects changed since the last save are encoded again:
+        new(), delete(), setattr on a model (see BaseModel.__setattr__)
+        and changed() tell storage which they are. A change made behind
+        their back, such as obj.__dict__.update() or
+        place.amenity_ids.append(), is not written until changed(obj)
+        is called.
+        """
+        if FileStorage.__batch_depth:
+            FileStorage.__batch_saves += 1
+            return
+        if not self.__background:
+            self._write()
+            return
+        # hand the write to the writer thread; saves that arrive while
+        # it is busy are folded into its next pass
+        with FileStorage.__lock:
+            FileStorage.__requested += 1
+            if FileStorage.__writer is None:
+                FileStorage.__writer = threading.Thread(
+                    target=self._write_loop, daemon=True)
+                FileStorage.__writer.start()
+                atexit.register(self.flush)
+            FileStorage.__lock.notify_all()
+
+    def flush(self):
+        """Blocks until every save() issued so far is on disk"""
+        with FileStorage.__lock:
+            target = FileStorage.__requested
+            while FileStorage.__written < target:
+                FileStorage.__lock.wait()
+            error, FileStorage.__error = FileStorage.__error, None
+        if error is not None:
+            raise error
+
+    def compact(self):
+        """Rewrites the whole file and empties the journal"""
+        serializer = self.__serializer
+        with FileStorage.__lock:
+            FileStorage.__dirty.clear()
+            FileStorage.__removed.clear()
+            items = list(FileStorage.__objects.items())
+            # objects never built are written back as they were read
+            for pending in FileStorage.__pending.values():
+                items.extend(pending.items())
+            # encoding under the lock: an object changing meanwhile
+            # drops its new entry once the lock is free
+            if FileStorage.__encoded_by is not serializer:
+                FileStorage.__encoded = {}
+                FileStorage.__encoded_by = serializer
+            encoded = FileStorage.__encoded
+            get = encoded.get
+            for key, obj in items:
+                entry = get(key)
+                if entry is None or entry[0] is not obj:
+                    val = obj if type(obj) is dict else obj.to_dict()
+                    encoded[key] = (obj, serializer.encode(key, val))
+            for key in encoded.keys() - dict(items).keys():
+                del encoded[key]
+            fragments = [entry[1] for entry in encoded.values()]
+        tmp_path = FileStorage.__file_path + '.tmp'
+        with open(tmp_path, 'wb' if serializer.binary else 'w') as f:
+            serializer.dump_encoded(fragments, f)
+            self._sync(f)
+        if metrics.enabled:
+            metrics.wrote(os.path.getsize(tmp_path))
+        os.replace(tmp_path, FileStorage.__file_path)
+        if os.path.exists(FileStorage.__file_path + '.journal'):
+            os.remove(FileStorage.__file_path + '.journal')
+        FileStorage.__journal_size = 0
+        FileStorage.__file_stamp = self._stamp(FileStorage.__file_path)
+        FileStorage.__journal_stamp = None
+        FileStorage.__journal_offset = 0
+        FileStorage.__journal_torn = False
+        if self.__fsync == 'always':
+            self._sync_dir()
+
+    def _write(self):
+        """Writes out everything changed since the last write"""
+        if not self.__journal:
+            self.compact()
+            return
+        with FileStorage.__lock:
+            removed, FileStorage.__removed = FileStorage.__removed, set()
+            dirty, FileStorage.__dirty = FileStorage.__dirty, set()
+            objs = [(key, FileStorage.__objects.get(key)) for key in dirty]
+        records = []
+        for key in removed:
+            records.append(self.__serializer.dumps_line(['del', key]))
+        for key, obj in objs:
+            if obj is not None:
+                records.append(self.__serializer.dumps_line(
+                    ['put', key, obj.to_dict()]))
+        if not records:
+            return
+        data = ('\n'.join(records) + '\n').encode()
+        with open(FileStorage.__file_path + '.journal', 'ab') as f:
+            if FileStorage.__journal_torn:
+                # records appended after a torn one would never be read
+                f.truncate(FileStorage.__journal_offset)
+                FileStorage.__journal_torn = False
+            f.write(data)
+            self._sync(f)
+            FileStorage.__journal_offset = f.tell()
+        FileStorage.__journal_stamp = self._stamp(
+            FileStorage.__file_path + '.journal')
+        FileStorage.__journal_size += len(records)
+        if metrics.enabled:
+            metrics.wrote(len(data))
+        if FileStorage.__journal_size >= self.__journal_max:
+            self.compact()
+
+    def _write_loop(self):
+        """Body of the background writer thread"""
+        while True:
+            with FileStorage.__lock:
+                while FileStorage.__written == FileStorage.__requested:
+                    FileStorage.__lock.wait()
+                target = FileStorage.__requested
+            error = None
+            try:
+                self._write()
+            except Exception as e:
+                error = e
+            with FileStorage.__lock:
+                FileStorage.__written = target
+                if error is not None:
+                    FileStorage.__error = error
+                FileStorage.__lock.notify_all()
+
+    def _sync(self, f):
+        """Forces f to disk when the fsync policy asks for it"""
+        if self.__fsync == 'always':
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _sync_dir(self):
+        """Forces the rename of the storage file to disk"""
+        fd = os.open(os.path.dirname(os.path.abspath(
+            FileStorage.__file_path)), os.O_RDONLY)
         try:
-            temp = {}
-            with open(FileStorage.__file_path, 'r') as f:
-                temp = json.load(f)
-                for key, val in temp.items():
-                    self.all()[key] = classes[val['__class__']](**val)
-        except FileNotFoundError:
-            pass
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def reload(self):
+        """Loads storage dictionary from file
+
+        Objects already stored are replaced in place, so the dict all()
+        returns only grows while this runs.
+        """
+        with FileStorage.__lock:
+            FileStorage.__file_stamp = self._stamp(FileStorage.__file_path)
+            try:
+                temp = {}
+                with open(FileStorage.__file_path,
+                          'rb' if self.__serializer.binary else 'r') as f:
+                    temp = self.__serializer.load(f)
+                    for key, val in temp.items():
+                        self._put(key, val)
+            except FileNotFoundError:
+                pass
+            FileStorage.__journal_size = 0
+            self._replay(0)
 
     def delete(self, obj=None):
         ''' delete obj from __objects if it is inside '''
         if obj:
             key = '{}.{}'.format(type(obj).__name__, obj.id)
-            del FileStorage.__objects[key]
+            with FileStorage.__lock:
+                del FileStorage.__objects[key]
+                self._unindex(key)
+                FileStorage.__dirty.discard(key)
+                FileStorage.__removed.add(key)
 
     def close(self):
-        """ Deserialize JSON file to objects before leaving """
-        self.reload()
+        """ Deserialize JSON file to objects before leaving
+
+        Nothing is read when neither the file nor its journal changed
+        since this process last read or wrote them, and only the new
+        journal records are read when the journal just grew.
+        """
+        with FileStorage.__lock:
+            if self._stamp(FileStorage.__file_path) != \
+                    FileStorage.__file_stamp:
+                self.reload()
+                return
+            journal = self._stamp(FileStorage.__file_path + '.journal')
+            old = FileStorage.__journal_stamp
+            if journal == old:
+                return
+            if journal is None or \
+                    journal[1] < FileStorage.__journal_offset or \
+                    (old is not None and journal[0] != old[0]):
+                # the journal was replaced or cut down under us
+                self.reload()
+            else:
+                self._replay(FileStorage.__journal_offset)
+
+    def _stamp(self, path):
+        """Returns (inode, size, mtime) of path, or None if it is missing"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _replay(self, offset):
+        """Applies the journal records found past offset"""
+        path = FileStorage.__file_path + '.journal'
+        FileStorage.__journal_stamp = self._stamp(path)
+        torn = False
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError
+                        record = self.__serializer.loads_line(line)
+                    except ValueError:
+                        # a write cut short, or still going on
+                        torn = True
+                        break
+                    if record[0] == 'put':
+                        self._put(record[1], record[2])
+                    else:
+                        self._drop(record[1])
+                    offset += len(line)
+                    FileStorage.__journal_size += 1
+        except FileNotFoundError:
+            pass
+        FileStorage.__journal_offset = offset
+        FileStorage.__journal_torn = torn
+
+    def _classes(self):
+        """Returns the model classes by name"""
+        if FileStorage.__classes is None:
+            from models.base_model import BaseModel
+            from models.user import User
+            from models.place import Place
+            from models.state import State
+            from models.city import City
+            from models.amenity import Amenity
+            from models.review import Review
+
+            FileStorage.__classes = {
+                'BaseModel': BaseModel, 'User': User, 'Place': Place,
+                'State': State, 'City': City, 'Amenity': Amenity,
+                'Review': Review
+            }
+        return FileStorage.__classes
+
+    def _put(self, key, val):
+        """Stores the dict val read from disk under key"""
+        if (self.__lazy or self.__compact) and \
+                key not in FileStorage.__objects:
+            self._defer(key, val)
+            return
+        name = val['__class__']
+        self._load(key, self._classes()[name].from_dict(val))
+        if metrics.enabled:
+            metrics.built(name)
+
+    def _load(self, key, obj):
+        """Puts a model instance under key, replacing what was there
+
+        An instance already under key is replaced in place, never popped
+        first, so that threads going over all() meanwhile do not see
+        the dict change size.
+        """
+        with FileStorage.__lock:
+            if key in FileStorage.__indexed:
+                self._unindex(key)
+            FileStorage.__pending.get(key.partition('.')[0], {}).pop(key,
+                                                                     None)
+            FileStorage.__objects[key] = obj
+            self._index(key, obj)
+
+    def _defer(self, key, val):
+        """Puts a raw dict under key, to be built on first access"""
+        name = val['__class__']
+        if self.__compact:
+            val = Record(val)
+        with FileStorage.__lock:
+            if key in FileStorage.__indexed:
+                self._unindex(key)
+            FileStorage.__pending.setdefault(name, {})[key] = val
+            self._index(key, val)
+
+    def _drop(self, key):
+        """Removes whatever is stored under key"""
+        with FileStorage.__lock:
+            if key in FileStorage.__indexed:
+                self._unindex(key)
+            FileStorage.__objects.pop(key, None)
+            FileStorage.__pending.get(key.partition('.')[0], {}).pop(key,
+                                                                     None)
+
+    def _materialize(self, key):
+        """Builds the instance for key if it is still a raw dict"""
+        name = key.partition('.')[0]
+        if key not in FileStorage.__pending.get(name, ()):
+            return
+        with FileStorage.__lock:
+            val = FileStorage.__pending.get(name, {}).pop(key, None)
+            if val is not None:
+                if type(val) is Record:
+                    val = val.to_dict()
+                obj = self._classes()[name].from_dict(val)
+                FileStorage.__objects[key] = obj
+                FileStorage.__by_class[name][key] = obj
+                if metrics.enabled:
+                    metrics.built(name)
+
+    def _materialize_class(self, name):
+        """Builds every pending instance of the class called name"""
+        if name not in FileStorage.__pending:
+            return
+        with FileStorage.__lock:
+            pending = FileStorage.__pending.pop(name, None)
+            if pending:
+                cls = self._classes()[name]
+                bucket = FileStorage.__by_class[name]
+                for key, val in pending.items():
+                    if type(val) is Record:
+                        val = val.to_dict()
+                    obj = cls.from_dict(val)
+                    FileStorage.__objects[key] = obj
+                    bucket[key] = obj
+                if metrics.enabled:
+                    metrics.built(name, len(pending))
+
+    def _index(self, key, obj):
+        """Adds obj (an instance, dict or Record) to the indexes"""
+        name = key.partition('.')[0]
+        FileStorage.__by_class.setdefault(name, {})[key] = obj
+        FileStorage.__versions[name] = FileStorage.__versions.get(name, 0) + 1
+        if FileStorage.__sorted_stale:
+            self._unsort(name, key)
+        if type(obj) is dict or type(obj) is Record:
+            get = where = obj.get
+        else:
+            def get(attr):
+                return getattr(obj, attr, None)
+            # the class defaults are not a location
+            where = vars(obj).get
+        values = [(attr, get(attr)) for attr in self.indexed_attrs]
+        for attr in self.indexed_lists:
+            values.extend((attr, value) for value in get(attr) or ())
+        # dict.fromkeys drops repeated list items
+        values = tuple(dict.fromkeys(
+            (attr, value) for attr, value in values if value))
+        for attr, value in values:
+            FileStorage.__by_attr.setdefault(
+                (name, attr), {}).setdefault(value, set()).add(key)
+        FileStorage.__indexed[key] = values
+        lat, lon = where('latitude'), where('longitude')
+        if type(lat) in (int, float) and type(lon) in (int, float) and \
+                -90 <= lat <= 90:
+            lon = (lon + 180) % 360 - 180
+            size = self.__geo_cell
+            cell = (math.floor(lat / size), math.floor(lon / size))
+            FileStorage.__grid.setdefault(cell, set()).add(key)
+            FileStorage.__located[key] = (lat, lon, cell)
+
+    def _sorted(self, name, attr):
+        """Returns the (values, keys, stale keys) sorted index of attr
+
+        The stale keys are a copy, safe to go over while others write.
+        """
+        with FileStorage.__lock:
+            entry = FileStorage.__sorted.get((name, attr))
+            if entry is None:
+                default = getattr(self._classes()[name], attr, None)
+                rows = []
+                stale = set()
+                for key, obj in FileStorage.__by_class.get(name, {}).items():
+                    if type(obj) is dict or type(obj) is Record:
+                        value = obj.get(attr, default)
+                    else:
+                        value = getattr(obj, attr, None)
+                    if type(value) is int or type(value) is float:
+                        rows.append((value, key))
+                    else:
+                        # searches check what the index cannot order
+                        stale.add(key)
+                rows.sort()
+                entry = ([row[0] for row in rows], [row[1] for row in rows])
+                FileStorage.__sorted[(name, attr)] = entry
+                FileStorage.__sorted_stale[(name, attr)] = stale
+            return entry[0], entry[1], \
+                set(FileStorage.__sorted_stale[(name, attr)])
+
+    def _unsort(self, name, key):
+        """Marks key changed in the sorted indexes of the name class"""
+        for attr in self.sorted_attrs:
+            stale = FileStorage.__sorted_stale.get((name, attr))
+            if stale is not None:
+                stale.add(key)
+                size = len(FileStorage.__sorted[(name, attr)][1])
+                if len(stale) > 1024 + size // self.__sorted_max:
+                    del FileStorage.__sorted[(name, attr)]
+                    del FileStorage.__sorted_stale[(name, attr)]
+
+    def _keys(self, name, attr, value):
+        """Returns the keys the name class index has under attr = value"""
+        return FileStorage.__by_attr.get((name, attr), {}).get(value, ())
+
+    def _unindex(self, key):
+        """Removes key from the secondary indexes"""
+        name = key.partition('.')[0]
+        FileStorage.__by_class.get(name, {}).pop(key, None)
+        FileStorage.__versions[name] = FileStorage.__versions.get(name, 0) + 1
+        if FileStorage.__sorted_stale:
+            self._unsort(name, key)
+        for attr, value in FileStorage.__indexed.pop(key, ()):
+            keys = FileStorage.__by_attr[(name, attr)][value]
+            keys.discard(key)
+            if not keys:
+                del FileStorage.__by_attr[(name, attr)][value]
+        located = FileStorage.__located.pop(key, None)
+        if located is not None:
+            keys = FileStorage.__grid[located[2]]
+            keys.discard(key)
+            if not keys:
+                del FileStorage.__grid[located[2]]
+
+    def _reindex(self):
+        """Builds the indexes again from __objects and __pending
+
+        The indexes follow every change storage makes itself; code that
+        adds to or removes from the dict all() returns directly (tests
+        and benchmarks empty it) calls this afterwards.
+        """
+        with FileStorage.__lock:
+            FileStorage.__by_class.clear()
+            FileStorage.__by_attr.clear()
+            FileStorage.__indexed.clear()
+            FileStorage.__sorted.clear()
+            FileStorage.__sorted_stale.clear()
+            FileStorage.__grid.clear()
+            FileStorage.__located.clear()
+            for name in self._classes():
+                FileStorage.__versions[name] = \
+                    FileStorage.__versions.get(name, 0) + 1
+            for key, obj in FileStorage.__objects.items():
+                self._index(key, obj)
+            for pending in FileStorage.__pending.values():
+                for key, val in pending.items():
+                    self._index(key, val)
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""
+This module holds the geometry behind storage.nearby_places().
+
+Distances are great-circle distances in kilometres. A search only looks
+at the objects inside the bounding box of its circle, which each
+storage finds with its own index (a grid for FileStorage, a latitude,
+longitude index for DBStorage). Without a radius, the k nearest are
+found by searching a growing circle until it holds k objects.
+"""
+import math
+
+EARTH_RADIUS = 6371.0088
+# no two points are further apart than this
+HALF_CIRCUMFERENCE = math.pi * EARTH_RADIUS
+# radius in km of the first circle searched for the k nearest
+START = 10.0
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """Returns the great-circle distance in km between two points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * \
+        math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius):
+    """Returns the box around the circle of radius km about a point
+
+    The box is (min latitude, max latitude, longitude ranges): one
+    (min, max) range, or two when the box crosses the 180th meridian.
+    A box reaching a pole spans every longitude.
+    """
+    angle = math.degrees(radius / EARTH_RADIUS)
+    low, high = latitude - angle, latitude + angle
+    if low <= -90 or high >= 90:
+        return max(low, -90.0), min(high, 90.0), [(-180.0, 180.0)]
+    spread = math.degrees(math.asin(min(1.0, math.sin(
+        radius / EARTH_RADIUS) / math.cos(math.radians(latitude)))))
+    longitude = (longitude + 180) % 360 - 180
+    west, east = longitude - spread, longitude + spread
+    if east - west >= 360:
+        return low, high, [(-180.0, 180.0)]
+    if west < -180:
+        return low, high, [(west + 360, 180.0), (-180.0, east)]
+    if east > 180:
+        return low, high, [(west, 180.0), (-180.0, east - 360)]
+    return low, high, [(west, east)]
+
+
+def nearby(within, latitude, longitude, radius=None, limit=None):
+    """Returns [(distance, item)] for the items nearest a point
+
+    within(box) yields (latitude, longitude, id, item) for at least the
+    items inside box, as bounding_box() returns it. The result holds
+    the items within radius km, nearest first (ties by id), cut to
+    limit. With a limit, the circle searched starts small and grows
+    until it holds limit items or reaches radius.
+    """
+    cap = HALF_CIRCUMFERENCE if radius is None else radius
+    reach = cap if limit is None else min(cap, START)
+    while True:
+        found = []
+        for lat, lon, id, item in within(
+                bounding_box(latitude, longitude, reach)):
+            gap = distance(latitude, longitude, lat, lon)
+            if gap <= reach:
+                found.append((gap, id, item))
+        if limit is None or len(found) >= limit or reach >= cap:
+            found.sort(key=lambda row: row[:2])
+            return [(gap, item) for gap, id, item in found[:limit]]
+        reach = min(cap, reach * 4)
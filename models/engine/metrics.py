@@ -0,0 +1,171 @@
+#!/usr/bin/python3
+"""
+Counts and times storage operations when HBNB_METRICS is set.
+
+With HBNB_METRICS=1 (or true, yes), models/__init__.py hands the
+storage to instrument(): all(), get(), query(), new(), save(), reload(),
+delete() and close() are wrapped to record, per operation and class,
+how many calls were made and a histogram of how long they took. The
+storages add the bytes they write (FileStorage) and the objects they
+build from stored data. render() writes everything in the Prometheus
+text format; the Flask apps serve it at /metrics and the console prints
+a summary with stats.
+
+When it is not set nothing is wrapped; the storages only test
+metrics.enabled where they write or build objects.
+"""
+import threading
+import time
+from functools import wraps
+from os import getenv
+
+# upper bounds in seconds of the latency histogram buckets
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# media type of render()'s output
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# storage methods timed by instrument()
+OPERATIONS = ('all', 'get', 'query', 'new', 'save', 'reload', 'delete',
+              'close')
+
+
+class Metrics:
+    """Thread-safe counters and latency histograms of storage calls"""
+
+    def __init__(self, enabled=False):
+        """Creates empty metrics, recorded only when enabled"""
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forgets everything recorded so far"""
+        with self.lock:
+            # (operation, class name) -> [calls, seconds, max seconds,
+            # then one count per bucket and one past the last]
+            self.timings = {}
+            # class name -> objects built from stored data
+            self.materialized = {}
+            self.written = 0
+
+    def observe(self, operation, name, seconds):
+        """Records a call of operation on the class called name"""
+        bucket = 3
+        for bound in BUCKETS:
+            if seconds <= bound:
+                break
+            bucket += 1
+        with self.lock:
+            timing = self.timings.get((operation, name))
+            if timing is None:
+                timing = self.timings[operation, name] = \
+                    [0, 0.0, 0.0] + [0] * (len(BUCKETS) + 1)
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+            timing[bucket] += 1
+
+    def built(self, name, count=1):
+        """Adds count objects of the class called name built from storage"""
+        with self.lock:
+            self.materialized[name] = self.materialized.get(name, 0) + count
+
+    def wrote(self, size):
+        """Adds size bytes written by the storage"""
+        with self.lock:
+            self.written += size
+
+    def summary(self):
+        """Returns [(operation, class, calls, seconds, max seconds)]"""
+        with self.lock:
+            return sorted((operation, name) + tuple(timing[:3])
+                          for (operation, name), timing
+                          in self.timings.items())
+
+    def render(self):
+        """Returns the metrics in the Prometheus text format"""
+        with self.lock:
+            timings = sorted((key, list(timing))
+                             for key, timing in self.timings.items())
+            materialized = sorted(self.materialized.items())
+            written = self.written
+        lines = [
+            '# HELP hbnb_storage_seconds Time spent in storage calls.',
+            '# TYPE hbnb_storage_seconds histogram',
+        ]
+        for (operation, name), timing in timings:
+            labels = 'operation="{}",class="{}"'.format(operation, name)
+            total = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), timing[3:]):
+                total += count
+                lines.append('hbnb_storage_seconds_bucket{{{},le="{}"}} {}'
+                             .format(labels, bound, total))
+            lines.append('hbnb_storage_seconds_sum{{{}}} {!r}'.format(
+                labels, timing[1]))
+            lines.append('hbnb_storage_seconds_count{{{}}} {}'.format(
+                labels, timing[0]))
+        lines += [
+            '# HELP hbnb_storage_objects_materialized_total Objects built'
+            ' from stored data.',
+            '# TYPE hbnb_storage_objects_materialized_total counter',
+        ]
+        for name, count in materialized:
+            lines.append('hbnb_storage_objects_materialized_total'
+                         '{{class="{}"}} {}'.format(name, count))
+        lines += [
+            '# HELP hbnb_storage_written_bytes_total Bytes written by'
+            ' the storage.',
+            '# TYPE hbnb_storage_written_bytes_total counter',
+            'hbnb_storage_written_bytes_total {}'.format(written),
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics(getenv('HBNB_METRICS') in ('1', 'true', 'yes'))
+
+
+def class_name(operation, args):
+    """Returns the name of the class a storage call works on, or ''"""
+    if not args or args[0] is None:
+        return ''
+    arg = args[0]
+    if operation in ('new', 'delete'):
+        return type(arg).__name__
+    return arg if type(arg) is str else getattr(arg, '__name__', '')
+
+
+def timed(operation, method):
+    """Wraps a storage method to record its calls in metrics"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        """Calls the method, timing it"""
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            metrics.observe(operation, class_name(operation, args),
+                            time.perf_counter() - start)
+    wrapper.timed = True
+    return wrapper
+
+
+def loaded(target, context):
+    """Counts an instance SQLAlchemy built from a database row"""
+    metrics.built(type(target).__name__)
+
+
+def instrument(storage):
+    """Times the storage's operations and counts the rows it loads
+
+    The methods are wrapped on the storage's class, once.
+    """
+    cls = type(storage)
+    for operation in OPERATIONS:
+        method = getattr(cls, operation, None)
+        if method is not None and not getattr(method, 'timed', False):
+            setattr(cls, operation, timed(operation, method))
+    from models.base_model import Base
+    if Base is not object:
+        from sqlalchemy import event
+        if not event.contains(Base, 'load', loaded):
+            event.listen(Base, 'load', loaded, propagate=True)
@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+"""
+This module defines the compact form FileStorage keeps unbuilt objects in.
+
+A Record holds what BaseModel.to_dict() returned in slots instead of a
+dict: the id as 16 uuid bytes, both timestamps as integer microseconds
+since the epoch, and the remaining attributes as a tuple of values next
+to a tuple of names shared by every record with the same attributes.
+Values that would not survive the round trip exactly (an id that is not
+a canonical uuid, a timestamp with a time zone) are kept as they came.
+"""
+import uuid
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+RESERVED = ('__class__', 'id', 'created_at', 'updated_at')
+
+
+class Record:
+    """One stored object, packed"""
+    __slots__ = ('cls', 'uid', 'created', 'updated', 'names', 'values')
+    # attribute names tuple -> the same tuple, so records share them
+    shapes = {}
+
+    def __init__(self, val):
+        """Packs val, a dictionary made by BaseModel.to_dict()"""
+        self.cls = val['__class__']
+        self.uid = pack_id(val['id'])
+        self.created = pack_time(val.get('created_at'))
+        self.updated = pack_time(val.get('updated_at'))
+        names = tuple(name for name in val if name not in RESERVED)
+        self.names = Record.shapes.setdefault(names, names)
+        self.values = tuple(val[name] for name in names)
+
+    def get(self, name, default=None):
+        """Returns the attribute called name, like dict.get()"""
+        if name == 'id':
+            return unpack_id(self.uid)
+        if name in ('created_at', 'updated_at'):
+            packed = self.created if name == 'created_at' else self.updated
+            return default if packed is None else unpack_time(packed)
+        try:
+            return self.values[self.names.index(name)]
+        except ValueError:
+            return default
+
+    def to_dict(self):
+        """Unpacks the record into the dictionary it was made from"""
+        val = {'__class__': self.cls, 'id': unpack_id(self.uid)}
+        if self.created is not None:
+            val['created_at'] = unpack_time(self.created)
+        if self.updated is not None:
+            val['updated_at'] = unpack_time(self.updated)
+        val.update(zip(self.names, self.values))
+        return val
+
+
+def pack_id(value):
+    """Returns value as 16 bytes if it is a canonical uuid string"""
+    try:
+        packed = uuid.UUID(value)
+    except (ValueError, TypeError, AttributeError):
+        return value
+    if str(packed) != value:
+        return value
+    return packed.bytes
+
+
+def unpack_id(value):
+    """Reverses pack_id()"""
+    if type(value) is bytes:
+        return str(uuid.UUID(bytes=value))
+    return value
+
+
+def pack_time(value):
+    """Returns an isoformat string as microseconds since the epoch"""
+    if type(value) is not str:
+        return value
+    try:
+        stamp = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if stamp.tzinfo is not None or stamp.isoformat() != value:
+        return value
+    return (stamp - EPOCH) // MICROSECOND
+
+
+def unpack_time(value):
+    """Reverses pack_time()"""
+    if type(value) is int:
+        return (EPOCH + value * MICROSECOND).isoformat()
+    return value
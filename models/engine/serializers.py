@@ -0,0 +1,194 @@
+#!/usr/bin/python3
+"""
+This module defines the on-disk formats FileStorage can write.
+
+The format is chosen with the HBNB_FILE_FORMAT environment variable:
+json (default), orjson, msgpack or pickle. Every format stores the same
+dictionaries, the ones returned by BaseModel.to_dict(), so a file can be
+converted from one format to another with:
+
+    python3 -m models.engine.serializers <source> <destination>
+"""
+import json
+import pickle
+import sys
+
+
+class JSONSerializer:
+    """Standard library json, the default format"""
+    name = 'json'
+    extension = 'json'
+    binary = False
+
+    def dump(self, data, f):
+        """Writes data to the open file f"""
+        json.dump(data, f)
+
+    def load(self, f):
+        """Reads data back from the open file f"""
+        return json.load(f)
+
+    def encode(self, key, val):
+        """Encodes one stored object as a fragment for dump_encoded()"""
+        return '{}: {}'.format(json.dumps(key), json.dumps(val))
+
+    def dump_encoded(self, fragments, f):
+        """Writes fragments from encode() as the file dump() writes"""
+        f.write('{' + ', '.join(fragments) + '}')
+
+    def dumps_line(self, record):
+        """Encodes one journal record as a line of JSON"""
+        return json.dumps(record, separators=(',', ':'))
+
+    def loads_line(self, line):
+        """Decodes one journal record"""
+        return json.loads(line)
+
+
+class OrjsonSerializer(JSONSerializer):
+    """orjson: same files as json, written and read much faster"""
+    name = 'orjson'
+    binary = True
+
+    def __init__(self):
+        """Imports orjson, which is an optional dependency"""
+        import orjson
+        self.orjson = orjson
+
+    def dump(self, data, f):
+        """Writes data to the open file f"""
+        f.write(self.orjson.dumps(data))
+
+    def load(self, f):
+        """Reads data back from the open file f"""
+        return self.orjson.loads(f.read())
+
+    def encode(self, key, val):
+        """Encodes one stored object as a fragment for dump_encoded()"""
+        return self.orjson.dumps(key) + b':' + self.orjson.dumps(val)
+
+    def dump_encoded(self, fragments, f):
+        """Writes fragments from encode() as the file dump() writes"""
+        f.write(b'{' + b','.join(fragments) + b'}')
+
+    def dumps_line(self, record):
+        """Encodes one journal record as a line of JSON"""
+        return self.orjson.dumps(record).decode()
+
+    def loads_line(self, line):
+        """Decodes one journal record"""
+        return self.orjson.loads(line)
+
+
+class MsgpackSerializer(JSONSerializer):
+    """msgpack: compact binary snapshot, journal stays JSON lines"""
+    name = 'msgpack'
+    extension = 'msgpack'
+    binary = True
+
+    def __init__(self):
+        """Imports msgpack, which is an optional dependency"""
+        import msgpack
+        self.msgpack = msgpack
+
+    def dump(self, data, f):
+        """Writes data to the open file f"""
+        f.write(self.msgpack.packb(data))
+
+    def load(self, f):
+        """Reads data back from the open file f"""
+        data = f.read()
+        if not data:
+            raise ValueError('empty msgpack file')
+        return self.msgpack.unpackb(data)
+
+    def encode(self, key, val):
+        """Keeps the pair as is: this format is only written whole"""
+        return key, val
+
+    def dump_encoded(self, fragments, f):
+        """Writes the pairs from encode() with dump()"""
+        self.dump(dict(fragments), f)
+
+
+class PickleSerializer(JSONSerializer):
+    """pickle: binary snapshot, journal stays JSON lines"""
+    name = 'pickle'
+    extension = 'pickle'
+    binary = True
+
+    def dump(self, data, f):
+        """Writes data to the open file f"""
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, f):
+        """Reads data back from the open file f"""
+        try:
+            return pickle.load(f)
+        except EOFError:
+            raise ValueError('empty pickle file')
+
+    def encode(self, key, val):
+        """Keeps the pair as is: this format is only written whole"""
+        return key, val
+
+    def dump_encoded(self, fragments, f):
+        """Writes the pairs from encode() with dump()"""
+        self.dump(dict(fragments), f)
+
+
+serializers = {
+    'json': JSONSerializer,
+    'orjson': OrjsonSerializer,
+    'msgpack': MsgpackSerializer,
+    'pickle': PickleSerializer,
+}
+
+
+def get_serializer(name):
+    """Returns the serializer called name
+
+    Raises:
+        ValueError: if the format is unknown or its library is missing.
+    """
+    if name not in serializers:
+        raise ValueError('unknown storage format: {}'.format(name))
+    try:
+        return serializers[name]()
+    except ImportError:
+        raise ValueError('storage format {} needs the {} package'.format(
+            name, name))
+
+
+def guess_serializer(path):
+    """Returns the serializer matching the extension of path"""
+    extension = path.rpartition('.')[2]
+    for name in ('json', 'msgpack', 'pickle'):
+        if extension == serializers[name].extension:
+            return get_serializer(name)
+    raise ValueError('cannot tell the format of {}'.format(path))
+
+
+def convert(src, dst, src_format=None, dst_format=None):
+    """Copies the storage file src to dst, changing its format
+
+    The formats default to the ones matching each file's extension.
+    """
+    reader = get_serializer(src_format) if src_format \
+        else guess_serializer(src)
+    writer = get_serializer(dst_format) if dst_format \
+        else guess_serializer(dst)
+    with open(src, 'rb' if reader.binary else 'r') as f:
+        data = reader.load(f)
+    with open(dst, 'wb' if writer.binary else 'w') as f:
+        writer.dump(data, f)
+    return len(data)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (3, 5):
+        print('Usage: {} <source> <destination> [<from> <to>]'.format(
+            sys.argv[0]))
+        sys.exit(1)
+    count = convert(*sys.argv[1:])
+    print('{} objects converted'.format(count))
@@ -5,7 +5,8 @@ import models
 from models.base_model import BaseModel, Base
 from os import getenv
 import sqlalchemy
-from sqlalchemy import Column, String, Integer, Table, Float, ForeignKey
+from sqlalchemy import (Column, String, Integer, Table, Float, ForeignKey,
+                        Index)
 from sqlalchemy.orm import relationship
 
 # Define the association table for the many-to-many relationship
@@ -26,7 +27,9 @@ if getenv('HBNB_TYPE_STORAGE') == 'db':
             String(60),
             ForeignKey('amenities.id'),
             primary_key=True,
-            nullable=False
+            nullable=False,
+            # the primary key only serves lookups by place_id
+            index=True
         )
     )
 
@@ -36,6 +39,10 @@ class Place(BaseModel, Base):
 
     if getenv('HBNB_TYPE_STORAGE') == 'db':
         __tablename__ = 'places'
+        # serves the bounding boxes of storage.nearby_places()
+        __table_args__ = (
+            Index('ix_places_location', 'latitude', 'longitude'),
+        )
 
         city_id = Column(
             String(60),
@@ -119,6 +126,7 @@ class Place(BaseModel, Base):
         price_by_night = 0
         latitude = 0.0
         longitude = 0.0
+        amenity_ids = []
 
     def __init__(self, *args, **kwargs):
         """Initializes Place"""
@@ -127,22 +135,33 @@ class Place(BaseModel, Base):
     @property
     def reviews(self):
         """Attribute that returns a list of Review instances"""
-        values_review = models.storage.all("Review").values()
-        list_review = [
-            review
-            for review in values_review
-            if review.place_id == self.id
-        ]
-        return list_review
+        from models.review import Review
+
+        return models.storage.lookup(Review, 'place_id', self.id)
 
     if getenv('HBNB_TYPE_STORAGE') != 'db':
+        @property
+        def user(self):
+            """Attribute that returns the User owning the place"""
+            from models.user import User
+
+            return models.storage.get(User, self.user_id)
+
         @property
         def amenities(self):
             """Attribute that returns a list of Amenity instances"""
-            values_amenity = models.storage.all("Amenity").values()
-            list_amenity = [
-                amenity
-                for amenity in values_amenity
-                if amenity.place_id == self.id
-            ]
-            return list_amenity
+            from models.amenity import Amenity
+
+            amenities = (models.storage.get(Amenity, amenity_id)
+                         for amenity_id in self.amenity_ids)
+            return [amenity for amenity in amenities if amenity is not None]
+
+        @amenities.setter
+        def amenities(self, amenity):
+            """Links an Amenity instance to the place"""
+            from models.amenity import Amenity
+
+            if type(amenity) is Amenity and \
+                    amenity.id not in self.amenity_ids:
+                # a new list, so storage sees the change
+                self.amenity_ids = self.amenity_ids + [amenity.id]
@@ -12,22 +12,17 @@ class State(BaseModel, Base):
 
     if getenv('HBNB_TYPE_STORAGE') == 'db':
         name = Column(String(128), nullable=False)
-        cities = relationship('City', cascade='all, delete', backref='state')
+        cities = relationship('City', cascade='all, delete', backref='state',
+                              order_by='City.name')
     else:
         ''' File Storage relationship '''
         @property
         def cities(self):
             '''
             returns the list of City instances
-            with state_id equals to the current State.id
+            with state_id equals to the current State.id, by name
             '''
             from models import storage
             from models.city import City
 
-            city_list = []
-            city_dict = storage.all(City)
-
-            for city in city_dict.values():
-                if city.state_id == self.id:
-                    city_list.append(city)
-            return city_list
+            return storage.query(City, {'state_id': self.id}, 'name')
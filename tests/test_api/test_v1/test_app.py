@@ -0,0 +1,234 @@
+#!/usr/bin/python3
+"""Unit tests for the JSON API"""
+import json
+import os
+import unittest
+from api.v1.app import app
+from models import storage
+from models.state import State
+
+
+@unittest.skipIf(os.getenv('HBNB_TYPE_STORAGE') == 'db',
+                 'FileStorage test')
+class TestApi(unittest.TestCase):
+    """Test the routes of api/v1"""
+
+    def setUp(self):
+        """Store three states"""
+        self.client = app.test_client()
+        self.states = [State(name=name) for name in ('Kano', 'Abuja', 'Oyo')]
+        for state in self.states:
+            state.save()
+
+    def tearDown(self):
+        """Remove the storage file"""
+        storage.all().clear()
+        storage._reindex()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_status(self):
+        """ /status and /stats answer """
+        self.assertEqual(self.client.get('/api/v1/status').get_json(),
+                         {'status': 'OK'})
+        stats = self.client.get('/api/v1/stats').get_json()
+        self.assertEqual(stats['states'], 3)
+        self.assertEqual(stats['cities'], 0)
+
+    def test_metrics(self):
+        """ /metrics answers only when metrics are on """
+        from models.engine.metrics import metrics
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        metrics.enabled = True
+        try:
+            self.client.get('/api/v1/stats')
+            response = self.client.get('/metrics')
+        finally:
+            metrics.enabled = False
+            metrics.reset()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        self.assertIn(b'hbnb_storage_written_bytes_total',
+                      response.data)
+
+    def test_list(self):
+        """ Lists are streamed, ordered, paged and cut down to fields """
+        response = self.client.get(
+            '/api/v1/states?order_by=name&limit=2&fields=name')
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.get_json(),
+                         [{'name': 'Abuja'}, {'name': 'Kano'}])
+        response = self.client.get('/api/v1/states?order_by=-name',
+                                   headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines],
+                         ['Oyo', 'Kano', 'Abuja'])
+        self.assertEqual(
+            self.client.get('/api/v1/states?offset=5').get_json(), [])
+
+    def test_list_errors(self):
+        """ Bad list parameters are answered with 400 """
+        self.assertEqual(
+            self.client.get('/api/v1/states?limit=x').status_code, 400)
+        response = self.client.get('/api/v1/nothing')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json(), {'error': 'Not found'})
+
+    def test_crud(self):
+        """ Objects are created, read, updated and deleted """
+        response = self.client.post('/api/v1/states',
+                                    json={'name': 'Lagos', 'id': 'x'})
+        self.assertEqual(response.status_code, 201)
+        state = response.get_json()
+        self.assertNotEqual(state['id'], 'x')
+        path = '/api/v1/states/' + state['id']
+        self.assertEqual(self.client.get(path + '?fields=name').get_json(),
+                         {'name': 'Lagos'})
+        response = self.client.put(path, json={'name': 'Eko'})
+        self.assertEqual(response.get_json()['name'], 'Eko')
+        self.assertEqual(storage.get(State, state['id']).name, 'Eko')
+        self.assertEqual(self.client.delete(path).get_json(), {})
+        self.assertEqual(self.client.get(path).status_code, 404)
+        response = self.client.post('/api/v1/states', data='nope')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {'error': 'Not a JSON'})
+
+    def test_read_only_keys(self):
+        """ Keys that cannot be set are refused with 400, not a 500 """
+        from models.place import Place
+        place = Place(name='Loft')
+        place.save()
+        for path, body in (('states/' + self.states[0].id, {'cities': []}),
+                           ('places/' + place.id, {'reviews': []}),
+                           ('places/' + place.id, {'save': 1})):
+            response = self.client.put('/api/v1/' + path, json=body)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.get_json(), {
+                'error': '{} cannot be set'.format(list(body)[0])})
+        response = self.client.post('/api/v1/states', json={'cities': []})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(storage.count(State), 3)
+
+    def test_numbers(self):
+        """ Numeric attributes are cast, or refused with 400 """
+        response = self.client.post('/api/v1/places',
+                                    json={'price_by_night': 'cheap'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(),
+                         {'error': 'price_by_night must be a number'})
+        response = self.client.post('/api/v1/places',
+                                    json={'price_by_night': '20',
+                                          'latitude': 6})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['price_by_night'], 20)
+        self.assertEqual(response.get_json()['latitude'], 6.0)
+        path = '/api/v1/places/' + response.get_json()['id']
+        response = self.client.put(path, json={'max_guest': [2]})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/v1/places?order_by=price_by_night')
+        self.assertEqual(response.status_code, 200)
+        # values stored before they were checked cannot be ordered
+        from models.place import Place
+        Place(price_by_night='cheap').save()
+        response = self.client.get('/api/v1/places?order_by=price_by_night')
+        self.assertEqual(response.status_code, 400)
+
+    def test_places_search(self):
+        """ /places_search filters, orders and pages places """
+        from models.amenity import Amenity
+        from models.city import City
+        from models.place import Place
+        city = City(name='Ikeja', state_id=self.states[0].id)
+        city.save()
+        wifi = Amenity(name='wifi')
+        wifi.save()
+        for name, price in (('a', 10), ('b', 100), ('c', 40)):
+            place = Place(name=name, price_by_night=price,
+                          city_id=city.id if name != 'c' else 'elsewhere')
+            if name != 'a':
+                place.amenities = wifi
+            place.save()
+        path = '/api/v1/places_search?order_by=name&fields=name'
+
+        def names(body, path=path):
+            response = self.client.post(path, json=body)
+            self.assertEqual(response.status_code, 200)
+            return [place['name'] for place in response.get_json()]
+
+        self.assertEqual(names({}), ['a', 'b', 'c'])
+        self.assertEqual(names({'states': [self.states[0].id]}), ['a', 'b'])
+        self.assertEqual(names({'amenities': [wifi.id]}), ['b', 'c'])
+        self.assertEqual(names({'min_price': 20, 'max_price': 50}), ['c'])
+        self.assertEqual(names({}, '/api/v1/places_search?limit=2'
+                                   '&order_by=-price_by_night'), ['b', 'c'])
+        response = self.client.post('/api/v1/places_search',
+                                    json={'guests': '2'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(),
+                         {'error': 'guests must be an integer'})
+        # a price stored before prices were checked matches no range
+        Place(name='d', price_by_night='cheap', max_guest='many').save()
+        self.assertEqual(names({'min_price': 10}), ['a', 'b', 'c'])
+        self.assertEqual(names({'guests': 1}), [])
+        self.assertEqual(names({'max_price': 50}), ['a', 'c'])
+        response = self.client.post('/api/v1/places_search'
+                                    '?order_by=price_by_night', json={})
+        self.assertEqual(response.status_code, 400)
+
+    def test_places_near(self):
+        """ /places_near lists places nearest first, with distances """
+        from models.place import Place
+        for name, lon in (('a', 3.5), ('b', 3.0), ('c', 4.0)):
+            Place(name=name, latitude=6.5, longitude=lon).save()
+        response = self.client.get('/api/v1/places_near?latitude=6.5'
+                                   '&longitude=3.4&limit=2'
+                                   '&fields=name,distance')
+        self.assertEqual([row['name'] for row in response.get_json()],
+                         ['a', 'b'])
+        self.assertAlmostEqual(response.get_json()[0]['distance'], 11.05,
+                               places=1)
+        response = self.client.get('/api/v1/places_near?latitude=6.5'
+                                   '&longitude=3.4&radius=50&fields=name')
+        self.assertEqual(response.get_json(), [{'name': 'a'},
+                                               {'name': 'b'}])
+        response = self.client.get('/api/v1/places_near?latitude=6.5'
+                                   '&longitude=3.4&radius=-1')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/v1/places_near?longitude=3.4')
+        self.assertEqual(response.get_json(),
+                         {'error': 'latitude must be a number'})
+
+
+@unittest.skipIf(os.getenv('HBNB_TYPE_STORAGE') != 'db', 'DBStorage test')
+class TestApiDB(unittest.TestCase):
+    """Test that the database's constraints are checked up front"""
+
+    def test_constraints(self):
+        """ Missing, null and dangling columns are refused with 400 """
+        client = app.test_client()
+        state = State(name='Lagos')
+        state.save()
+        try:
+            for method, path, body, error in (
+                    ('post', 'cities', {'name': 'Ikeja'},
+                     'Missing state_id'),
+                    ('post', 'cities', {'name': 'Ikeja', 'state_id': 'x'},
+                     'No State with id x'),
+                    ('put', 'states/' + state.id, {'name': None},
+                     'name cannot be null'),
+                    ('put', 'states/' + state.id, {'cities': []},
+                     'cities cannot be set')):
+                response = getattr(client, method)('/api/v1/' + path,
+                                                   json=body)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json(), {'error': error})
+        finally:
+            storage.delete(state)
+            storage.save()
+
+
+if __name__ == '__main__':
+    unittest.main()
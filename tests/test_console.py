@@ -51,6 +51,31 @@ class TestHBNBCommand(unittest.TestCase):
             self.assertIn("'age': 17", cout.getvalue().strip())
             self.assertIn("'height': 5.9", cout.getvalue().strip())
 
+    @unittest.skipIf(
+        os.getenv('HBNB_TYPE_STORAGE') == 'db', 'FileStorage test')
+    def test_fs_update(self):
+        """
+        Tests the update command with the FileStorage.
+        """
+        with patch('sys.stdout', new=StringIO()) as cout:
+            console = HBNBCommand()
+            console.onecmd('create City name="Ikeja" state_id="s1"')
+            model_id = cout.getvalue().strip()
+            clear_stream(cout)
+            console.onecmd('update City {} state_id "s2"'.format(model_id))
+            self.assertEqual([city.id for city in
+                              storage.lookup('City', 'state_id', 's2')],
+                             [model_id])
+            self.assertEqual(storage.lookup('City', 'state_id', 's1'), [])
+
+            console.onecmd('create State name="Lagos"')
+            model_id = cout.getvalue().strip()
+            clear_stream(cout)
+            console.onecmd('update State {} cities "x"'.format(model_id))
+            self.assertEqual(cout.getvalue().strip(),
+                             "** attribute can't be set **")
+        os.remove('file.json')
+
     @unittest.skipIf(
         os.getenv('HBNB_TYPE_STORAGE') != 'db', 'DBStorage test')
     def test_db_create(self):
@@ -170,6 +195,203 @@ class TestHBNBCommand(unittest.TestCase):
             cursor.close()
             db_connection.close()
 
+    @unittest.skipIf(
+        os.getenv('HBNB_TYPE_STORAGE') == 'db', 'FileStorage test')
+    def test_fs_transaction(self):
+        """
+        Tests begin, commit and rollback with the FileStorage.
+        """
+        if os.path.exists('file.json'):
+            os.remove('file.json')
+        with patch('sys.stdout', new=StringIO()) as cout, \
+                patch('sys.stderr', new=StringIO()) as cerr:
+            console = HBNBCommand()
+            console.onecmd('begin')
+            console.onecmd('create State name="Lagos"')
+            kept = cout.getvalue().strip()
+            self.assertFalse(os.path.exists('file.json'))
+            console.onecmd('commit')
+            self.assertIn('committed 1 command in', cerr.getvalue())
+            with open('file.json') as f:
+                self.assertIn('State.{}'.format(kept), json.load(f))
+
+            clear_stream(cout)
+            console.onecmd('begin')
+            console.onecmd('begin')
+            self.assertEqual(cout.getvalue().strip(),
+                             '** transaction already open **')
+            console.onecmd('create State name="Kano"')
+            dropped = cout.getvalue().split()[-1]
+            console.onecmd('destroy State {}'.format(kept))
+            console.onecmd('rollback')
+            self.assertIn('rolled back 2 commands', cerr.getvalue())
+            self.assertIsNone(storage.get('State', dropped))
+            self.assertIsNotNone(storage.get('State', kept))
+
+            clear_stream(cout)
+            console.onecmd('commit')
+            self.assertEqual(cout.getvalue().strip(),
+                             '** no transaction open **')
+        os.remove('file.json')
+
+    @unittest.skipIf(
+        os.getenv('HBNB_TYPE_STORAGE') == 'db', 'FileStorage test')
+    def test_fs_export_import(self):
+        """
+        Tests export and import with the FileStorage.
+        """
+        with patch('sys.stdout', new=StringIO()) as cout, \
+                patch('sys.stderr', new=StringIO()) as cerr:
+            console = HBNBCommand()
+            console.onecmd('create Amenity name="Wifi"')
+            wifi = cout.getvalue().strip()
+            console.onecmd('create Amenity name="Pool"')
+            clear_stream(cout)
+            console.onecmd('export Amenity fields=name')
+            self.assertEqual(
+                sorted(cout.getvalue().splitlines()),
+                ['{"name": "Pool"}', '{"name": "Wifi"}'])
+
+            try:
+                clear_stream(cout)
+                console.onecmd('export Amenity amenities.csv fields=id,name')
+                self.assertEqual(cout.getvalue().strip(), '2')
+                with open('amenities.csv') as f:
+                    self.assertEqual(f.readline().strip(), 'id,name')
+                console.onecmd('destroy Amenity {}'.format(wifi))
+                clear_stream(cout)
+                console.onecmd('import Amenity amenities.csv')
+                self.assertEqual(cout.getvalue().strip(), '2')
+                self.assertEqual(storage.get('Amenity', wifi).name, 'Wifi')
+
+                with open('amenities.ndjson', 'w') as f:
+                    f.write('{"name": "Gym"}\nnot json\n')
+                clear_stream(cout)
+                console.onecmd('import Amenity amenities.ndjson')
+                self.assertEqual(cout.getvalue().strip(), '1')
+                self.assertIn('** line 2 skipped **', cerr.getvalue())
+
+                with open('amenities.ndjson', 'w') as f:
+                    f.write('{"name": "Spa"}\n'
+                            '{"name": "Sauna", "created_at": "nope"}\n')
+                clear_stream(cout)
+                with patch.object(HBNBCommand, 'import_chunk', 1):
+                    console.onecmd('import Amenity amenities.ndjson')
+                self.assertEqual(cout.getvalue().strip(),
+                                 '** import failed, nothing saved **')
+                console.onecmd('create Amenity name="Bar"')
+                with open('file.json') as f:
+                    names = [obj['name'] for obj in json.load(f).values()]
+                self.assertIn('Bar', names)
+                self.assertNotIn('Spa', names)
+            finally:
+                for path in ('amenities.csv', 'amenities.ndjson',
+                             'file.json'):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+            clear_stream(cout)
+            console.onecmd('import Amenity')
+            self.assertEqual(cout.getvalue().strip(),
+                             '** file name missing **')
+            clear_stream(cout)
+            console.onecmd('export Nope')
+            self.assertEqual(cout.getvalue().strip(),
+                             "** class doesn't exist **")
+
+    @unittest.skipIf(
+        os.getenv('HBNB_TYPE_STORAGE') == 'db', 'FileStorage test')
+    def test_fs_import_transaction(self):
+        """
+        Tests that a failed import in a transaction leaves no rows to
+        commit, and that import waits for pending changes.
+        """
+        with open('states.ndjson', 'w') as f:
+            f.write('{"name": "Kano"}\n{"name": "Oyo"}\n'
+                    '{"name": "Ondo", "created_at": "nope"}\n')
+        try:
+            with patch('sys.stdout', new=StringIO()) as cout, \
+                    patch('sys.stderr', new=StringIO()), \
+                    patch.object(HBNBCommand, 'import_chunk', 1):
+                console = HBNBCommand()
+                console.onecmd('begin')
+                console.onecmd('import State states.ndjson')
+                self.assertEqual(cout.getvalue().strip(),
+                                 '** import failed, nothing saved **')
+                console.onecmd('create State name="Lagos"')
+                console.onecmd('commit')
+                self.assertEqual(
+                    sorted(state.name for state in
+                           storage.all('State').values()), ['Lagos'])
+
+                console.onecmd('begin')
+                console.onecmd('create State name="Eko"')
+                clear_stream(cout)
+                console.onecmd('import State states.ndjson')
+                self.assertEqual(cout.getvalue().strip(),
+                                 '** commit or rollback before import **')
+                console.onecmd('rollback')
+        finally:
+            for path in ('states.ndjson', 'file.json'):
+                if os.path.exists(path):
+                    os.remove(path)
+            for state in list(storage.all('State').values()):
+                storage.delete(state)
+
+    def test_precmd(self):
+        """
+        Tests that precmd rewrites the dot syntax in one pass.
+        """
+        console = HBNBCommand()
+        self.assertEqual(console.precmd('User.all()'), 'all User  ')
+        self.assertEqual(console.precmd('User.show("1234")'),
+                         'show User 1234 ')
+        self.assertEqual(
+            console.precmd('User.update("1234", "first_name", "John")'),
+            'update User 1234 "first_name" "John"')
+        self.assertEqual(
+            console.precmd('User.update("1234", {"age": 89})'),
+            'update User 1234 {"age": 89}')
+        self.assertEqual(console.precmd('User.nope()'), 'User.nope()')
+        self.assertEqual(console.precmd('show User 1234'), 'show User 1234')
+
+    def test_stats_off(self):
+        """
+        Tests the stats command without HBNB_METRICS.
+        """
+        with patch('sys.stdout', new=StringIO()) as cout:
+            HBNBCommand().onecmd('stats')
+            self.assertEqual(cout.getvalue().strip(),
+                             '** metrics are off, set HBNB_METRICS=1 **')
+
+    def test_parse_create(self):
+        """
+        Tests the parameters read by create.
+        """
+        self.assertEqual(
+            HBNBCommand.parse_create(
+                'Place name="My_house" rooms=4 lat=-1.5 bad=x'),
+            ('Place', {'name': 'My house', 'rooms': 4, 'lat': -1.5}))
+        self.assertEqual(HBNBCommand.parse_create(''), ('', {}))
+
+    def test_parse_update(self):
+        """
+        Tests the arguments read by update, without running any.
+        """
+        self.assertEqual(
+            HBNBCommand.parse_update('User 1234 "first name" "John Doe"'),
+            ('User', '1234', [('first name', 'John Doe')]))
+        self.assertEqual(HBNBCommand.parse_update('User 1234 age 89'),
+                         ('User', '1234', [('age', '89')]))
+        self.assertEqual(
+            HBNBCommand.parse_update("User 1234 {'age': 89, 'a': True}"),
+            ('User', '1234', [('age', 89), ('a', True)]))
+        self.assertEqual(
+            HBNBCommand.parse_update('User 1234 {"x": __import__("os")}'),
+            ('User', '1234', None))
+        self.assertEqual(HBNBCommand.parse_update('User'),
+                         ('User', '', [('', '')]))
+
 
 if __name__ == '__main__':
     unittest.main()
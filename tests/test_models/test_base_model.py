@@ -176,3 +176,14 @@ class TestBaseModel(unittest.TestCase):
         n = new.to_dict()
         new = BaseModel(**n)
         self.assertFalse(new.created_at == new.updated_at)
+
+    def test_from_dict(self):
+        """Test building an instance from a to_dict() dictionary."""
+        new = BaseModel(name='Lagos', number=3)
+        copy = BaseModel.from_dict(new.to_dict())
+        self.assertEqual(copy.to_dict(), new.to_dict())
+        self.assertEqual(str(copy), str(new))
+        copy = BaseModel.from_dict({'created_at': '2023-09-07T19:36:06'})
+        self.assertEqual(copy.created_at, datetime(2023, 9, 7, 19, 36, 6))
+        self.assertEqual(type(copy.id), str)
+        self.assertEqual(type(copy.updated_at), datetime)
@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+"""Module for testing the async storage of the ASGI pages"""
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+from models import storage
+from models.engine.async_storage import async_url
+from tests.test_models.test_engine.test_db_sqlite import SQLiteTestCase
+from tests.test_models.test_engine.test_serializers import has_module
+
+
+class TestAsyncUrl(unittest.TestCase):
+    """Test the driver swap of async_url()"""
+
+    def test_drivers(self):
+        """ Sync drivers are replaced by their asyncio counterparts """
+        self.assertEqual(
+            async_url('mysql+mysqldb://u:p@localhost/hbnb').drivername,
+            'mysql+aiomysql')
+        self.assertEqual(async_url('sqlite:///hbnb.db').drivername,
+                         'sqlite+aiosqlite')
+        self.assertEqual(async_url('mysql+asyncmy://u@h/db').drivername,
+                         'mysql+asyncmy')
+        self.assertEqual(async_url('sqlite+aiosqlite://').drivername,
+                         'sqlite+aiosqlite')
+
+
+@unittest.skipIf(os.getenv('HBNB_TYPE_STORAGE') == 'db',
+                 'fileStorage test not supported')
+class TestAsyncFileStorage(unittest.TestCase):
+    """Test FileStorage reads run through worker threads"""
+
+    def setUp(self):
+        """Start from an empty storage"""
+        storage.all().clear()
+        storage._reindex()
+
+    def tearDown(self):
+        """Remove the storage file"""
+        storage.all().clear()
+        storage._reindex()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_reads(self):
+        """ Every read gives what the FileStorage call gives """
+        from models.engine.async_storage import AsyncFileStorage, \
+            async_storage
+        from models.city import City
+        from models.state import State
+        state = State(name='Lagos')
+        state.save()
+        city = City(name='Ikeja', state_id=state.id)
+        city.save()
+        aio = async_storage(storage)
+        self.assertIsInstance(aio, AsyncFileStorage)
+
+        async def reads():
+            return (await aio.all(State), await aio.get(State, state.id),
+                    await aio.count(City),
+                    await aio.lookup(City, 'state_id', state.id),
+                    await aio.query(State, order_by='name'))
+
+        everything, got, count, cities, page = asyncio.run(reads())
+        self.assertEqual(everything, storage.all(State))
+        self.assertIs(got, state)
+        self.assertEqual(count, 1)
+        self.assertEqual(cities, [city])
+        self.assertEqual(page, [state])
+        self.assertEqual(aio.version(State), storage.version(State))
+
+
+@unittest.skipIf(not has_module('aiosqlite') or not has_module('greenlet'),
+                 'aiosqlite not installed')
+class TestAsyncDBStorage(SQLiteTestCase):
+    """Test DBStorage reads through the async engine"""
+
+    def test_reads(self):
+        """ The async engine sees what DBStorage wrote """
+        from models.engine.async_storage import AsyncDBStorage
+        from models.city import City
+        from models.state import State
+        state = State(name='Lagos')
+        self.storage.new(state)
+        self.storage.new(City(name='Ikeja', state_id=state.id))
+        self.storage.new(State(name='Abuja'))
+        self.storage.save()
+        url = 'sqlite:///' + os.path.join(self.dir, 'db')
+        with patch.dict(os.environ, {'HBNB_MYSQL_URL': url}):
+            aio = AsyncDBStorage(self.storage)
+
+        async def reads():
+            try:
+                got = await aio.get(State, state.id, load=('cities',))
+                return (len(await aio.all()), await aio.count(State),
+                        [s.name for s in await aio.query(
+                            State, order_by='name')],
+                        [c.name for c in got.cities])
+            finally:
+                await aio.close()
+                await aio.dispose()
+
+        self.assertEqual(asyncio.run(reads()),
+                         (3, 2, ['Abuja', 'Lagos'], ['Ikeja']))
+        self.assertEqual(aio.version(State), self.storage.version(State))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,298 @@
+#!/usr/bin/python3
+"""Module for testing DBStorage against SQLite"""
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from sqlalchemy.pool import QueuePool, StaticPool
+from models.engine.db_storage import DBStorage, engine_options
+
+
+class TestEngineOptions(unittest.TestCase):
+    """Test the engine settings read from HBNB_MYSQL_* variables"""
+
+    def test_defaults(self):
+        """ Without settings only pre-ping is turned on """
+        with patch.dict(os.environ, {}, clear=True):
+            options = engine_options('mysql+mysqldb://u:p@localhost/hbnb')
+        self.assertEqual(options, {'pool_pre_ping': True})
+
+    def test_pool_settings(self):
+        """ Pool variables map to create_engine arguments """
+        env = {
+            'HBNB_MYSQL_POOL_SIZE': '20',
+            'HBNB_MYSQL_MAX_OVERFLOW': '5',
+            'HBNB_MYSQL_POOL_RECYCLE': '3600',
+            'HBNB_MYSQL_POOL_TIMEOUT': '2.5',
+            'HBNB_MYSQL_CACHE_SIZE': '1000',
+        }
+        with patch.dict(os.environ, env, clear=True):
+            options = engine_options('sqlite:///hbnb.db')
+        self.assertEqual(options['pool_size'], 20)
+        self.assertEqual(options['max_overflow'], 5)
+        self.assertEqual(options['pool_recycle'], 3600)
+        self.assertEqual(options['pool_timeout'], 2.5)
+        self.assertEqual(options['query_cache_size'], 1000)
+        self.assertIs(options['poolclass'], QueuePool)
+        self.assertFalse(options['connect_args']['check_same_thread'])
+
+    def test_sqlite_memory(self):
+        """ An in-memory SQLite database keeps a single connection """
+        with patch.dict(os.environ, {'HBNB_MYSQL_POOL_SIZE': '20'},
+                        clear=True):
+            options = engine_options('sqlite://')
+        self.assertIs(options['poolclass'], StaticPool)
+        self.assertNotIn('pool_size', options)
+
+
+class TestPoolStats(unittest.TestCase):
+    """Test the pool statistics of a SQLite backed DBStorage"""
+
+    def setUp(self):
+        """Point DBStorage at a scratch SQLite file"""
+        self.dir = tempfile.mkdtemp()
+        env = {
+            'HBNB_MYSQL_URL': 'sqlite:///' + os.path.join(self.dir, 'db'),
+            'HBNB_MYSQL_POOL_SIZE': '3',
+            'HBNB_MYSQL_MAX_OVERFLOW': '1',
+        }
+        with patch.dict(os.environ, env):
+            self.storage = DBStorage()
+
+    def tearDown(self):
+        """Remove the scratch database"""
+        self.storage._DBStorage__engine.dispose()
+        shutil.rmtree(self.dir)
+
+    def test_pool_stats(self):
+        """ pool_stats() reports size and checked out connections """
+        stats = self.storage.pool_stats()
+        self.assertEqual(stats['class'], 'QueuePool')
+        self.assertEqual(stats['size'], 3)
+        self.assertEqual(stats['checkedout'], 0)
+        with self.storage._DBStorage__engine.connect():
+            self.assertEqual(self.storage.pool_stats()['checkedout'], 1)
+
+
+@unittest.skipIf(os.getenv('HBNB_TYPE_STORAGE') != 'db',
+                 'DB storage test not supported')
+class SQLiteTestCase(unittest.TestCase):
+    """Base for the tests that need mapped models and a database"""
+
+    def setUp(self):
+        """Point DBStorage at a scratch SQLite file"""
+        self.dir = tempfile.mkdtemp()
+        env = {
+            'HBNB_MYSQL_URL': 'sqlite:///' + os.path.join(self.dir, 'db'),
+            'HBNB_MYSQL_POOL_SIZE': '10',
+        }
+        with patch.dict(os.environ, env):
+            self.storage = DBStorage()
+        self.storage.reload()
+
+    def tearDown(self):
+        """Remove the scratch database"""
+        self.storage.close()
+        self.storage._DBStorage__engine.dispose()
+        shutil.rmtree(self.dir)
+
+
+class TestThreadedSessions(SQLiteTestCase):
+    """Test DBStorage used from many threads at once"""
+
+    def test_sessions_per_thread(self):
+        """ Each thread works with a session of its own """
+        sessions = []
+
+        def grab():
+            sessions.append(self.storage._DBStorage__session())
+            self.storage.close()
+
+        threads = [threading.Thread(target=grab) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(map(id, sessions))), 4)
+
+    def test_concurrent_writes_and_reads(self):
+        """ Threads creating and listing states do not interfere """
+        from models.state import State
+        errors = []
+
+        def work(n):
+            try:
+                for i in range(10):
+                    self.storage.new(State(name='S{}-{}'.format(n, i)))
+                    self.storage.save()
+                    self.storage.all(State)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                self.storage.close()
+
+        threads = [threading.Thread(target=work, args=(n,))
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.storage.count(State), 80)
+
+
+class TestQuery(SQLiteTestCase):
+    """Test the filtered, ordered and paged query() of DBStorage"""
+
+    def test_query(self):
+        """ query() pushes filters, order and paging into SQL """
+        from models.state import State
+        for name in ('d', 'b', 'a', 'c'):
+            self.storage.new(State(name=name))
+        self.storage.save()
+        page = self.storage.query(State, order_by='name', limit=2)
+        self.assertEqual([s.name for s in page], ['a', 'b'])
+        last = page[-1]
+        page = self.storage.query(State, order_by='name',
+                                  after=(last.name, last.id))
+        self.assertEqual([s.name for s in page], ['c', 'd'])
+        page = self.storage.query(State, order_by='-name', offset=1,
+                                  limit=1)
+        self.assertEqual([s.name for s in page], ['c'])
+        page = self.storage.query(State, {'name': 'b'})
+        self.assertEqual([s.name for s in page], ['b'])
+
+    def test_count_unknown(self):
+        """ count() of a class without a table is 0, as get() is None """
+        from models.state import State
+        self.storage.new(State(name='a'))
+        self.storage.save()
+        self.assertEqual(self.storage.count('State'), 1)
+        self.assertEqual(self.storage.count('BaseModel'), 0)
+        self.assertEqual(self.storage.count('Nope'), 0)
+
+    def test_state_cities(self):
+        """ State.cities lists the cities by name """
+        from models.city import City
+        from models.state import State
+        state = State(name='Lagos')
+        self.storage.new(state)
+        for name in ('Ikeja', 'Epe', 'Badagry'):
+            self.storage.new(City(name=name, state_id=state.id))
+        self.storage.save()
+        self.storage.close()
+        state = self.storage.get(State, state.id)
+        self.assertEqual([c.name for c in state.cities],
+                         ['Badagry', 'Epe', 'Ikeja'])
+
+    def test_iterate(self):
+        """ iterate() streams query() in batches from its own session """
+        from models.state import State
+        for name in ('d', 'b', 'a', 'c'):
+            self.storage.new(State(name=name))
+        self.storage.save()
+        rows = self.storage.iterate(State, order_by='name', batch=2)
+        first = next(rows)
+        self.storage.close()
+        self.assertEqual([first.name] + [s.name for s in rows],
+                         ['a', 'b', 'c', 'd'])
+
+    def test_search_places(self):
+        """ search_places() joins cities and place_amenity """
+        from models.amenity import Amenity
+        from models.city import City
+        from models.place import Place
+        from models.state import State
+        from models.user import User
+        user = User(email='a@b', password='c')
+        states = [State(name='A'), State(name='B')]
+        cities = [City(name='c', state_id=state.id) for state in states]
+        wifi, pool = Amenity(name='wifi'), Amenity(name='pool')
+        for obj in [user, wifi, pool] + states + cities:
+            self.storage.new(obj)
+        rows = [(cities[0], 10, 2, [wifi]), (cities[0], 50, 4, [wifi, pool]),
+                (cities[1], 100, 6, [pool]), (cities[1], 30, 1, [])]
+        for i, (city, price, guests, amenities) in enumerate(rows):
+            place = Place(name='p{}'.format(i), city_id=city.id,
+                          user_id=user.id, price_by_night=price,
+                          max_guest=guests)
+            place.amenities.extend(amenities)
+            self.storage.new(place)
+        self.storage.save()
+
+        def names(**filters):
+            return [p.name for p in self.storage.search_places(
+                order_by='name', **filters)]
+
+        self.assertEqual(names(states=[states[0].id]), ['p0', 'p1'])
+        self.assertEqual(names(states=[states[1].id], cities=[cities[0].id]),
+                         ['p0', 'p1', 'p2', 'p3'])
+        self.assertEqual(names(amenities=[wifi.id, pool.id]), ['p1'])
+        self.assertEqual(names(min_price=20, max_price=60), ['p1', 'p3'])
+        self.assertEqual(names(guests=4, amenities=[pool.id]), ['p1', 'p2'])
+        page = self.storage.search_places(order_by='-price_by_night',
+                                          limit=2, offset=1)
+        self.assertEqual([p.name for p in page], ['p1', 'p3'])
+
+    def test_nearby_places(self):
+        """ nearby_places() filters on a bounding box, then distance """
+        from models.place import Place
+        points = [('a', 0, 0), ('b', 0, 0.5), ('c', 0, 2), ('d', 0, 179.9),
+                  ('e', 0, -179.9), ('f', None, None)]
+        for name, lat, lon in points:
+            self.storage.new(Place(name=name, city_id='c', user_id='u',
+                                   latitude=lat, longitude=lon))
+        self.storage.save()
+
+        def names(*args):
+            return [p.name for gap, p in self.storage.nearby_places(*args)]
+
+        self.assertEqual(names(0, 0.1, 100), ['a', 'b'])
+        self.assertEqual(names(0, 180, 50), ['d', 'e'])
+        self.assertEqual(names(0, 1.9, None, 2), ['c', 'b'])
+        self.assertEqual(len(names(0, 0)), 5)
+        gap, place = self.storage.nearby_places(0, 0, None, 1)[0]
+        self.assertEqual((gap, place.name), (0, 'a'))
+
+
+class TestTransactions(SQLiteTestCase):
+    """Test begin(), commit() and rollback() of DBStorage"""
+
+    def test_commit_and_rollback(self):
+        """ Saves wait for commit(); rollback() drops them """
+        from models.state import State
+        self.storage.begin()
+        self.storage.new(State(name='kept'))
+        self.storage.save()
+        self.storage.begin()
+        self.storage.save()
+        self.storage.commit()
+        with self.storage._DBStorage__session.session_factory() as other:
+            self.assertEqual(other.query(State).count(), 0)
+        self.storage.commit()
+        self.storage.begin()
+        self.storage.new(State(name='dropped'))
+        self.storage.save()
+        self.storage.rollback()
+        self.storage.close()
+        self.assertEqual([s.name for s in self.storage.query(State)],
+                         ['kept'])
+
+    def test_commit_without_begin(self):
+        """ commit() without a begin() left open does nothing """
+        from models.state import State
+        self.storage.commit()
+        self.storage.begin()
+        self.storage.rollback()
+        self.storage.commit()
+        self.storage.new(State(name='saved'))
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual([s.name for s in self.storage.query(State)],
+                         ['saved'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 #!/usr/bin/python3
 """ Module for testing file storage"""
+import json
 import unittest
+from unittest.mock import patch
 from models.base_model import BaseModel
 from models import storage
 import os
@@ -18,6 +20,7 @@ class TestFileStorage(unittest.TestCase):
             del_list.append(key)
         for key in del_list:
             del storage._FileStorage__objects[key]
+        storage._reindex()
 
     def tearDown(self):
         """ Remove storage file at end of tests """
@@ -113,6 +116,552 @@ class TestFileStorage(unittest.TestCase):
             temp = key
         self.assertEqual(temp, 'BaseModel' + '.' + _id)
 
+    def test_all_by_class(self):
+        """ all(cls) returns only instances of cls, by class or name """
+        from models.state import State
+        state = State()
+        state.save()
+        BaseModel().save()
+        key = 'State.' + state.id
+        self.assertEqual(list(storage.all(State).keys()), [key])
+        self.assertEqual(list(storage.all('State').keys()), [key])
+
+    def test_lookup(self):
+        """ lookup() follows the foreign key index """
+        from models.city import City
+        from models.state import State
+        state = State()
+        state.save()
+        city = City(state_id=state.id)
+        city.save()
+        City(state_id='other').save()
+        self.assertEqual(storage.lookup(City, 'state_id', state.id), [city])
+        self.assertEqual(state.cities, [city])
+        City(name='b', state_id=state.id).save()
+        City(name='a', state_id=state.id).save()
+        self.assertEqual([c.name for c in state.cities], ['', 'a', 'b'])
+
+    def test_lookup_after_update(self):
+        """ Setting a foreign key moves the object in the index """
+        from models.city import City
+        city = City(state_id='old')
+        city.save()
+        city.state_id = 'new'
+        self.assertEqual(storage.lookup(City, 'state_id', 'old'), [])
+        self.assertEqual(storage.lookup(City, 'state_id', 'new'), [city])
+
+    def test_lookup_after_delete(self):
+        """ Deleted objects leave the indexes """
+        from models.review import Review
+        review = Review(place_id='p1')
+        review.save()
+        storage.delete(review)
+        self.assertEqual(storage.lookup(Review, 'place_id', 'p1'), [])
+        self.assertEqual(storage.all(Review), {})
+
+    def test_journal_save_appends(self):
+        """ Journaled save appends records instead of rewriting the file """
+        storage._FileStorage__journal = True
+        if os.path.exists('file.json'):
+            os.remove('file.json')
+        try:
+            first = BaseModel()
+            first.save()
+            self.assertFalse(os.path.exists('file.json'))
+            second = BaseModel()
+            second.save()
+            storage.delete(first)
+            storage.save()
+            with open('file.json.journal') as f:
+                ops = [json.loads(line)[0] for line in f]
+            self.assertEqual(ops, ['put', 'put', 'del'])
+
+            storage._FileStorage__objects.clear()
+            storage._reindex()
+            storage.reload()
+            self.assertEqual(list(storage.all().keys()),
+                             ['BaseModel.' + second.id])
+        finally:
+            del storage._FileStorage__journal
+            os.remove('file.json.journal')
+
+    def test_journal_compact(self):
+        """ Compaction folds the journal into the snapshot """
+        storage._FileStorage__journal = True
+        try:
+            new = BaseModel()
+            new.save()
+            storage.compact()
+            self.assertFalse(os.path.exists('file.json.journal'))
+            with open('file.json') as f:
+                self.assertIn('BaseModel.' + new.id, json.load(f))
+        finally:
+            del storage._FileStorage__journal
+
+    def test_lazy_reload(self):
+        """ Lazy reload builds instances only when they are asked for """
+        from models.city import City
+        from models.state import State
+        state = State()
+        state.save()
+        city = City(state_id=state.id)
+        city.save()
+        storage._FileStorage__objects.clear()
+        storage._reindex()
+        storage._FileStorage__lazy = True
+        try:
+            storage.reload()
+            self.assertEqual(len(storage._FileStorage__objects), 0)
+            cities = storage.lookup(City, 'state_id', state.id)
+            self.assertEqual([c.id for c in cities], [city.id])
+            self.assertEqual(len(storage._FileStorage__objects), 1)
+            storage.save()
+            self.assertIn('State.' + state.id, storage.all(State))
+            self.assertEqual(len(storage.all()), 2)
+        finally:
+            del storage._FileStorage__lazy
+
+    def test_compact_reload(self):
+        """ Compact reload keeps unbuilt objects as Records """
+        from models.engine.records import Record
+        from models.state import State
+        state = State(name='Lagos')
+        state.save()
+        storage._FileStorage__objects.clear()
+        storage._reindex()
+        storage._FileStorage__compact = True
+        try:
+            storage.reload()
+            pending = storage._FileStorage__pending['State']
+            self.assertIs(type(pending['State.' + state.id]), Record)
+            storage.compact()
+            with open('file.json') as f:
+                self.assertEqual(f.read().count(state.id), 2)
+            loaded = storage.get(State, state.id)
+            self.assertEqual(loaded.to_dict(), state.to_dict())
+        finally:
+            del storage._FileStorage__compact
+
+    def test_get(self):
+        """ get() returns the instance by class and id, or None """
+        new = BaseModel()
+        new.save()
+        self.assertIs(storage.get(BaseModel, new.id), new)
+        self.assertIs(storage.get('BaseModel', new.id), new)
+        self.assertIsNone(storage.get('BaseModel', 'missing'))
+        self.assertIsNone(storage.get('User', new.id))
+
+    def test_count(self):
+        """ count() returns the number of objects, by class or in total """
+        from models.state import State
+        BaseModel().save()
+        BaseModel().save()
+        State().save()
+        self.assertEqual(storage.count(BaseModel), 2)
+        self.assertEqual(storage.count('State'), 1)
+        self.assertEqual(storage.count('City'), 0)
+        self.assertEqual(storage.count(), 3)
+
+    def test_save_atomic(self):
+        """ save() replaces the file through a temporary copy """
+        storage._FileStorage__fsync = 'always'
+        try:
+            new = BaseModel()
+            new.save()
+        finally:
+            del storage._FileStorage__fsync
+        self.assertFalse(os.path.exists('file.json.tmp'))
+        with open('file.json') as f:
+            self.assertIn('BaseModel.' + new.id, json.load(f))
+
+    def test_save_reuses_encoding(self):
+        """ save() only serializes the objects changed since last time """
+        objs = [BaseModel() for i in range(5)]
+        storage.bulk_new(objs)
+        storage.save()
+        objs[0].name = 'changed'
+        with patch.object(BaseModel, 'to_dict', autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            storage.save()
+        self.assertEqual(to_dict.call_count, 1)
+        with open('file.json') as f:
+            saved = json.load(f)
+        self.assertEqual(len(saved), 5)
+        self.assertEqual(saved['BaseModel.' + objs[0].id]['name'],
+                         'changed')
+        storage.delete(objs[1])
+        BaseModel().save()
+        with open('file.json') as f:
+            saved = json.load(f)
+        self.assertEqual(len(saved), 5)
+        self.assertNotIn('BaseModel.' + objs[1].id, saved)
+
+    def test_changed_in_place(self):
+        """ changed(obj) saves and indexes a change made behind setattr """
+        from models.city import City
+        city = City(name='a', state_id='s1')
+        city.save()
+        city.__dict__.update(name='b', state_id='s2')
+        storage.changed(city)
+        storage.save()
+        with open('file.json') as f:
+            self.assertEqual(json.load(f)['City.' + city.id]['name'], 'b')
+        self.assertEqual(storage.lookup(City, 'state_id', 's2'), [city])
+        self.assertEqual(storage.lookup(City, 'state_id', 's1'), [])
+
+    def test_setattr_marks_dirty(self):
+        """ Setting an attribute queues the object for a journaled save """
+        storage._FileStorage__journal = True
+        try:
+            new = BaseModel()
+            new.save()
+            new.name = 'changed'
+            storage.save()
+            with open('file.json.journal') as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual(records[-1][2]['name'], 'changed')
+        finally:
+            del storage._FileStorage__journal
+            os.remove('file.json.journal')
+
+    def test_background_save(self):
+        """ Background saves reach the disk once flush() returns """
+        storage._FileStorage__background = True
+        try:
+            objs = [BaseModel() for i in range(20)]
+            for obj in objs:
+                obj.save()
+            storage.flush()
+        finally:
+            del storage._FileStorage__background
+        with open('file.json') as f:
+            saved = json.load(f)
+        for obj in objs:
+            self.assertIn('BaseModel.' + obj.id, saved)
+
+    def test_bulk_new(self):
+        """ bulk_new() adds every object and leaves saving to the caller """
+        objs = [BaseModel() for i in range(5)]
+        storage.bulk_new(objs)
+        self.assertEqual(storage.count(BaseModel), 5)
+        self.assertFalse(os.path.exists('file.json'))
+        storage.save()
+        with open('file.json') as f:
+            self.assertEqual(len(json.load(f)), 5)
+
+    def test_batch(self):
+        """ Saves inside batch() are written once, when the block exits """
+        with storage.batch():
+            for i in range(5):
+                BaseModel().save()
+            with storage.batch():
+                BaseModel().save()
+            self.assertFalse(os.path.exists('file.json'))
+        with open('file.json') as f:
+            self.assertEqual(len(json.load(f)), 6)
+
+    def test_batch_error(self):
+        """ Nothing is written when a batch() block raises """
+        with self.assertRaises(KeyError):
+            with storage.batch():
+                BaseModel().save()
+                raise KeyError
+        self.assertFalse(os.path.exists('file.json'))
+
+    def test_batch_error_dropped(self):
+        """ Objects made in a batch() block that raised are not saved """
+        with self.assertRaises(KeyError):
+            with storage.batch():
+                dropped = BaseModel()
+                dropped.save()
+                raise KeyError
+        self.assertIsNone(storage.get(BaseModel, dropped.id))
+        kept = BaseModel()
+        kept.save()
+        with open('file.json') as f:
+            self.assertEqual(list(json.load(f)), ['BaseModel.' + kept.id])
+
+    def test_close_unchanged(self):
+        """ close() does not read the file again when it did not change """
+        BaseModel().save()
+        with patch.object(storage, 'reload') as reload:
+            storage.close()
+            storage.close()
+        reload.assert_not_called()
+
+    def test_close_changed(self):
+        """ close() reloads when another process rewrote the file """
+        BaseModel().save()
+        other = {'BaseModel.x': {'__class__': 'BaseModel', 'id': 'x'}}
+        with open('file.json', 'w') as f:
+            json.dump(other, f)
+            f.write(' ' * 10)
+        storage.close()
+        self.assertIsNotNone(storage.get('BaseModel', 'x'))
+
+    def test_reload_in_place(self):
+        """ reload() replaces stored objects without resizing all() """
+        for i in range(3):
+            BaseModel().save()
+        for key in storage.all():
+            storage.reload()
+        self.assertEqual(storage.count(BaseModel), 3)
+
+    def test_close_journal_tail(self):
+        """ close() only replays the journal records it has not seen """
+        storage._FileStorage__journal = True
+        try:
+            BaseModel().save()
+            storage.close()
+            record = ['put', 'BaseModel.y', {'__class__': 'BaseModel',
+                                             'id': 'y'}]
+            with open('file.json.journal', 'a') as f:
+                f.write(json.dumps(record) + '\n')
+            with patch.object(storage, 'reload') as reload:
+                storage.close()
+            reload.assert_not_called()
+            self.assertIsNotNone(storage.get('BaseModel', 'y'))
+        finally:
+            del storage._FileStorage__journal
+            os.remove('file.json.journal')
+
+    def test_journal_torn_tail(self):
+        """ A save after a torn journal record is read back on reload """
+        storage._FileStorage__journal = True
+        try:
+            first = BaseModel()
+            first.save()
+            with open('file.json.journal', 'a') as f:
+                f.write('["put", "BaseModel.torn", {"__cla')
+            storage._FileStorage__objects.clear()
+            storage._reindex()
+            storage.reload()
+            second = BaseModel()
+            second.save()
+            storage._FileStorage__objects.clear()
+            storage._reindex()
+            storage.reload()
+            self.assertEqual(sorted(storage.all().keys()),
+                             sorted(['BaseModel.' + first.id,
+                                     'BaseModel.' + second.id]))
+        finally:
+            del storage._FileStorage__journal
+            os.remove('file.json.journal')
+
+    def test_query(self):
+        """ query() filters, orders and pages """
+        from models.city import City
+        for name in ('d', 'b', 'a', 'c'):
+            City(name=name, state_id='s1').save()
+        City(name='e', state_id='s2').save()
+        names = [c.name for c in storage.query(
+            City, {'state_id': 's1'}, order_by='name')]
+        self.assertEqual(names, ['a', 'b', 'c', 'd'])
+        names = [c.name for c in storage.query(
+            City, order_by='-name', limit=2, offset=1)]
+        self.assertEqual(names, ['d', 'c'])
+        names = [c.name for c in storage.query(City, {'name': 'e'})]
+        self.assertEqual(names, ['e'])
+
+    def test_query_keyset(self):
+        """ query() resumes after the last row of the previous page """
+        from models.city import City
+        for name in ('d', 'b', 'a', 'c'):
+            City(name=name).save()
+        page = storage.query(City, order_by='name', limit=2)
+        self.assertEqual([c.name for c in page], ['a', 'b'])
+        last = page[-1]
+        page = storage.query(City, order_by='name', limit=2,
+                             after=(last.name, last.id))
+        self.assertEqual([c.name for c in page], ['c', 'd'])
+
+    def test_begin_commit(self):
+        """ Saves between begin() and commit() are written at commit """
+        storage.begin()
+        BaseModel().save()
+        BaseModel().save()
+        self.assertFalse(os.path.exists('file.json'))
+        storage.commit()
+        with open('file.json') as f:
+            self.assertEqual(len(json.load(f)), 2)
+
+    def test_rollback(self):
+        """ rollback() drops unsaved changes and ends begin() """
+        kept = BaseModel()
+        kept.save()
+        storage.begin()
+        dropped = BaseModel()
+        dropped.save()
+        storage.delete(storage.get(BaseModel, kept.id))
+        storage.save()
+        storage.rollback()
+        self.assertIsNone(storage.get(BaseModel, dropped.id))
+        self.assertIsNotNone(storage.get(BaseModel, kept.id))
+        self.assertEqual(storage.count(BaseModel), 1)
+        BaseModel().save()
+        with open('file.json') as f:
+            self.assertEqual(len(json.load(f)), 2)
+
+    def test_iterate(self):
+        """ iterate() yields what query() returns """
+        from models.city import City
+        for name in ('b', 'a', 'c'):
+            City(name=name).save()
+        rows = storage.iterate(City, order_by='name', limit=2, batch=1)
+        self.assertNotIsInstance(rows, list)
+        self.assertEqual([c.name for c in rows], ['a', 'b'])
+
+    def test_iterate_compact(self):
+        """ iterate() yields unbuilt objects without keeping them """
+        from models.city import City
+        cities = [City(name=name) for name in ('b', 'a')]
+        for city in cities:
+            city.save()
+        ids = sorted(city.id for city in cities)
+        storage._FileStorage__objects.clear()
+        storage._reindex()
+        storage._FileStorage__compact = True
+        try:
+            storage.reload()
+            cities = list(storage.iterate(City))
+            self.assertEqual([c.id for c in cities], ids)
+            self.assertTrue(all(type(c) is City for c in cities))
+            self.assertEqual(len(storage._FileStorage__pending['City']), 2)
+            self.assertEqual(len(storage.all(City)), 2)
+        finally:
+            del storage._FileStorage__compact
+
+    def test_iterate_order_by_time(self):
+        """ iterate() orders built and unbuilt objects by timestamp """
+        from models.city import City
+        cities = [City(name=name) for name in ('b', 'a', 'c')]
+        for city in cities:
+            city.save()
+        ids = [city.id for city in cities]
+        for mode in ('_FileStorage__lazy', '_FileStorage__compact'):
+            storage._FileStorage__objects.clear()
+            storage._reindex()
+            setattr(storage, mode, True)
+            try:
+                storage.reload()
+                # one built instance among the unbuilt ones
+                storage.get(City, ids[1])
+                for order_by in ('created_at', '-updated_at'):
+                    rows = storage.iterate(City, order_by=order_by)
+                    self.assertEqual(
+                        [c.id for c in rows],
+                        ids if order_by == 'created_at' else ids[::-1])
+            finally:
+                # build the rest, leaving nothing pending
+                storage.all(City)
+                delattr(storage, mode)
+
+    def test_search_places(self):
+        """ search_places() matches a plain scan, as places change """
+        import random
+        from models.city import City
+        from models.place import Place
+        rand = random.Random(1)
+        cities = [City(state_id=state) for state in ('s1', 's1', 's2')]
+        for city in cities:
+            city.save()
+        places = [Place(city_id=rand.choice(cities).id,
+                        price_by_night=rand.randint(1, 20),
+                        max_guest=rand.randint(1, 4),
+                        amenity_ids=rand.sample(['a', 'b', 'c'], 2))
+                  for i in range(200)]
+        storage.bulk_new(places)
+        searches = [
+            {}, {'states': ['s1']}, {'cities': [cities[2].id]},
+            {'amenities': ['a']}, {'amenities': ['a', 'b']},
+            {'min_price': 5, 'max_price': 9}, {'guests': 3},
+            {'states': ['s2'], 'amenities': ['c'], 'max_price': 10},
+        ]
+
+        def scan(states=(), cities=(), amenities=(), min_price=1,
+                 max_price=20, guests=1):
+            city_ids = set(cities) | {c.id for c in storage.all(City)
+                                      .values() if c.state_id in states}
+            return [p for p in places
+                    if (not city_ids or p.city_id in city_ids) and
+                    set(amenities) <= set(p.amenity_ids) and
+                    min_price <= p.price_by_night <= max_price and
+                    p.max_guest >= guests]
+
+        for step in range(3):
+            for filters in searches:
+                found = storage.search_places(
+                    order_by='-price_by_night', limit=7, offset=2,
+                    **filters)
+                expected = sorted(scan(**filters), reverse=True, key=lambda
+                                  p: (p.price_by_night, p.id))[2:9]
+                self.assertEqual(found, expected)
+                found = storage.search_places(**filters)
+                self.assertEqual(found, sorted(scan(**filters),
+                                               key=lambda p: p.id))
+            # change places under the indexes built by the searches
+            for place in rand.sample(places, 20):
+                place.price_by_night = rand.randint(1, 20)
+                place.amenity_ids = rand.sample(['a', 'b', 'c'], 2)
+            storage.delete(places.pop())
+
+    def test_nearby_places(self):
+        """ nearby_places() matches a scan as places move and go """
+        import random
+        from models.engine.geo import distance
+        from models.place import Place
+        rand = random.Random(2)
+        places = [Place(latitude=rand.uniform(-5, 5),
+                        longitude=rand.choice([-179.8, 0, 179.8]) +
+                        rand.uniform(-1, 1)) for i in range(300)]
+        storage.bulk_new(places)
+        storage.new(Place())
+
+        def scan(lat, lon, radius=None, limit=None):
+            rows = sorted((distance(lat, lon, p.latitude, p.longitude), p.id)
+                          for p in places)
+            if radius is not None:
+                rows = [row for row in rows if row[0] <= radius]
+            return [row[1] for row in rows[:limit]]
+
+        for step in range(3):
+            for lat, lon, radius, limit in ((0, 0, 150, None),
+                                            (1, 180, 200, None),
+                                            (3, -179, None, 5),
+                                            (0, 90, None, 3)):
+                found = storage.nearby_places(lat, lon, radius, limit)
+                self.assertEqual([p.id for gap, p in found],
+                                 scan(lat, lon, radius, limit))
+            for place in rand.sample(places, 30):
+                place.latitude = rand.uniform(-5, 5)
+                place.longitude = rand.uniform(-180, 180)
+            storage.delete(places.pop())
+
+    def test_place_amenities(self):
+        """ Place.amenities follows amenity_ids """
+        from models.amenity import Amenity
+        from models.place import Place
+        wifi = Amenity(name='wifi')
+        wifi.save()
+        place = Place()
+        place.save()
+        place.amenities = wifi
+        place.amenities = wifi
+        self.assertEqual(place.amenity_ids, [wifi.id])
+        self.assertEqual(place.amenities, [wifi])
+        self.assertEqual(Place().amenity_ids, [])
+        self.assertEqual(storage.lookup(Place, 'amenity_ids', wifi.id),
+                         [place])
+
+    def test_place_user(self):
+        """ Place.user is the User of user_id """
+        from models.place import Place
+        from models.user import User
+        owner = User(email='a@b.c', password='pwd')
+        owner.save()
+        self.assertIs(Place(user_id=owner.id).user, owner)
+        self.assertIsNone(Place(user_id='nope').user)
+
     def test_storage_var_created(self):
         """ FileStorage object storage created """
         # Ensure that a FileStorage object is created in the storage module
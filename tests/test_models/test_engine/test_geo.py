@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""Unit tests for the geometry of storage.nearby_places()"""
+import unittest
+from models.engine.geo import bounding_box, distance, nearby
+
+
+class TestGeo(unittest.TestCase):
+    """Test distances, bounding boxes and the growing search"""
+
+    def test_distance(self):
+        """ Distances are great-circle kilometres """
+        self.assertAlmostEqual(distance(0, 0, 0, 1), 111.195, places=2)
+        self.assertAlmostEqual(distance(0, 179.5, 0, -179.5), 111.195,
+                               places=2)
+        self.assertAlmostEqual(distance(90, 0, 90, 120), 0)
+        # Lagos to Abuja
+        self.assertAlmostEqual(distance(6.5244, 3.3792, 9.0765, 7.3986),
+                               525, delta=5)
+
+    def test_bounding_box(self):
+        """ Boxes split at the 180th meridian and open at the poles """
+        low, high, spans = bounding_box(0, 0, 111.195)
+        self.assertAlmostEqual(low, -1, places=3)
+        self.assertAlmostEqual(high, 1, places=3)
+        self.assertEqual(len(spans), 1)
+        low, high, spans = bounding_box(0, 179.9, 111.195)
+        self.assertEqual(len(spans), 2)
+        self.assertAlmostEqual(spans[0][0], 178.9, places=3)
+        self.assertAlmostEqual(spans[1][1], -179.1, places=3)
+        self.assertEqual(bounding_box(89.5, 10, 100)[2], [(-180.0, 180.0)])
+
+    def test_nearby(self):
+        """ The circle grows until it holds limit items """
+        points = [(0, i, str(i), i) for i in range(10)]
+        boxes = []
+
+        def within(box):
+            boxes.append(box)
+            return iter(points)
+
+        rows = nearby(within, 0, 4.2, limit=3)
+        self.assertEqual([item for gap, item in rows], [4, 5, 3])
+        self.assertGreater(len(boxes), 1)
+        rows = nearby(within, 0, 0, radius=120)
+        self.assertEqual([item for gap, item in rows], [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""Unit tests for the storage metrics"""
+import os
+import unittest
+from models import storage
+from models.engine.metrics import Metrics, class_name, instrument, metrics
+
+
+class TestMetrics(unittest.TestCase):
+    """Test the counters, histograms and instrumentation"""
+
+    def test_render(self):
+        """ Calls land in cumulative buckets of the Prometheus text """
+        recorded = Metrics(True)
+        recorded.observe('all', 'State', 0.0002)
+        recorded.observe('all', 'State', 0.003)
+        recorded.built('State', 2)
+        recorded.wrote(120)
+        text = recorded.render()
+        self.assertIn('hbnb_storage_seconds_bucket{operation="all",'
+                      'class="State",le="0.0001"} 0', text)
+        self.assertIn('hbnb_storage_seconds_bucket{operation="all",'
+                      'class="State",le="0.00025"} 1', text)
+        self.assertIn('hbnb_storage_seconds_bucket{operation="all",'
+                      'class="State",le="+Inf"} 2', text)
+        self.assertIn('hbnb_storage_seconds_count{operation="all",'
+                      'class="State"} 2', text)
+        self.assertIn('hbnb_storage_objects_materialized_total'
+                      '{class="State"} 2', text)
+        self.assertIn('hbnb_storage_written_bytes_total 120', text)
+        self.assertEqual(recorded.summary(),
+                         [('all', 'State', 2, 0.0032, 0.003)])
+        recorded.reset()
+        self.assertEqual(recorded.summary(), [])
+
+    def test_class_name(self):
+        """ Calls are labelled with the class they work on """
+        from models.state import State
+        self.assertEqual(class_name('all', (State,)), 'State')
+        self.assertEqual(class_name('get', ('City', '1234')), 'City')
+        self.assertEqual(class_name('new', (State(),)), 'State')
+        self.assertEqual(class_name('all', ()), '')
+        self.assertEqual(class_name('delete', (None,)), '')
+
+    def test_instrument(self):
+        """ instrument() wraps each operation once and times it """
+        class Store:
+            def all(self, cls=None):
+                return {}
+
+            def save(self):
+                raise OSError
+
+        instrument(Store())
+        instrument(Store())
+        store = Store()
+        metrics.reset()
+        store.all('State')
+        with self.assertRaises(OSError):
+            store.save()
+        self.assertEqual([row[:3] for row in metrics.summary()],
+                         [('all', 'State', 1), ('save', '', 1)])
+        metrics.reset()
+
+    @unittest.skipIf(os.getenv('HBNB_TYPE_STORAGE') == 'db',
+                     'FileStorage test')
+    def test_file_storage(self):
+        """ FileStorage counts the bytes it writes and objects it builds """
+        from models.state import State
+        enabled = metrics.enabled
+        metrics.enabled = True
+        metrics.reset()
+        try:
+            State(name='Lagos').save()
+            self.assertEqual(metrics.written, os.path.getsize('file.json'))
+            storage.all().clear()
+            storage._reindex()
+            storage.reload()
+            self.assertEqual(metrics.materialized, {'State': 1})
+        finally:
+            metrics.enabled = enabled
+            metrics.reset()
+            storage.all().clear()
+            storage._reindex()
+            os.remove('file.json')
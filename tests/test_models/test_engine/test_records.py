@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+"""Module for testing the compact Record form"""
+import unittest
+from models.engine.records import Record
+from models.state import State
+
+
+class TestRecord(unittest.TestCase):
+    """Test packing and unpacking records"""
+
+    def test_round_trip(self):
+        """to_dict() gives back the dictionary the record was made from"""
+        val = State(name='Lagos').to_dict()
+        record = Record(val)
+        self.assertEqual(record.to_dict(), val)
+        self.assertEqual(type(record.uid), bytes)
+        self.assertEqual(type(record.created), int)
+        self.assertEqual(record.get('name'), 'Lagos')
+        self.assertEqual(record.get('id'), val['id'])
+        self.assertEqual(record.get('created_at'), val['created_at'])
+        self.assertEqual(record.get('updated_at'), val['updated_at'])
+        self.assertIsNone(Record({'__class__': 'State', 'id': '1'}).get(
+            'created_at'))
+        self.assertIsNone(record.get('missing'))
+
+    def test_odd_values(self):
+        """Values that do not pack exactly are kept as they came"""
+        val = {'__class__': 'State', 'id': '1',
+               'created_at': '2023-09-07T19:36:06+01:00',
+               'updated_at': '2023-09-07T19:36:06'}
+        self.assertEqual(Record(val).to_dict(), val)
+        val['id'] = '0D9B0AF1-3C5E-4D8A-9C1B-2E3F4A5B6C7D'
+        self.assertEqual(Record(val).to_dict(), val)
+
+    def test_shared_shapes(self):
+        """Records with the same attributes share one names tuple"""
+        one = Record(State(name='Lagos').to_dict())
+        two = Record(State(name='Abuja').to_dict())
+        self.assertIs(one.names, two.names)
+        self.assertFalse(hasattr(one, '__dict__'))
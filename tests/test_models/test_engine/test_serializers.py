@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+"""Module for testing the FileStorage serializers"""
+import os
+import unittest
+from models.engine.serializers import get_serializer, convert
+
+
+def has_module(name):
+    """Returns True if the module called name can be imported"""
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+class TestSerializers(unittest.TestCase):
+    """Test the serializers and the converter"""
+
+    data = {
+        'State.1': {'__class__': 'State', 'id': '1', 'name': 'Lagos',
+                    'created_at': '2023-09-07T19:36:06.000001'},
+        'City.2': {'__class__': 'City', 'id': '2', 'state_id': '1'},
+    }
+
+    def tearDown(self):
+        """Remove the files written by the tests"""
+        for path in ('test.json', 'test.pickle', 'test.msgpack'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def round_trip(self, name):
+        """Writes data in the format called name and reads it back"""
+        serializer = get_serializer(name)
+        path = 'test.' + serializer.extension
+        with open(path, 'wb' if serializer.binary else 'w') as f:
+            serializer.dump(self.data, f)
+        with open(path, 'rb' if serializer.binary else 'r') as f:
+            self.assertEqual(serializer.load(f), self.data)
+        with open(path, 'wb' if serializer.binary else 'w') as f:
+            serializer.dump_encoded([serializer.encode(key, val) for
+                                     key, val in self.data.items()], f)
+        with open(path, 'rb' if serializer.binary else 'r') as f:
+            self.assertEqual(serializer.load(f), self.data)
+        record = ['put', 'City.2', self.data['City.2']]
+        line = serializer.dumps_line(record)
+        self.assertNotIn('\n', line)
+        self.assertEqual(serializer.loads_line(line), record)
+
+    def test_json(self):
+        """ json round trip """
+        self.round_trip('json')
+
+    @unittest.skipIf(not has_module('orjson'), 'orjson not installed')
+    def test_orjson(self):
+        """ orjson round trip """
+        self.round_trip('orjson')
+
+    @unittest.skipIf(not has_module('msgpack'), 'msgpack not installed')
+    def test_msgpack(self):
+        """ msgpack round trip """
+        self.round_trip('msgpack')
+
+    def test_pickle(self):
+        """ pickle round trip """
+        self.round_trip('pickle')
+
+    def test_unknown(self):
+        """ Unknown formats are refused """
+        with self.assertRaises(ValueError):
+            get_serializer('yaml')
+
+    def test_empty_pickle(self):
+        """ An empty binary file reads as a ValueError, like json """
+        open('test.pickle', 'wb').close()
+        with open('test.pickle', 'rb') as f:
+            with self.assertRaises(ValueError):
+                get_serializer('pickle').load(f)
+
+    def test_convert(self):
+        """ convert() moves a file from one format to another """
+        with open('test.json', 'w') as f:
+            get_serializer('json').dump(self.data, f)
+        self.assertEqual(convert('test.json', 'test.pickle'), 2)
+        self.assertEqual(convert('test.pickle', 'test.json'), 2)
+        with open('test.json') as f:
+            self.assertEqual(get_serializer('json').load(f), self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
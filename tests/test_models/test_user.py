@@ -37,3 +37,9 @@ class TestUser(TestBaseModel):
         """Test the data type of password attribute"""
         new = self.value()
         self.assertEqual(type(new.password), self.type_condition)
+
+    def test_from_dict_password(self):
+        """Test that from_dict() still hashes the password"""
+        new = User.from_dict({"password": "pwd"})
+        self.assertEqual(new.password, User(password="pwd").password)
+        self.assertNotIn('password', new.__dict__)
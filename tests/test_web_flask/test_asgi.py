@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""Unit tests for the ASGI variant of the web_flask pages"""
+import asyncio
+import importlib
+import os
+import unittest
+from models import storage
+from models.city import City
+from models.state import State
+from tests.test_models.test_engine.test_serializers import has_module
+from web_flask.cache import cache
+
+
+@unittest.skipIf(not has_module('quart'), 'quart not installed')
+@unittest.skipIf(os.getenv('HBNB_TYPE_STORAGE') == 'db',
+                 'FileStorage test')
+class TestAsgiPages(unittest.TestCase):
+    """Test the ASGI pages against the Flask ones"""
+
+    def setUp(self):
+        """Store a state with two cities, with the cache on"""
+        cache.clear()
+        self.ttl, cache.ttl = cache.ttl, 60
+        self.state = State(name='Lagos')
+        self.state.save()
+        City(name='Ikeja', state_id=self.state.id).save()
+        City(name='Epe', state_id=self.state.id).save()
+
+    def tearDown(self):
+        """Remove the storage file"""
+        cache.ttl = self.ttl
+        storage.all().clear()
+        storage._reindex()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def fetch(self, path, headers=None):
+        """Returns the status and body of the ASGI app's answer"""
+        from web_flask.asgi import app
+
+        async def get():
+            response = await app.test_client().get(path, headers=headers)
+            return response.status_code, await response.get_data(
+                as_text=True), response.headers.get('ETag')
+
+        return asyncio.run(get())
+
+    def test_same_pages(self):
+        """ Every page renders as it does in its Flask app """
+        pages = {
+            '/states_list': '7-states_list',
+            '/cities_by_states': '8-cities_by_states',
+            '/states': '9-states',
+            '/states/' + self.state.id: '9-states',
+            '/hbnb_filters': '10-hbnb_filters',
+        }
+        for path, module in pages.items():
+            app = importlib.import_module('web_flask.' + module).app
+            expected = app.test_client().get(path).get_data(as_text=True)
+            status, body, etag = self.fetch(path)
+            self.assertEqual(status, 200)
+            self.assertEqual(body, expected)
+        self.assertIn('Ikeja', body)
+
+    def test_conditional(self):
+        """ Unchanged pages revalidate to 304 """
+        status, body, etag = self.fetch('/states_list')
+        status, body, etag = self.fetch('/states_list',
+                                        {'If-None-Match': etag})
+        self.assertEqual(status, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
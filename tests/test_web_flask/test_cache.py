@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+"""Unit tests for the web_flask page cache"""
+import importlib
+import json
+import os
+import time
+import unittest
+from models import storage
+from models.state import State
+from web_flask.cache import PageCache, cache
+
+
+class TestPageCache(unittest.TestCase):
+    """Test the LRU and TTL behaviour of PageCache"""
+
+    def test_hit_and_version_miss(self):
+        """ A page is served until the versions it was built for change """
+        pages = PageCache()
+        pages.put('/a', (1,), 'body')
+        self.assertEqual(pages.get('/a', (1,))['body'], 'body')
+        self.assertIsNone(pages.get('/a', (2,)))
+        self.assertIsNone(pages.get('/a', (1,)))
+
+    def test_ttl(self):
+        """ Pages expire after ttl seconds """
+        pages = PageCache(ttl=0.01)
+        pages.put('/a', (), 'body')
+        time.sleep(0.02)
+        self.assertIsNone(pages.get('/a', ()))
+
+    def test_lru(self):
+        """ The least recently used page is evicted first """
+        pages = PageCache(size=2)
+        pages.put('/a', (), 'a')
+        pages.put('/b', (), 'b')
+        pages.get('/a', ())
+        pages.put('/c', (), 'c')
+        self.assertIsNone(pages.get('/b', ()))
+        self.assertIsNotNone(pages.get('/a', ()))
+        self.assertIsNotNone(pages.get('/c', ()))
+
+
+@unittest.skipIf(os.getenv('HBNB_TYPE_STORAGE') == 'db',
+                 'FileStorage test')
+class TestCachedPage(unittest.TestCase):
+    """Test a web_flask view served through the cache"""
+
+    def setUp(self):
+        """Start from an empty, enabled cache and a test client"""
+        cache.clear()
+        self.ttl, cache.ttl = cache.ttl, 60
+        app = importlib.import_module('web_flask.7-states_list').app
+        self.client = app.test_client()
+
+    def tearDown(self):
+        """Remove the storage file"""
+        cache.ttl = self.ttl
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_etag_and_invalidation(self):
+        """ Unchanged pages revalidate to 304, new states re-render """
+        first = self.client.get('/states_list')
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers['ETag']
+        again = self.client.get('/states_list',
+                                headers={'If-None-Match': etag})
+        self.assertEqual(again.status_code, 304)
+
+        state = State(name='Lagos')
+        state.save()
+        changed = self.client.get('/states_list',
+                                  headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertIn('Lagos', changed.get_data(as_text=True))
+        storage.delete(state)
+        storage.save()
+
+    def test_other_process_change(self):
+        """ A state another process wrote to the file re-renders the page """
+        self.client.get('/states_list')
+        other = {'State.x': {'__class__': 'State', 'id': 'x',
+                             'name': 'Oyo'}}
+        with open('file.json', 'w') as f:
+            json.dump(other, f)
+        page = self.client.get('/states_list').get_data(as_text=True)
+        self.assertIn('Oyo', page)
+        storage.delete(storage.get(State, 'x'))
+
+
+if __name__ == '__main__':
+    unittest.main()
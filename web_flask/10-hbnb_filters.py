@@ -4,9 +4,13 @@ from flask import Flask, render_template
 from models import storage
 from models.amenity import Amenity
 from models.state import State
+from models.city import City
+from web_flask.cache import cached_page
+from web_flask.metrics import add_metrics
 
 app = Flask(__name__)
 app.url_map.strict_slashes = False
+add_metrics(app)
 
 
 @app.teardown_appcontext
@@ -16,11 +20,12 @@ def dispose(exception):
 
 
 @app.route('/hbnb_filters')
+@cached_page(State, City, Amenity)
 def hbnb_filters():
-    states = storage.all(State)
-    amenities = storage.all(Amenity)
-    return render_template('10-hbnb_filters.html', states=list(states.values()),
-                           amenities=list(amenities.values()))
+    states = storage.query(State, order_by='name', load=('cities',))
+    amenities = storage.query(Amenity, order_by='name')
+    return render_template('10-hbnb_filters.html', states=states,
+                           amenities=amenities)
 
 
 if __name__ == '__main__':
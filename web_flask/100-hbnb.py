@@ -1,13 +1,19 @@
 #!/usr/bin/python3
 """ Starts a flask web application """
-from flask import Flask, render_template
+from flask import Flask, abort, render_template, request
 from models import storage
 from models.amenity import Amenity
 from models.place import Place
 from models.state import State
+from models.city import City
+from models.user import User
+from web_flask.cache import cached_page
+from web_flask.metrics import add_metrics
+from web_flask.search import checked, search_filters
 
 app = Flask(__name__)
 app.url_map.strict_slashes = False
+add_metrics(app)
 
 
 @app.teardown_appcontext
@@ -17,14 +23,19 @@ def dispose(exception):
 
 
 @app.route('/hbnb')
+@cached_page(State, City, Amenity, Place, User)
 def hbnb_filters():
-    states = storage.all(State)
-    amenities = storage.all(Amenity)
-    places = storage.all(Place)
+    """ Display the search filters and the places matching them """
+    try:
+        filters = search_filters(request.args)
+    except ValueError:
+        abort(400)
     data = {
-        'states': list(states.values()),
-        'amenities': list(amenities.values()),
-        'places': list(places.values())
+        'states': storage.query(State, order_by='name', load=('cities',)),
+        'amenities': storage.query(Amenity, order_by='name'),
+        'places': storage.search_places(order_by='name', load=('user',),
+                                        **filters),
+        'checked': checked(filters)
     }
     return render_template('100-hbnb.html', **data)
 
@@ -3,9 +3,12 @@
 from flask import Flask, render_template
 from models import storage
 from models.state import State
+from web_flask.cache import cached_page
+from web_flask.metrics import add_metrics
 
 app = Flask(__name__)
 app.url_map.strict_slashes = False
+add_metrics(app)
 
 
 @app.teardown_appcontext
@@ -15,10 +18,10 @@ def dispose(exception):
 
 
 @app.route('/states_list')
+@cached_page(State)
 def states():
     """ Display list of all the states """
-    states = storage.all(State)
-    states_list = list(states.values())
+    states_list = storage.query(State, order_by='name')
     return render_template('7-states_list.html', states=states_list)
 
 
@@ -3,9 +3,13 @@
 from flask import Flask, render_template
 from models import storage
 from models.state import State
+from models.city import City
+from web_flask.cache import cached_page
+from web_flask.metrics import add_metrics
 
 app = Flask(__name__)
 app.url_map.strict_slashes = False
+add_metrics(app)
 
 
 @app.teardown_appcontext
@@ -15,10 +19,10 @@ def dispose(exception):
 
 
 @app.route('/cities_by_states')
+@cached_page(State, City)
 def states():
     """ Display list of all the states """
-    states = storage.all(State)
-    states_list = list(states.values())
+    states_list = storage.query(State, order_by='name', load=('cities',))
     return render_template('8-cities_by_states.html', states=states_list)
 
 
@@ -3,9 +3,13 @@
 from flask import Flask, render_template
 from models import storage
 from models.state import State
+from models.city import City
+from web_flask.cache import cached_page
+from web_flask.metrics import add_metrics
 
 app = Flask(__name__)
 app.url_map.strict_slashes = False
+add_metrics(app)
 
 
 @app.teardown_appcontext
@@ -16,11 +20,14 @@ def dispose(exception):
 
 @app.route('/states/')
 @app.route('/states/<id>')
+@cached_page(State, City)
 def states_and_state(id=None):
     """ Display list of all the states """
     if id:
-        id = 'State.{}'.format(id)
-    return render_template('9-states.html', states=storage.all(State), id=id)
+        return render_template('9-states.html', id=id,
+                               state=storage.get(State, id))
+    return render_template('9-states.html',
+                           states=storage.query(State, order_by='name'))
 
 
 if __name__ == '__main__':
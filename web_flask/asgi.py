@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""
+Serves the pages of 7-states_list.py to 100-hbnb.py as one ASGI app.
+
+The views are coroutines reading storage through
+models.engine.async_storage, so a request waiting on storage leaves the
+worker free to serve others. Quart keeps Flask's API, and the pages use
+the same templates and page cache as the Flask apps. Serve it with any
+ASGI server, e.g.:
+
+    hypercorn web_flask.asgi:app --bind 0.0.0.0:5000
+"""
+from functools import wraps
+from quart import Quart, abort, make_response, render_template, request
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.engine.async_storage import async_storage
+from models.place import Place
+from models.state import State
+from models.user import User
+from web_flask.cache import cache
+from web_flask.metrics import add_metrics
+from web_flask.search import checked, search_filters
+
+app = Quart(__name__)
+app.url_map.strict_slashes = False
+add_metrics(app)
+aio = async_storage(storage)
+
+
+def cached_page(*classes):
+    """Decorates a coroutine view whose output only depends on classes"""
+    def decorator(view):
+        """Wraps view with the cache"""
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            """Serves the cached page, rendering it when needed"""
+            if cache.ttl <= 0:
+                return await view(*args, **kwargs)
+            key = request.full_path
+            # see what other processes changed before trusting versions
+            await aio.close()
+            versions = tuple(aio.version(cls) for cls in classes)
+            page = cache.get(key, versions)
+            if page is None:
+                page = cache.put(key, versions, await view(*args, **kwargs))
+            response = await make_response(page['body'])
+            response.set_etag(page['etag'])
+            response.last_modified = page['time']
+            response.cache_control.no_cache = True
+            return await response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+@app.teardown_appcontext
+async def dispose(exception):
+    """ Remove current session """
+    await aio.close()
+
+
+@app.route('/states_list')
+@cached_page(State)
+async def states_list():
+    """ Display list of all the states """
+    states = await aio.query(State, order_by='name')
+    return await render_template('7-states_list.html', states=states)
+
+
+@app.route('/cities_by_states')
+@cached_page(State, City)
+async def cities_by_states():
+    """ Display the states with their cities """
+    states = await aio.query(State, order_by='name', load=('cities',))
+    return await render_template('8-cities_by_states.html', states=states)
+
+
+@app.route('/states/')
+@app.route('/states/<id>')
+@cached_page(State, City)
+async def states_and_state(id=None):
+    """ Display list of all the states, or one state and its cities """
+    if id:
+        state = await aio.get(State, id, load=('cities',))
+        return await render_template('9-states.html', id=id, state=state)
+    states = await aio.query(State, order_by='name')
+    return await render_template('9-states.html', states=states)
+
+
+@app.route('/hbnb_filters')
+@cached_page(State, City, Amenity)
+async def hbnb_filters():
+    """ Display the search filters """
+    states = await aio.query(State, order_by='name', load=('cities',))
+    amenities = await aio.query(Amenity, order_by='name')
+    return await render_template('10-hbnb_filters.html', states=states,
+                                 amenities=amenities)
+
+
+@app.route('/hbnb')
+@cached_page(State, City, Amenity, Place, User)
+async def hbnb():
+    """ Display the search filters and the places matching them """
+    try:
+        filters = search_filters(request.args)
+    except ValueError:
+        abort(400)
+    data = {
+        'states': await aio.query(State, order_by='name', load=('cities',)),
+        'amenities': await aio.query(Amenity, order_by='name'),
+        'places': await aio.search_places(order_by='name', load=('user',),
+                                          **filters),
+        'checked': checked(filters)
+    }
+    return await render_template('100-hbnb.html', **data)
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+"""
+Response cache shared by the web_flask applications.
+
+Caching is off unless HBNB_CACHE_TTL gives the seconds a page may be
+kept. A page is cached under its path together with the storage version
+of every class it reads, so a new(), save() or delete() touching one of
+those classes makes the next request render it again. Before comparing
+versions storage.close() picks up what other processes wrote to the
+FileStorage file; DBStorage versions only count the commits of this
+process, so a page can then lag writes made elsewhere by up to
+HBNB_CACHE_TTL seconds. The least recently used pages are evicted past
+HBNB_CACHE_SIZE entries (default 128). Responses carry an ETag and a
+Last-Modified header, so browsers revalidating an unchanged page get a
+304.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from os import getenv
+from flask import make_response, request
+from models import storage
+
+
+class PageCache:
+    """A thread-safe LRU cache of rendered pages with a time to live"""
+
+    def __init__(self, size=128, ttl=60):
+        """Creates an empty cache holding at most size pages"""
+        self.size = size
+        self.ttl = ttl
+        self.pages = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, versions):
+        """Returns the page stored under key for versions, or None"""
+        with self.lock:
+            page = self.pages.get(key)
+            if page is None:
+                return None
+            if page['versions'] != versions or \
+                    time.time() - page['time'] > self.ttl:
+                del self.pages[key]
+                return None
+            self.pages.move_to_end(key)
+            return page
+
+    def put(self, key, versions, body):
+        """Stores body under key and returns the new page"""
+        page = {
+            'versions': versions,
+            'body': body,
+            'etag': hashlib.sha1(body.encode()).hexdigest(),
+            'time': time.time(),
+        }
+        with self.lock:
+            self.pages[key] = page
+            self.pages.move_to_end(key)
+            while len(self.pages) > self.size:
+                self.pages.popitem(last=False)
+        return page
+
+    def clear(self):
+        """Drops every page"""
+        with self.lock:
+            self.pages.clear()
+
+
+cache = PageCache(int(getenv('HBNB_CACHE_SIZE', '128')),
+                  float(getenv('HBNB_CACHE_TTL', '0')))
+
+
+def cached_page(*classes):
+    """Decorates a view whose output only depends on classes"""
+    def decorator(view):
+        """Wraps view with the cache"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            """Serves the cached page, rendering it when needed"""
+            if cache.ttl <= 0:
+                return view(*args, **kwargs)
+            key = request.full_path
+            # see what other processes changed before trusting versions
+            storage.close()
+            versions = tuple(storage.version(cls) for cls in classes)
+            page = cache.get(key, versions)
+            if page is None:
+                page = cache.put(key, versions, view(*args, **kwargs))
+            response = make_response(page['body'])
+            response.set_etag(page['etag'])
+            response.last_modified = page['time']
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
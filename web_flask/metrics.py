@@ -0,0 +1,20 @@
+#!/usr/bin/python3
+"""
+Serves the storage metrics at /metrics for the web_flask applications.
+
+The page is models.engine.metrics rendered in the Prometheus text
+format; it is not found unless HBNB_METRICS is set.
+"""
+from models.engine.metrics import CONTENT_TYPE, metrics
+
+
+def metrics_page():
+    """ Display the storage metrics """
+    if not metrics.enabled:
+        return 'Not found', 404
+    return metrics.render(), 200, {'Content-Type': CONTENT_TYPE}
+
+
+def add_metrics(app):
+    """Serves metrics_page() at /metrics on a Flask or Quart app"""
+    app.add_url_rule('/metrics', 'metrics', metrics_page)
@@ -0,0 +1,34 @@
+#!/usr/bin/python3
+"""
+Reads the place search filters of the /hbnb page from its query string.
+
+The filter form sends one states, cities or amenities parameter per
+checked box; comma separated ids are taken as well. min_price,
+max_price and guests are numbers. The result is passed on as
+storage.search_places(**filters).
+"""
+
+# parameters holding lists of ids
+lists = ('states', 'cities', 'amenities')
+# parameters holding numbers
+numbers = ('min_price', 'max_price', 'guests')
+
+
+def search_filters(args):
+    """Returns the filters found in args; ValueError on a bad number"""
+    filters = {}
+    for name in lists:
+        ids = [id for value in args.getlist(name)
+               for id in value.split(',') if id]
+        if ids:
+            filters[name] = ids
+    for name in numbers:
+        value = args.get(name)
+        if value:
+            filters[name] = int(value)
+    return filters
+
+
+def checked(filters):
+    """Returns the ids of the boxes to show checked"""
+    return {id for name in lists for id in filters.get(name, ())}